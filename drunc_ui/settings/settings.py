@@ -42,11 +42,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "main.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "main.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -135,7 +137,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 INSTALLED_APPS += ["main", "process_manager", "controller", "django_tables2"]
 
 
-MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+MIDDLEWARE.insert(
+    MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+)
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
 AUTH_USER_MODEL = "main.User"
@@ -147,6 +152,45 @@ INSTALLED_APPS += ["django_bootstrap5"]
 DJANGO_TABLES2_TEMPLATE = "django_tables2/bootstrap5.html"
 
 PROCESS_MANAGER_URL = os.getenv("PROCESS_MANAGER_URL", "localhost:10054")
+# number of long-lived gRPC channels each worker keeps open to the process manager
+PROCESS_MANAGER_POOL_SIZE = int(os.getenv("PROCESS_MANAGER_POOL_SIZE", "2"))
+# seconds to wait for a call to the process manager before giving up
+PROCESS_MANAGER_TIMEOUT = float(os.getenv("PROCESS_MANAGER_TIMEOUT", "30"))
+# maximum number of process restarts sent to the process manager at once
+PROCESS_RESTART_CONCURRENCY = int(os.getenv("PROCESS_RESTART_CONCURRENCY", "20"))
+# bulk boots: the maximum number of sessions booted at once, of boots started each
+# second (0 for no limit) and of sessions booted by a single request
+PROCESS_BOOT_CONCURRENCY = int(os.getenv("PROCESS_BOOT_CONCURRENCY", "20"))
+PROCESS_BOOT_RATE = float(os.getenv("PROCESS_BOOT_RATE", "50"))
+PROCESS_BULK_BOOT_MAX_SESSIONS = int(os.getenv("PROCESS_BULK_BOOT_MAX_SESSIONS", "500"))
+# background jobs: threads running them in each worker, the number of processes
+# restarted between progress updates, the number of each user's recent jobs shown and
+# the seconds after which unfinished jobs are marked as failed
+PROCESS_JOB_WORKERS = int(os.getenv("PROCESS_JOB_WORKERS", "4"))
+PROCESS_JOB_BATCH_SIZE = int(os.getenv("PROCESS_JOB_BATCH_SIZE", "20"))
+PROCESS_JOBS_SHOWN = int(os.getenv("PROCESS_JOBS_SHOWN", "5"))
+PROCESS_JOB_TIMEOUT = float(os.getenv("PROCESS_JOB_TIMEOUT", "3600"))
+# seconds for which process manager ps results are shared between requests and,
+# optionally, the name of a cache in CACHES used to share them between workers
+PROCESS_SNAPSHOT_TTL = float(os.getenv("PROCESS_SNAPSHOT_TTL", "1"))
+PROCESS_SNAPSHOT_CACHE = os.getenv("PROCESS_SNAPSHOT_CACHE")
+# seconds between polls for process table updates, the number of past updates
+# remembered for clients that fall behind and the seconds without any client reading
+# the updates after which polling stops until the next read
+PROCESS_POLL_INTERVAL = float(os.getenv("PROCESS_POLL_INTERVAL", "1"))
+PROCESS_POLL_HISTORY = int(os.getenv("PROCESS_POLL_HISTORY", "60"))
+PROCESS_POLL_IDLE_TIMEOUT = float(os.getenv("PROCESS_POLL_IDLE_TIMEOUT", "30"))
+# number of processes shown on each page of the process table
+PROCESS_TABLE_PAGE_SIZE = int(os.getenv("PROCESS_TABLE_PAGE_SIZE", "50"))
+# default number of process log lines shown at once
+PROCESS_LOG_LINES = int(os.getenv("PROCESS_LOG_LINES", "100"))
+# recent log lines cached per process, the number of processes cached and the seconds
+# before the process manager is checked for new lines
+PROCESS_LOG_CACHE_LINES = int(os.getenv("PROCESS_LOG_CACHE_LINES", "1000"))
+PROCESS_LOG_CACHE_PROCESSES = int(os.getenv("PROCESS_LOG_CACHE_PROCESSES", "200"))
+PROCESS_LOG_CACHE_TTL = float(os.getenv("PROCESS_LOG_CACHE_TTL", "1"))
+# maximum number of process logs read at once when viewing several together
+PROCESS_LOG_CONCURRENCY = int(os.getenv("PROCESS_LOG_CONCURRENCY", "10"))
 
 INSTALLED_APPS += ["crispy_forms", "crispy_bootstrap5"]
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
@@ -154,4 +198,29 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 KAFKA_ADDRESS = os.getenv("KAFKA_ADDRESS", "kafka:9092")
 
+# Retention of stored Kafka messages, per topic: the number of most recent messages
+# kept and the maximum age in seconds. Zero disables a limit.
+KAFKA_MESSAGE_RETENTION_COUNT = int(os.getenv("KAFKA_MESSAGE_RETENTION_COUNT", "1000"))
+KAFKA_MESSAGE_RETENTION_AGE = int(os.getenv("KAFKA_MESSAGE_RETENTION_AGE", "86400"))
+
+# Server-sent event streams: seconds between server side checks for new events,
+# between keep-alive comments and before the stream is closed for the browser to
+# reconnect, plus the reconnection delay given to the browser in milliseconds
+SSE_POLL_INTERVAL = float(os.getenv("SSE_POLL_INTERVAL", "0.5"))
+SSE_KEEPALIVE = float(os.getenv("SSE_KEEPALIVE", "15"))
+SSE_MAX_DURATION = float(os.getenv("SSE_MAX_DURATION", "300"))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "1000"))
+
+# bearer token required to read the metrics endpoint, which is open to all if unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# opt-in profiling of requests: whether it is enabled, the fraction of requests
+# profiled (besides those from staff with an X-Profile header), the seconds a request
+# must take for its profile to be recorded, the number of functions listed in each
+# profile and the number of profiles kept for viewing in the admin site
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_THRESHOLD = float(os.getenv("PROFILING_THRESHOLD", "0.5"))
+PROFILING_LINES = int(os.getenv("PROFILING_LINES", "40"))
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "100"))
+
 django_stubs_ext.monkeypatch()
@@ -2,7 +2,65 @@
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.http import HttpRequest
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import SafeString
 
-from .models import User
+from .models import RequestProfile, User
 
 admin.site.register(User, UserAdmin)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin[RequestProfile]):
+    """Admin for viewing the profiles of slow requests."""
+
+    list_display = ("created", "method", "path", "view", "status", "duration", "user")
+    list_filter = ("view", "method", "status")
+    search_fields = ("path",)
+    fields = (
+        "created",
+        ("method", "path"),
+        ("view", "status"),
+        ("user", "duration"),
+        "time_breakdown",
+        "profile",
+    )
+    readonly_fields = (
+        "created",
+        "method",
+        "path",
+        "view",
+        "status",
+        "user",
+        "duration",
+        "time_breakdown",
+        "profile",
+    )
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        """Profiles are only recorded by the profiling middleware."""
+        return False
+
+    def has_change_permission(
+        self, request: HttpRequest, obj: RequestProfile | None = None
+    ) -> bool:
+        """Profiles cannot be edited."""
+        return False
+
+    @admin.display(description="Breakdown")
+    def time_breakdown(self, obj: RequestProfile) -> SafeString:
+        """The seconds spent in each area of the code."""
+        return format_html(
+            "<table>{}</table>",
+            format_html_join(
+                "",
+                "<tr><td>{}</td><td>{} s</td></tr>",
+                ((area, f"{seconds:.4f}") for area, seconds in obj.breakdown.items()),
+            ),
+        )
+
+    @admin.display(description="Profile")
+    def profile(self, obj: RequestProfile) -> SafeString:
+        """The functions that took the longest."""
+        return format_html("<pre>{}</pre>", obj.stats)
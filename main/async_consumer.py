@@ -0,0 +1,141 @@
+"""Asynchronous consumption of broadcast messages from several topic patterns at once.
+
+One reader task per topic pattern fetches batches of records from the broker and hands
+them to a single writer task through a bounded queue. The writer stores everything
+waiting in the queue in one transaction. Readers only commit their offsets once their
+batch has been stored, and stop fetching while the queue is full, so a slow database
+applies backpressure to the broker rather than building up records in memory.
+"""
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from .broker import Broker, Record, Subscription
+from .ingest import retention_limits, store_records
+from .models import KafkaMessage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Batch:
+    records: list[Record]
+    stored: asyncio.Future[None] = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+@dataclass
+class ConsumerOptions:
+    """Tuning options for the async consumer."""
+
+    max_records: int = 500
+    """Maximum number of records fetched by each reader at once."""
+    timeout_ms: int = 500
+    """Milliseconds each reader waits for records before checking for shutdown."""
+    queue_size: int = 10
+    """Maximum number of batches waiting to be stored before readers pause."""
+    compact_interval: float = 60
+    """Seconds between deletions of messages beyond the retention limits."""
+
+
+async def _read(
+    subscription: Subscription,
+    queue: asyncio.Queue[_Batch],
+    stop: asyncio.Event,
+    options: ConsumerOptions,
+) -> None:
+    """Fetch records for one pattern until stopped, committing once stored."""
+    try:
+        while not stop.is_set():
+            records = await subscription.getmany(
+                options.timeout_ms, options.max_records
+            )
+            if not records:
+                continue
+            batch = _Batch(records)
+            await queue.put(batch)
+            await batch.stored
+            await subscription.commit()
+    finally:
+        await subscription.close()
+
+
+async def _write(queue: asyncio.Queue[_Batch]) -> None:
+    """Store batches from the queue, combining any that are waiting."""
+    while True:
+        batches = [await queue.get()]
+        while not queue.empty():
+            batches.append(queue.get_nowait())
+
+        try:
+            records = [record for batch in batches for record in batch.records]
+            stored = await sync_to_async(store_records)(records)
+            logger.debug("Stored %d messages.", stored)
+        except Exception as e:
+            for batch in batches:
+                batch.stored.set_exception(e)
+        else:
+            for batch in batches:
+                batch.stored.set_result(None)
+        finally:
+            for _ in batches:
+                queue.task_done()
+
+
+async def _compact(
+    interval: float, limits: tuple[int | None, timedelta | None], stop: asyncio.Event
+) -> None:
+    """Periodically delete messages beyond the retention limits until stopped."""
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+            return
+        except TimeoutError:
+            deleted = await sync_to_async(KafkaMessage.compact)(*limits)
+            logger.debug("Deleted %d old messages.", deleted)
+
+
+async def consume(
+    broker: Broker,
+    patterns: Iterable[str],
+    stop: asyncio.Event,
+    options: ConsumerOptions | None = None,
+) -> None:
+    """Consume messages from all topics matching any of the patterns until stopped.
+
+    On stopping, readers finish their current fetch and any records already fetched are
+    stored and committed before returning.
+
+    Args:
+        broker: the broker to consume from.
+        patterns: regular expressions for the topics to consume. Each is consumed
+            concurrently by its own subscription.
+        stop: event that begins shutdown when set.
+        options: tuning options.
+    """
+    options = options or ConsumerOptions()
+    queue: asyncio.Queue[_Batch] = asyncio.Queue(maxsize=options.queue_size)
+    writer = asyncio.create_task(_write(queue))
+    compactor = asyncio.create_task(
+        _compact(options.compact_interval, retention_limits(), stop)
+    )
+    readers = [
+        asyncio.create_task(_read(broker.subscribe(pattern), queue, stop, options))
+        for pattern in patterns
+    ]
+
+    try:
+        # readers only return once stopped, or raise if the broker fails
+        await asyncio.gather(*readers)
+    finally:
+        stop.set()
+        await asyncio.gather(*readers, return_exceptions=True)
+        await queue.join()
+        writer.cancel()
+        await asyncio.gather(writer, compactor, return_exceptions=True)
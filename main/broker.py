@@ -0,0 +1,191 @@
+"""Message brokers from which broadcast messages are consumed asynchronously.
+
+The async consumer only depends on the Broker interface defined here so that it can
+work against Kafka in deployment and against an in-memory broker in tests.
+"""
+
+import asyncio
+import re
+import time
+from collections import defaultdict
+from typing import NamedTuple, Protocol
+
+from kafka import KafkaConsumer
+
+
+class Record(Protocol):
+    """A message received from a broker, matching kafka-python's ConsumerRecord."""
+
+    @property
+    def topic(self) -> str:
+        """The topic the message was sent to."""
+
+    @property
+    def partition(self) -> int:
+        """The topic partition holding the message."""
+
+    @property
+    def offset(self) -> int:
+        """The position of the message in the partition."""
+
+    @property
+    def timestamp(self) -> int | None:
+        """The message creation time in milliseconds since the epoch."""
+
+    @property
+    def value(self) -> bytes:
+        """The message payload."""
+
+
+class Subscription(Protocol):
+    """A subscription to the topics matching a pattern."""
+
+    async def getmany(self, timeout_ms: int, max_records: int) -> list[Record]:
+        """Wait for and return the next records, or an empty list on timeout."""
+
+    async def commit(self) -> None:
+        """Mark all records returned so far as processed."""
+
+    async def close(self) -> None:
+        """End the subscription."""
+
+
+class Broker(Protocol):
+    """A source of messages."""
+
+    def subscribe(self, pattern: str) -> Subscription:
+        """Subscribe to all topics matching a regular expression."""
+
+
+class KafkaSubscription:
+    """Subscription backed by a kafka-python consumer.
+
+    kafka-python is blocking so calls are made in a worker thread. They are never made
+    concurrently as the consumer is not thread safe.
+    """
+
+    def __init__(self, consumer: KafkaConsumer) -> None:
+        """Wrap a subscribed consumer."""
+        self.consumer = consumer
+
+    async def getmany(self, timeout_ms: int, max_records: int) -> list[Record]:
+        """Wait for and return the next records, or an empty list on timeout."""
+        batches = await asyncio.to_thread(
+            self.consumer.poll, timeout_ms=timeout_ms, max_records=max_records
+        )
+        return [record for records in batches.values() for record in records]
+
+    async def commit(self) -> None:
+        """Commit the offsets of all records returned so far."""
+        await asyncio.to_thread(self.consumer.commit)
+
+    async def close(self) -> None:
+        """Close the consumer without committing."""
+        await asyncio.to_thread(self.consumer.close, autocommit=False)
+
+
+class KafkaBroker:
+    """Broker connecting to a Kafka cluster."""
+
+    def __init__(self, bootstrap_servers: list[str], group_id: str) -> None:
+        """Configure the connection.
+
+        Args:
+            bootstrap_servers: Kafka server addresses.
+            group_id: prefix for the consumer groups under which offsets are committed.
+                Each subscription uses its own group, named after its pattern.
+        """
+        self.bootstrap_servers = bootstrap_servers
+        self.group_id = group_id
+
+    def subscribe(self, pattern: str) -> KafkaSubscription:
+        """Subscribe a new consumer to all topics matching a regular expression."""
+        consumer = KafkaConsumer(
+            bootstrap_servers=self.bootstrap_servers,
+            group_id=f"{self.group_id}:{pattern}",
+            enable_auto_commit=False,
+        )
+        consumer.subscribe(pattern=pattern)
+        return KafkaSubscription(consumer)
+
+
+class InMemoryRecord(NamedTuple):
+    """A record held by the InMemoryBroker."""
+
+    topic: str
+    partition: int
+    offset: int
+    timestamp: int | None
+    value: bytes
+
+
+class InMemorySubscription:
+    """Subscription to an InMemoryBroker."""
+
+    def __init__(self, broker: "InMemoryBroker", pattern: str) -> None:
+        """Subscribe to a broker, starting from its first messages."""
+        self.broker = broker
+        self.pattern = re.compile(pattern)
+        self.positions: dict[str, int] = defaultdict(int)
+        self.committed: dict[str, int] = {}
+        self.closed = False
+
+    def _take(self, max_records: int) -> list[Record]:
+        records: list[Record] = []
+        for topic, log in self.broker.topics.items():
+            if not self.pattern.fullmatch(topic):
+                continue
+            new = log[self.positions[topic] : self.positions[topic] + max_records]
+            self.positions[topic] += len(new)
+            records.extend(new)
+            max_records -= len(new)
+        return records
+
+    async def getmany(self, timeout_ms: int, max_records: int) -> list[Record]:
+        """Wait for and return the next records, or an empty list on timeout."""
+        async with self.broker.published:
+            try:
+                await asyncio.wait_for(
+                    self.broker.published.wait_for(self._pending), timeout_ms / 1000
+                )
+            except TimeoutError:
+                return []
+            return self._take(max_records)
+
+    def _pending(self) -> bool:
+        return any(
+            len(log) > self.positions[topic]
+            for topic, log in self.broker.topics.items()
+            if self.pattern.fullmatch(topic)
+        )
+
+    async def commit(self) -> None:
+        """Record the positions reached as committed."""
+        self.committed = dict(self.positions)
+
+    async def close(self) -> None:
+        """Mark the subscription as closed."""
+        self.closed = True
+
+
+class InMemoryBroker:
+    """Broker holding messages in memory, for testing and development."""
+
+    def __init__(self) -> None:
+        """Create a broker with no topics."""
+        self.topics: dict[str, list[InMemoryRecord]] = defaultdict(list)
+        self.subscriptions: list[InMemorySubscription] = []
+        self.published = asyncio.Condition()
+
+    async def publish(self, topic: str, value: bytes) -> None:
+        """Add a message to a topic and wake any waiting subscribers."""
+        log = self.topics[topic]
+        log.append(InMemoryRecord(topic, 0, len(log), int(time.time() * 1000), value))
+        async with self.published:
+            self.published.notify_all()
+
+    def subscribe(self, pattern: str) -> InMemorySubscription:
+        """Subscribe to all topics matching a regular expression."""
+        subscription = InMemorySubscription(self, pattern)
+        self.subscriptions.append(subscription)
+        return subscription
@@ -0,0 +1,151 @@
+"""Conversion and storage of Kafka records as KafkaMessage rows."""
+
+import logging
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from druncschema.broadcast_pb2 import BroadcastMessage, BroadcastType
+from google.protobuf.message import DecodeError
+from prometheus_client import Counter, Gauge, Histogram
+
+from .broker import Record
+from .models import KafkaMessage
+
+logger = logging.getLogger(__name__)
+
+_MESSAGES = Counter(
+    "drunc_ui_kafka_messages_total",
+    "Kafka messages received, by topic.",
+    ["topic"],
+)
+_UNDECODABLE = Counter(
+    "drunc_ui_kafka_undecodable_messages_total",
+    "Kafka messages skipped as they could not be decoded.",
+)
+_BATCH_SIZE = Histogram(
+    "drunc_ui_kafka_batch_size",
+    "Number of Kafka messages written to the database at once.",
+    buckets=(1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+_WRITE_SECONDS = Histogram(
+    "drunc_ui_kafka_write_seconds",
+    "Time taken to write a batch of Kafka messages to the database.",
+)
+_LAG_SECONDS = Gauge(
+    "drunc_ui_kafka_lag_seconds",
+    "Seconds between the newest message of the last batch written being created and "
+    "being stored.",
+    multiprocess_mode="mostrecent",
+)
+
+_SEVERITIES = {
+    "DEBUG": KafkaMessage.Severity.DEBUG,
+    "SERVER_SHUTDOWN": KafkaMessage.Severity.WARNING,
+    "EXCEPTION_RAISED": KafkaMessage.Severity.ERROR,
+    "UNHANDLED_EXCEPTION_RAISED": KafkaMessage.Severity.ERROR,
+    "CHILD_COMMAND_EXECUTION_FAILED": KafkaMessage.Severity.ERROR,
+}
+"""Severity of each BroadcastType name, for those that are not informational."""
+
+
+def _timestamp(record: Record) -> datetime:
+    """Get the time a Kafka record was created, or now if it does not have one."""
+    if record.timestamp is None or record.timestamp < 0:
+        return timezone.now()
+    return datetime.fromtimestamp(record.timestamp / 1000, tz=UTC)
+
+
+def _type_name(bm: BroadcastMessage) -> str:
+    """Get the name of the type of a message, or its number if it is not known."""
+    try:
+        return BroadcastType.Name(bm.type)
+    except ValueError:
+        return str(bm.type)
+
+
+def to_message(record: Record) -> KafkaMessage | None:
+    """Decode a Kafka record holding a drunc BroadcastMessage.
+
+    Args:
+        record: the record received from Kafka.
+
+    Returns:
+        The unsaved message, or None if the record could not be decoded.
+    """
+    bm = BroadcastMessage()
+    try:
+        bm.ParseFromString(record.value)
+    except DecodeError:
+        logger.warning(
+            "Skipping undecodable message at %s:%s:%s.",
+            record.topic,
+            record.partition,
+            record.offset,
+        )
+        return None
+
+    message_type = _type_name(bm)
+    return KafkaMessage(
+        topic=record.topic,
+        partition=record.partition,
+        offset=record.offset,
+        timestamp=_timestamp(record),
+        emitter=bm.emitter.process,
+        session=bm.emitter.session,
+        message_type=message_type,
+        severity=_SEVERITIES.get(message_type, KafkaMessage.Severity.INFO),
+        body=bm.data.value.decode("utf-8", errors="replace"),
+    )
+
+
+def store_records(records: Iterable[Record]) -> int:
+    """Decode and store a batch of Kafka records in a single transaction.
+
+    Records that have already been stored, e.g. because they were redelivered after a
+    restart before their offsets were committed, are ignored.
+
+    Args:
+        records: the records to store, from any number of topics and partitions.
+
+    Returns:
+        The number of records decoded and passed to the database.
+    """
+    records = list(records)
+    topics: dict[str, int] = {}
+    for record in records:
+        topics[record.topic] = topics.get(record.topic, 0) + 1
+    for topic, count in topics.items():
+        _MESSAGES.labels(topic=topic).inc(count)
+    messages = [m for record in records if (m := to_message(record)) is not None]
+    if skipped := len(records) - len(messages):
+        _UNDECODABLE.inc(skipped)
+    if messages:
+        with _WRITE_SECONDS.time(), transaction.atomic():
+            KafkaMessage.objects.bulk_create(messages, ignore_conflicts=True)
+        _BATCH_SIZE.observe(len(messages))
+        newest = max(message.timestamp for message in messages)
+        _LAG_SECONDS.set((timezone.now() - newest).total_seconds())
+    return len(messages)
+
+
+def retention_limits(
+    max_count: int | None = None, max_age: int | None = None
+) -> tuple[int | None, timedelta | None]:
+    """Get the message retention limits, defaulting to those in the settings.
+
+    Args:
+        max_count: number of messages to keep per topic.
+        max_age: maximum age of messages in seconds.
+
+    Returns:
+        The limits in the form taken by KafkaMessage.compact, with None for any limit
+        that is disabled by being zero.
+    """
+    if max_count is None:
+        max_count = settings.KAFKA_MESSAGE_RETENTION_COUNT
+    if max_age is None:
+        max_age = settings.KAFKA_MESSAGE_RETENTION_AGE
+    return (max_count or None, timedelta(seconds=max_age) if max_age else None)
@@ -0,0 +1,35 @@
+"""Django management command to delete stored Kafka messages beyond retention limits."""
+
+from argparse import ArgumentParser
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from main.ingest import retention_limits
+from main.models import KafkaMessage
+
+
+class Command(BaseCommand):
+    """Deletes stored Kafka messages that exceed the retention limits."""
+
+    help = __doc__
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        """Add commandline options."""
+        parser.add_argument(
+            "--max-count",
+            type=int,
+            help="Number of messages to keep per topic (default from settings).",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            help="Maximum message age in seconds (default from settings).",
+        )
+
+    def handle(  # type: ignore[misc]
+        self, max_count: int | None = None, max_age: int | None = None, **kwargs: Any
+    ) -> None:
+        """Command business logic."""
+        deleted = KafkaMessage.compact(*retention_limits(max_count, max_age))
+        self.stdout.write(f"Deleted {deleted} messages.")
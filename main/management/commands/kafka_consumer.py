@@ -1,51 +1,181 @@
 """Django management command to populate Kafka messages into application database."""
 
+import asyncio
+import signal
+import time
 from argparse import ArgumentParser
 from typing import Any
 
 from django.conf import settings
-from django.contrib.sessions.backends.db import SessionStore
-from django.contrib.sessions.models import Session
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from druncschema.broadcast_pb2 import BroadcastMessage
 from kafka import KafkaConsumer
+from kafka.consumer.fetcher import ConsumerRecord
+from prometheus_client import start_http_server
+
+from main.async_consumer import ConsumerOptions, consume
+from main.broker import KafkaBroker
+from main.ingest import retention_limits, store_records
+from main.metrics import get_registry
+from main.models import KafkaMessage
 
 
 class Command(BaseCommand):
-    """Consumes messages from Kafka and stores them in active user sessions."""
+    """Consumes messages from Kafka and stores them for display to users."""
 
     help = __doc__
 
     def add_arguments(self, parser: ArgumentParser) -> None:
         """Add commandline options."""
         parser.add_argument("--debug", action="store_true")
+        parser.add_argument(
+            "--topic-pattern",
+            action="append",
+            dest="topic_patterns",
+            help="Regular expression for topics to consume. May be given more than "
+            "once (default: control.*.process_manager).",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="use_async",
+            help="Consume each topic pattern concurrently using asyncio.",
+        )
+        parser.add_argument(
+            "--compact-interval",
+            type=float,
+            default=60,
+            help="Seconds between deletions of messages beyond the retention limits.",
+        )
+        parser.add_argument(
+            "--group-id",
+            default="drunc_ui",
+            help="Kafka consumer group under which offsets are committed.",
+        )
+        parser.add_argument(
+            "--max-poll-records",
+            type=int,
+            default=500,
+            help="Maximum number of records to fetch per poll and to write at once.",
+        )
+        parser.add_argument(
+            "--poll-timeout",
+            type=int,
+            default=500,
+            help="Milliseconds to wait for records in each poll.",
+        )
+        parser.add_argument(
+            "--linger",
+            type=int,
+            default=0,
+            help="Milliseconds to keep accumulating records from successive polls "
+            "before writing them, unless --max-poll-records are already waiting.",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=0,
+            help="Port on which to serve consumer metrics for Prometheus. Metrics are "
+            "not served if not given.",
+        )
 
-    def handle(self, debug: bool = False, **kwargs: Any) -> None:  # type: ignore[misc]
+    def handle(  # type: ignore[misc]
+        self,
+        debug: bool = False,
+        topic_patterns: list[str] | None = None,
+        use_async: bool = False,
+        compact_interval: float = 60,
+        group_id: str = "drunc_ui",
+        max_poll_records: int = 500,
+        poll_timeout: int = 500,
+        linger: int = 0,
+        metrics_port: int = 0,
+        **kwargs: Any,
+    ) -> None:
         """Command business logic."""
-        consumer = KafkaConsumer(bootstrap_servers=[settings.KAFKA_ADDRESS])
-        consumer.subscribe(pattern="control.*.process_manager")
+        if metrics_port:
+            start_http_server(metrics_port, registry=get_registry())
+        patterns = topic_patterns or ["control.*.process_manager"]
+        if use_async:
+            options = ConsumerOptions(
+                max_records=max_poll_records,
+                timeout_ms=poll_timeout,
+                compact_interval=compact_interval,
+            )
+            self.stdout.write("Listening for messages from Kafka.")
+            asyncio.run(self._consume_async(patterns, group_id, options))
+            return
+
+        consumer = KafkaConsumer(
+            bootstrap_servers=[settings.KAFKA_ADDRESS],
+            group_id=group_id,
+            enable_auto_commit=False,
+            max_poll_records=max_poll_records,
+        )
+        consumer.subscribe(pattern="|".join(f"(?:{p})" for p in patterns))
         # TODO: determine why the below doesn't work
         # consumer.subscribe(pattern="control.no_session.process_manager")
 
+        limits = retention_limits()
+        last_compacted = time.monotonic()
+        pending: list[ConsumerRecord] = []
+        pending_since = 0.0
+
         self.stdout.write("Listening for messages from Kafka.")
-        while True:
-            for messages in consumer.poll(timeout_ms=500).values():
-                message_bodies = []
-                for message in messages:
-                    if debug:
+        try:
+            while True:
+                polled = [
+                    message
+                    for messages in consumer.poll(timeout_ms=poll_timeout).values()
+                    for message in messages
+                ]
+                if debug:
+                    for message in polled:
                         self.stdout.write(f"Message received: {message}")
-                        self.stdout.flush()
-                    bm = BroadcastMessage()
-                    bm.ParseFromString(message.value)
-                    message_bodies.append(bm.data.value.decode("utf-8"))
-
-                if message_bodies:
-                    with transaction.atomic():
-                        # atomic here to prevent race condition with messages being
-                        # popped by the web application
-                        sessions = Session.objects.all()
-                        for session in sessions:
-                            store = SessionStore(session_key=session.session_key)
-                            store.setdefault("messages", []).extend(message_bodies)
-                            store.save()
+                    self.stdout.flush()
+                if polled and not pending:
+                    pending_since = time.monotonic()
+                pending.extend(polled)
+
+                if pending and (
+                    len(pending) >= max_poll_records
+                    or time.monotonic() - pending_since >= linger / 1000
+                ):
+                    self._write(consumer, pending, debug)
+                    pending = []
+
+                if time.monotonic() - last_compacted >= compact_interval:
+                    deleted = KafkaMessage.compact(*limits)
+                    last_compacted = time.monotonic()
+                    if debug:
+                        self.stdout.write(f"Deleted {deleted} old messages.")
+        except KeyboardInterrupt:
+            if pending:
+                self._write(consumer, pending, debug)
+        finally:
+            consumer.close(autocommit=False)
+
+    def _write(
+        self, consumer: KafkaConsumer, records: list[ConsumerRecord], debug: bool
+    ) -> None:
+        """Store records in a single transaction then commit their offsets.
+
+        Offsets are only committed once the records are safely stored so none are lost
+        if the consumer stops. Records redelivered after a failure between the two
+        steps are ignored when stored so none are duplicated either.
+        """
+        stored = store_records(records)
+        consumer.commit()
+        if debug:
+            self.stdout.write(f"Stored {stored} messages.")
+
+    async def _consume_async(
+        self, patterns: list[str], group_id: str, options: ConsumerOptions
+    ) -> None:
+        """Consume all patterns concurrently until interrupted or terminated."""
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        broker = KafkaBroker([settings.KAFKA_ADDRESS], group_id)
+        await consume(broker, patterns, stop, options)
@@ -0,0 +1,61 @@
+"""Helpers for the Prometheus metrics kept with prometheus_client.
+
+Metrics are held in memory by each process unless the PROMETHEUS_MULTIPROC_DIR
+environment variable names a directory, in which case every process, i.e. each web
+server worker and the kafka_consumer command, writes its metrics there and they are
+exposed together. The directory must be emptied before the processes are started.
+"""
+
+import os
+from collections.abc import Callable
+from functools import wraps
+from typing import ParamSpec, TypeVar
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
+from prometheus_client.multiprocess import MultiProcessCollector
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def get_registry() -> CollectorRegistry:
+    """Get the registry of the metrics to expose.
+
+    Returns:
+        A registry collecting the metrics of all processes if PROMETHEUS_MULTIPROC_DIR
+        is set, or the default registry of this process otherwise.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+
+def timed(
+    histogram: Histogram, errors: Counter | None = None
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator recording the time taken by, and optionally errors raised by, calls.
+
+    Args:
+        histogram: histogram of call durations, with a single "function" label that is
+            given the name of the decorated function.
+        errors: counter of calls that raise an exception, labelled as histogram.
+    """
+
+    def decorator(func: Callable[P, R]) -> Callable[P, R]:
+        name = func.__name__
+
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with histogram.labels(function=name).time():
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    if errors is not None:
+                        errors.labels(function=name).inc()
+                    raise
+
+        return wrapper
+
+    return decorator
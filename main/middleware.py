@@ -0,0 +1,156 @@
+"""Middleware for the main app."""
+
+import logging
+import random
+import threading
+from collections.abc import Awaitable, Callable
+from cProfile import Profile
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from prometheus_client import Counter, Histogram
+
+from .models import RequestProfile, User
+from .profiling import breakdown, summarise
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_SECONDS = Histogram(
+    "drunc_ui_request_duration_seconds",
+    "Time taken to respond to requests, by view.",
+    ["view", "method"],
+)
+_RESPONSES = Counter(
+    "drunc_ui_responses_total",
+    "Responses sent, by view and status code.",
+    ["view", "status"],
+)
+
+_profiling = threading.Lock()
+"""Held while a request is profiled, as only one profiler may be active at once."""
+
+GetResponse = Callable[[HttpRequest], HttpResponseBase | Awaitable[HttpResponseBase]]
+
+
+class MetricsMiddleware:
+    """Records the time taken to respond to each request and the response status.
+
+    Requests are labelled by the name of the view they are resolved to. For streaming
+    responses only the time until the response begins is recorded.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: GetResponse) -> None:
+        """Wrap the next handler, keeping to its sync or async mode."""
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponseBase | Awaitable[HttpResponseBase]:
+        """Time the handling of a request."""
+        if self.is_async:
+            return self._acall(request)
+        start = perf_counter()
+        response = self.get_response(request)
+        assert isinstance(response, HttpResponseBase)
+        self._record(request, response, start)
+        return response
+
+    async def _acall(self, request: HttpRequest) -> HttpResponseBase:
+        start = perf_counter()
+        response = self.get_response(request)
+        if not isinstance(response, HttpResponseBase):
+            response = await response
+        self._record(request, response, start)
+        return response
+
+    @staticmethod
+    def _record(request: HttpRequest, response: HttpResponseBase, start: float) -> None:
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        _REQUEST_SECONDS.labels(view=view, method=request.method or "").observe(
+            perf_counter() - start
+        )
+        _RESPONSES.labels(view=view, status=str(response.status_code)).inc()
+
+
+class ProfilingMiddleware:
+    """Profiles requests, recording slow ones for viewing in the admin site.
+
+    Only used if PROFILING_ENABLED is set. A fraction PROFILING_SAMPLE_RATE of
+    requests are profiled, along with any from staff sent with an X-Profile header.
+    Profiles of requests taking at least PROFILING_THRESHOLD seconds are recorded, as
+    are those of all requests sent with the header by staff. The header is ignored for
+    other users so that they cannot make the server profile their requests.
+
+    Must come after AuthenticationMiddleware so that the user is known. Only the thread
+    handling the request is profiled and, for streaming responses, only the time until
+    the response begins. Only one request is profiled at a time; others chosen while
+    one is being profiled are handled without profiling.
+    """
+
+    header = "X-Profile"
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]) -> None:
+        """Wrap the next handler if profiling is enabled."""
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        """Profile the handling of a request if it is chosen."""
+        user = getattr(request, "user", None)
+        user = user if isinstance(user, User) else None
+        requested = (
+            self.header in request.headers and user is not None and user.is_staff
+        )
+        if not requested and random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        if not _profiling.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profile = Profile()
+            start = perf_counter()
+            response = profile.runcall(self.get_response, request)
+            duration = perf_counter() - start
+        finally:
+            _profiling.release()
+
+        if duration >= settings.PROFILING_THRESHOLD or requested:
+            self._record(request, response, user, duration, profile)
+        return response
+
+    @staticmethod
+    def _record(
+        request: HttpRequest,
+        response: HttpResponseBase,
+        user: User | None,
+        duration: float,
+        profile: Profile,
+    ) -> None:
+        match = request.resolver_match
+        try:
+            RequestProfile.objects.create(
+                method=request.method or "",
+                path=request.get_full_path(),
+                view=match.view_name if match else "",
+                user=user,
+                status=response.status_code,
+                duration=duration,
+                breakdown=breakdown(profile),
+                stats=summarise(profile, settings.PROFILING_LINES),
+            )
+            RequestProfile.prune(settings.PROFILING_KEEP)
+        except DatabaseError:
+            logger.exception("Failed to record profile of %s.", request.path)
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_alter_user_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KafkaMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=255)),
+                ('partition', models.IntegerField()),
+                ('offset', models.BigIntegerField()),
+                ('timestamp', models.DateTimeField()),
+                ('body', models.TextField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['topic', 'timestamp'], name='main_kafkam_topic_b95912_idx')],
+                'constraints': [models.UniqueConstraint(fields=('topic', 'partition', 'offset'), name='unique_kafka_offset')],
+            },
+        ),
+    ]
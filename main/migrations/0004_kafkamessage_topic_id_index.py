@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_kafkamessage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kafkamessage',
+            index=models.Index(fields=['topic', 'id'], name='main_kafkam_topic_e2737e_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_kafkamessage_topic_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kafkamessage',
+            name='emitter',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='kafkamessage',
+            name='message_type',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='kafkamessage',
+            name='session',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='kafkamessage',
+            name='severity',
+            field=models.IntegerField(choices=[(10, 'Debug'), (20, 'Info'), (30, 'Warning'), (40, 'Error')], default=20),
+        ),
+        migrations.AddIndex(
+            model_name='kafkamessage',
+            index=models.Index(fields=['session', 'id'], name='main_kafkam_session_3f42da_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kafkamessage',
+            index=models.Index(fields=['severity', 'id'], name='main_kafkam_severit_49c508_idx'),
+        ),
+    ]
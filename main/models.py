@@ -1,9 +1,12 @@
 """Models module for the main app."""
 
+from datetime import timedelta
 from typing import ClassVar
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models  # noqa: F401
+from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -16,3 +19,133 @@ class User(AbstractUser):
             ("can_modify_processes", "Can modify processes"),
             ("can_view_process_logs", "Can view process logs"),
         ]
+
+
+class KafkaMessage(models.Model):
+    """A broadcast message received from Kafka.
+
+    Messages are stored once, in the order received, and shared between all users.
+    Each user's session records the id of the last message shown to them.
+
+    The emitter, type and severity of each message are decoded into their own indexed
+    columns so that messages can be filtered in the database.
+    """
+
+    class Severity(models.IntegerChoices):
+        """How important a message is, with the same values as logging levels."""
+
+        DEBUG = 10
+        INFO = 20
+        WARNING = 30
+        ERROR = 40
+
+    topic = models.CharField(max_length=255)
+    partition = models.IntegerField()
+    offset = models.BigIntegerField()
+    timestamp = models.DateTimeField()
+    emitter = models.CharField(max_length=255, blank=True)
+    """The name of the process that sent the message."""
+    session = models.CharField(max_length=255, blank=True)
+    """The drunc session of the process that sent the message."""
+    message_type = models.CharField(max_length=255, blank=True)
+    """The name of the drunc BroadcastType of the message."""
+    severity = models.IntegerField(choices=Severity, default=Severity.INFO)
+    body = models.TextField()
+
+    class Meta:
+        """Meta class for the KafkaMessage model."""
+
+        constraints: ClassVar = [
+            models.UniqueConstraint(
+                fields=["topic", "partition", "offset"], name="unique_kafka_offset"
+            ),
+        ]
+        indexes: ClassVar = [
+            models.Index(fields=["topic", "timestamp"]),
+            models.Index(fields=["topic", "id"]),
+            models.Index(fields=["session", "id"]),
+            models.Index(fields=["severity", "id"]),
+        ]
+
+    def __str__(self) -> str:
+        """The message body."""
+        return self.body
+
+    @classmethod
+    def latest_id(cls) -> int:
+        """The id of the most recently stored message, or 0 if there are none."""
+        return cls.objects.aggregate(models.Max("id"))["id__max"] or 0
+
+    @classmethod
+    def compact(
+        cls, max_count: int | None = None, max_age: timedelta | None = None
+    ) -> int:
+        """Delete messages beyond the retention limits.
+
+        Limits apply to each topic separately so that a busy topic cannot push out the
+        messages of a quiet one.
+
+        Args:
+            max_count: the number of most recent messages to keep per topic.
+            max_age: the age beyond which messages are deleted.
+
+        Returns:
+            The number of messages deleted.
+        """
+        deleted = 0
+        topics = cls.objects.values_list("topic", flat=True).distinct()
+        for topic in list(topics):
+            messages = cls.objects.filter(topic=topic)
+            if max_age is not None:
+                cutoff = timezone.now() - max_age
+                deleted += messages.filter(timestamp__lt=cutoff).delete()[0]
+            if max_count is not None:
+                ids = messages.order_by("-id").values_list("id", flat=True)
+                # the id of the most recent message beyond the limit, if any
+                if newest_removed := list(ids[max_count : max_count + 1]):
+                    deleted += messages.filter(id__lte=newest_removed[0]).delete()[0]
+        return deleted
+
+
+class RequestProfile(models.Model):
+    """A profile of a slow request, recorded by the profiling middleware."""
+
+    created = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=16)
+    path = models.TextField()
+    view = models.CharField(max_length=255, blank=True)
+    """The name of the view the request was resolved to."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    status = models.PositiveSmallIntegerField()
+    duration = models.FloatField()
+    """The seconds taken to respond, including the overhead of profiling."""
+    breakdown = models.JSONField(default=dict)
+    """The seconds spent in each area of the code, see profiling.AREAS."""
+    stats = models.TextField()
+    """The functions that took the longest, as listed by pstats."""
+
+    class Meta:
+        """Meta class for the RequestProfile model."""
+
+        ordering = ("-created",)
+
+    def __str__(self) -> str:
+        """The request and the time taken."""
+        return f"{self.method} {self.path} ({self.duration:.3f} s)"
+
+    @classmethod
+    def prune(cls, keep: int) -> int:
+        """Delete all but the most recent profiles.
+
+        Args:
+            keep: the number of profiles to keep.
+
+        Returns:
+            The number of profiles deleted.
+        """
+        ids = cls.objects.order_by("-id").values_list("id", flat=True)
+        if newest_removed := list(ids[keep : keep + 1]):
+            return cls.objects.filter(id__lte=newest_removed[0]).delete()[0]
+        return 0
@@ -0,0 +1,68 @@
+"""Summaries of request profiles showing where the time handling a request went."""
+
+import io
+import pstats
+from cProfile import Profile
+from types import CodeType
+
+AREAS = {
+    "process manager": ("process_manager/event_loop.py", "/grpc/", "/drunc/"),
+    "protobuf": ("/google/protobuf/", "google._upb", "/druncschema/"),
+    "tables": ("/django_tables2/",),
+    "templates": ("/django/template/",),
+    "database": ("/django/db/", "sqlite3"),
+    "sessions": ("/django/contrib/sessions/",),
+}
+"""Parts of the code time is broken down by, with substrings of their file paths.
+
+Calls to the process manager are made from a background event loop, so the time spent
+waiting for them is counted in the event_loop module rather than in gRPC itself.
+"""
+
+
+def _area(code: CodeType | str) -> str | None:
+    """Get the area of the code of a profiled function, if it is in any."""
+    # builtins are only described by a string, which names their module
+    location = code if isinstance(code, str) else code.co_filename
+    for area, patterns in AREAS.items():
+        if any(pattern in location for pattern in patterns):
+            return area
+    return None
+
+
+def breakdown(profile: Profile) -> dict[str, float]:
+    """Get the seconds spent in each area during a profile.
+
+    The time in an area is that of calls into it from outside, including any time
+    spent in other code called from within the area. As a result the areas can overlap,
+    e.g. rendering a table includes rendering the templates of its cells.
+
+    Args:
+        profile: a completed profile.
+
+    Returns:
+        The seconds spent in each area that was entered, in descending order.
+    """
+    totals: dict[str, float] = {}
+    for entry in profile.getstats():
+        caller_area = _area(entry.code)
+        for call in entry.calls or ():
+            area = _area(call.code)
+            if area is not None and area != caller_area:
+                totals[area] = totals.get(area, 0) + call.totaltime
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def summarise(profile: Profile, lines: int) -> str:
+    """Get the functions that took the longest, including the functions they called.
+
+    Args:
+        profile: a completed profile.
+        lines: the number of functions to list.
+
+    Returns:
+        The pstats listing of the functions by cumulative time.
+    """
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(lines)
+    return stream.getvalue()
@@ -0,0 +1,112 @@
+"""Helpers for streaming server-sent events to the browser.
+
+Streams repeatedly call a polling function on the server and send whatever events it
+returns, so that browsers hold open a single connection rather than making a request
+per update. Streams are closed after a maximum duration and the browser's EventSource
+reconnects automatically, which stops abandoned connections from being held forever.
+
+Streams should be served under ASGI, e.g. with uvicorn drunc_ui.asgi:application. The
+stream is then an async generator so that no worker thread is held for the lifetime of
+the connection, and each poll runs on a thread from a shared pool so that the polls of
+different streams do not wait on each other. Under WSGI, as with runserver, a plain
+generator is used, as Django would otherwise consume an async generator in full before
+sending anything, so each open stream holds a worker thread.
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpRequest, StreamingHttpResponse
+
+KEEPALIVE = ": keep-alive\n\n"
+
+
+def format_event(data: str, event: str | None = None, id: str | None = None) -> str:
+    """Format a server-sent event.
+
+    Args:
+        data: the event payload. May contain multiple lines.
+        event: the event type. If not given the browser treats it as a "message".
+        id: the event ID, sent back by the browser as Last-Event-ID on reconnection.
+
+    Returns:
+        The event in the text/event-stream format.
+    """
+    lines = []
+    if event is not None:
+        lines.append(f"event: {event}")
+    if id is not None:
+        lines.append(f"id: {id}")
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+def _sync_stream(poll: Callable[[], list[str]]) -> Iterator[str]:
+    yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+    start = last_sent = time.monotonic()
+    while True:
+        now = time.monotonic()
+        if events := poll():
+            yield "".join(events)
+            last_sent = now
+        elif now - last_sent >= settings.SSE_KEEPALIVE:
+            yield KEEPALIVE
+            last_sent = now
+        if now - start >= settings.SSE_MAX_DURATION:
+            return
+        time.sleep(settings.SSE_POLL_INTERVAL)
+
+
+def _poll_and_close(poll: Callable[[], list[str]]) -> list[str]:
+    # polls run on any thread of the pool so do not keep their database connections
+    try:
+        return poll()
+    finally:
+        close_old_connections()
+
+
+async def _async_stream(poll: Callable[[], list[str]]) -> AsyncIterator[str]:
+    # by default, sync code called from async code runs on a single thread shared by
+    # all requests, so would serialise the polls of every open stream
+    apoll = sync_to_async(_poll_and_close, thread_sensitive=False)
+    yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+    start = last_sent = time.monotonic()
+    while True:
+        now = time.monotonic()
+        if events := await apoll(poll):
+            yield "".join(events)
+            last_sent = now
+        elif now - last_sent >= settings.SSE_KEEPALIVE:
+            yield KEEPALIVE
+            last_sent = now
+        if now - start >= settings.SSE_MAX_DURATION:
+            return
+        await asyncio.sleep(settings.SSE_POLL_INTERVAL)
+
+
+def event_stream(
+    request: HttpRequest, poll: Callable[[], list[str]]
+) -> StreamingHttpResponse:
+    """Create a response streaming the events returned by a polling function.
+
+    Args:
+        request: the request for the stream.
+        poll: function returning any new, formatted events. Called every
+            SSE_POLL_INTERVAL seconds.
+
+    Returns:
+        The streaming response.
+    """
+    content = (
+        _async_stream(poll) if isinstance(request, ASGIRequest) else _sync_stream(poll)
+    )
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # stop reverse proxies buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -9,4 +9,5 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("accounts/", include("django.contrib.auth.urls")),
     path("help/", views.HelpView.as_view(), name="help"),
+    path("metrics", views.metrics, name="metrics"),
 ]
@@ -1,9 +1,17 @@
 """Views for the main app."""
 
+import hmac
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 from django.views import View
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from .metrics import get_registry
 
 
 @login_required
@@ -18,3 +26,24 @@ class HelpView(View):
     def get(self, request: HttpRequest) -> HttpResponse:
         """Render the help page."""
         return render(request=request, template_name="main/help.html")
+
+
+@require_GET
+def metrics(request: HttpRequest) -> HttpResponse:
+    """View exposing the metrics in the Prometheus text format.
+
+    These are the metrics of this worker, or of all processes if
+    PROMETHEUS_MULTIPROC_DIR is set.
+
+    If METRICS_TOKEN is set, it must be given as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        response = HttpResponse(status=HTTPStatus.UNAUTHORIZED)
+        response["WWW-Authenticate"] = "Bearer"
+        return response
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -1,3 +1,13 @@
 """Admin module for the process_manager app."""
 
-# Register your models here.
+from django.contrib import admin
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin[Job]):
+    """Admin for background jobs."""
+
+    list_display = ("action", "user", "status", "total", "created", "finished")
+    list_filter = ("action", "status")
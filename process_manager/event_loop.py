@@ -0,0 +1,109 @@
+"""A long-lived asyncio event loop shared by all requests handled by a worker.
+
+Django views are synchronous but the drunc drivers are asyncio based. Rather than
+creating and tearing down an event loop per request with asyncio.run, coroutines are
+submitted to a single loop running in a daemon thread. This also allows aio channels,
+which are bound to the loop they were created in, to be reused between requests.
+"""
+
+import asyncio
+import os
+import threading
+from collections.abc import AsyncGenerator, Coroutine, Iterator
+from typing import TypeVar
+
+from django.conf import settings
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_thread: threading.Thread | None = None
+_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the background event loop, starting its thread on first use."""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _thread is None or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name="drunc-ui-event-loop", daemon=True
+            )
+            _thread.start()
+        return _loop
+
+
+def run_coroutine(
+    coro: Coroutine[object, object, T], timeout: float | None = None
+) -> T:
+    """Run a coroutine on the background event loop and wait for its result.
+
+    Args:
+        coro: the coroutine to run.
+        timeout: seconds to wait for the result. Defaults to the
+            PROCESS_MANAGER_TIMEOUT setting.
+
+    Returns:
+        The value returned by the coroutine.
+
+    Raises:
+        RuntimeError: if called from the background loop thread itself, which would
+            otherwise deadlock.
+        TimeoutError: if the coroutine does not complete in time. The coroutine is
+            cancelled.
+    """
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_coroutine cannot be called from the event loop.")
+
+    if timeout is None:
+        timeout = settings.PROCESS_MANAGER_TIMEOUT
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+async def _next(agen: AsyncGenerator[T, None]) -> list[T]:
+    # the next item as a list, empty once the generator is exhausted
+    try:
+        return [await anext(agen)]
+    except StopAsyncIteration:
+        return []
+
+
+def iterate(agen: AsyncGenerator[T, None], timeout: float | None = None) -> Iterator[T]:
+    """Iterate over an async generator run on the background event loop.
+
+    Items are passed on as they are produced so that callers can stream them without
+    waiting for the whole sequence. The generator is closed if iteration stops early.
+
+    Args:
+        agen: the async generator to iterate over.
+        timeout: seconds to wait for each item. Defaults to the
+            PROCESS_MANAGER_TIMEOUT setting.
+
+    Yields:
+        The items produced by the generator.
+    """
+    try:
+        while True:
+            if not (items := run_coroutine(_next(agen), timeout)):
+                return
+            yield items[0]
+    finally:
+        run_coroutine(agen.aclose(), timeout)
+
+
+def _reset_after_fork() -> None:
+    # threads do not survive a fork so child processes must start their own loop
+    global _loop, _thread, _lock
+    _loop = None
+    _thread = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,6 +1,12 @@
 """Forms for the process_manager app."""
 
+import re
+from collections.abc import Iterable
+from typing import cast
+
 from django import forms
+from django.conf import settings
+from django.http import QueryDict
 
 
 class BootProcessForm(forms.Form):
@@ -10,3 +16,148 @@ class BootProcessForm(forms.Form):
     n_processes = forms.IntegerField()
     sleep = forms.IntegerField()
     n_sleeps = forms.IntegerField()
+
+
+class BulkBootForm(forms.Form):
+    """Form for booting many sessions at once.
+
+    Sessions are given as a list, a template with a count, or both. Each line of the
+    list names a session, optionally followed by its number of processes. The template
+    gives sessions named with a prefix and a number. Sessions have n_processes
+    processes unless the list says otherwise.
+    """
+
+    sessions = forms.CharField(
+        widget=forms.Textarea(attrs=dict(rows=5)),
+        required=False,
+        help_text="One session per line: a name, optionally followed by the number "
+        "of processes.",
+    )
+    name_prefix = forms.CharField(
+        required=False,
+        help_text="Boot sessions named name_prefix-1, name_prefix-2, ...",
+    )
+    n_sessions = forms.IntegerField(
+        required=False, min_value=1, label="Number of sessions"
+    )
+    n_processes = forms.IntegerField(min_value=1)
+    sleep = forms.IntegerField()
+    n_sleeps = forms.IntegerField()
+
+    def clean(self) -> None:
+        """Check that the sessions are valid and set the data to boot them."""
+        data = self.cleaned_data
+        counts: dict[str, int] = {}
+        for line in data.get("sessions", "").splitlines():
+            match line.split():
+                case []:
+                    continue
+                case [name]:
+                    count = data.get("n_processes", 1)
+                case [name, count_] if count_.isdigit() and int(count_) > 0:
+                    count = int(count_)
+                case _:
+                    raise forms.ValidationError(f"Invalid session: {line.strip()}")
+            if name in counts:
+                raise forms.ValidationError(f"Session {name} is given more than once.")
+            counts[name] = count
+
+        if data.get("n_sessions") and not data.get("name_prefix"):
+            self.add_error("name_prefix", "A prefix is needed to name the sessions.")
+        elif data.get("name_prefix"):
+            for i in range(1, (data.get("n_sessions") or 1) + 1):
+                name = f"{data['name_prefix']}-{i}"
+                if name in counts:
+                    raise forms.ValidationError(
+                        f"Session {name} is given more than once."
+                    )
+                counts[name] = data.get("n_processes", 1)
+
+        if not counts:
+            raise forms.ValidationError("Give a list or template of sessions to boot.")
+        if len(counts) > settings.PROCESS_BULK_BOOT_MAX_SESSIONS:
+            raise forms.ValidationError(
+                f"At most {settings.PROCESS_BULK_BOOT_MAX_SESSIONS} sessions may be "
+                "booted at once."
+            )
+        data["boot"] = [
+            dict(
+                session_name=name,
+                n_processes=count,
+                sleep=data.get("sleep", 0),
+                n_sleeps=data.get("n_sleeps", 0),
+            )
+            for name, count in counts.items()
+        ]
+
+
+class ProcessFilterForm(forms.Form):
+    """Form for filtering the process table."""
+
+    session = forms.CharField(required=False)
+    user = forms.CharField(required=False)
+    status = forms.CharField(required=False)
+    name = forms.CharField(required=False, label="Name (regular expression)")
+
+    def clean_name(self) -> str:
+        """Check that the name is a valid regular expression."""
+        name: str = self.cleaned_data["name"]
+        try:
+            re.compile(name)
+        except re.error as e:
+            raise forms.ValidationError(f"Invalid regular expression: {e}.")
+        return name
+
+
+class LogSearchForm(forms.Form):
+    """Form for searching the logs of a session or of selected processes."""
+
+    query = forms.CharField(required=False)
+    regex = forms.BooleanField(required=False, label="Regular expression")
+    level = forms.TypedChoiceField(
+        choices=[
+            (0, "Any"),
+            (10, "Debug"),
+            (20, "Info"),
+            (30, "Warning"),
+            (40, "Error"),
+            (50, "Critical"),
+        ],
+        coerce=int,
+        required=False,
+        label="Minimum level",
+    )
+    session = forms.ChoiceField(
+        required=False, help_text="Search all processes in the session."
+    )
+    processes = forms.MultipleChoiceField(required=False)
+
+    def __init__(
+        self,
+        data: QueryDict | None,
+        sessions: Iterable[str],
+        processes: Iterable[tuple[str, str]],
+    ) -> None:
+        """Create the form with the sessions and processes that may be searched.
+
+        Args:
+            data: the submitted form data, if any.
+            sessions: the names of the sessions.
+            processes: the UUIDs and descriptions of the processes.
+        """
+        super().__init__(data)
+        session_field = cast(forms.ChoiceField, self.fields["session"])
+        session_field.choices = [("", "---------")] + [(s, s) for s in sessions]
+        process_field = cast(forms.MultipleChoiceField, self.fields["processes"])
+        process_field.choices = list(processes)
+
+    def clean(self) -> None:
+        """Check that something is chosen to search and the query is valid."""
+        data = self.cleaned_data
+        if not data.get("session") and not data.get("processes"):
+            raise forms.ValidationError("Choose a session or processes to search.")
+        if data.get("regex"):
+            try:
+                re.compile(data.get("query", ""))
+            except re.error as e:
+                self.add_error("query", f"Invalid regular expression: {e}.")
@@ -0,0 +1,195 @@
+"""Running actions on processes in the background.
+
+Actions can take a long time, e.g. booting a session waits for every process to start,
+so rather than performing them while handling a request they are recorded as Jobs and
+run by a pool of threads in the worker that received them. The request returns as soon
+as the job is recorded, and the job's progress is read back from the database.
+
+Restarts of many processes are made in batches of PROCESS_JOB_BATCH_SIZE, with the
+results of each batch saved as it completes. Kills and flushes are a single call to the
+process manager however many processes they are for. Sessions are all booted together,
+with the result of each saved as its boot completes.
+"""
+
+import os
+import threading
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from main.models import User
+
+from .models import Job
+from .poller import get_process_poller
+from .process_manager_interface import (
+    ProcessAction,
+    boot_processes,
+    process_call,
+)
+from .tables import filter_rows
+
+BOOT = "boot"
+"""The action of jobs that boot sessions."""
+
+_executor: ThreadPoolExecutor | None = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the pool of threads running jobs, creating it on first use."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.PROCESS_JOB_WORKERS, thread_name_prefix="drunc-ui-job"
+            )
+        return _executor
+
+
+def _submit(job: Job) -> Job:
+    # only start the job once it is visible to the thread running it
+    transaction.on_commit(lambda: get_executor().submit(run_job, job.id))
+    return job
+
+
+def submit_action(
+    user: User | None, uuids: Sequence[str], action: ProcessAction
+) -> Job:
+    """Record a job performing an action on processes and start it in the background.
+
+    Args:
+        user: the user submitting the job.
+        uuids: UUIDs of the processes to act on.
+        action: the action to perform.
+
+    Returns:
+        The new job.
+    """
+    job = Job.objects.create(
+        action=action.value,
+        arguments=dict(uuids=list(uuids)),
+        user=user,
+        total=len(uuids),
+    )
+    return _submit(job)
+
+
+def submit_query_action(
+    user: User | None, filters: dict[str, str], action: ProcessAction
+) -> Job:
+    """Record a job performing an action on the processes matching filters.
+
+    The processes are found from the worker's poller when the job runs rather than
+    being listed by the client. They are then acted on by UUID as for submit_action.
+
+    Args:
+        user: the user submitting the job.
+        filters: the session, user, status and name regular expression of the
+            processes to act on, as for tables.filter_rows.
+        action: the action to perform.
+
+    Returns:
+        The new job. Its total is the number of processes currently matching, which
+        may differ from the number acted on.
+    """
+    _, rows = get_process_poller().current()
+    job = Job.objects.create(
+        action=action.value,
+        arguments=dict(query=filters),
+        user=user,
+        total=len(filter_rows(rows.values(), **filters)),
+    )
+    return _submit(job)
+
+
+def submit_boot(user: User | None, sessions: Sequence[dict[str, str | int]]) -> Job:
+    """Record a job booting sessions and start it in the background.
+
+    Args:
+        user: the user submitting the job.
+        sessions: the data for the processes of each session, as for boot_process.
+
+    Returns:
+        The new job.
+    """
+    job = Job.objects.create(
+        action=BOOT,
+        arguments=dict(user="root", sessions=list(sessions)),
+        user=user,
+        total=len(sessions),
+    )
+    return _submit(job)
+
+
+def _matching(filters: dict[str, str]) -> list[str]:
+    # a process manager query matches processes meeting any of its conditions rather
+    # than all of them, so the processes are selected from the poller's rows instead
+    _, rows = get_process_poller().current()
+    return [row.uuid for row in filter_rows(rows.values(), **filters)]
+
+
+def _run_action(job: Job) -> None:
+    action = ProcessAction(job.action)
+    if "query" in job.arguments:
+        uuids = _matching(job.arguments["query"])
+        job.total = len(uuids)
+        job.save(update_fields=["total"])
+    else:
+        uuids = job.arguments["uuids"]
+    # restarts are made a process at a time so progress is reported between batches,
+    # while kills and flushes are a single call
+    size = settings.PROCESS_JOB_BATCH_SIZE
+    if action != ProcessAction.RESTART:
+        size = max(len(uuids), 1)
+    for start in range(0, len(uuids), size):
+        result = process_call(uuids[start : start + size], action)
+        job.results.update(dict.fromkeys(result.succeeded, ""))
+        job.results.update(result.failed)
+        job.save(update_fields=["results"])
+
+
+def _run_boot(job: Job) -> None:
+    def booted(session: str, error: str) -> None:
+        job.results[session] = error
+        job.save(update_fields=["results"])
+
+    boot_processes(job.arguments["user"], job.arguments["sessions"], booted)
+
+
+def run_job(job_id: int) -> None:
+    """Run a job, recording its progress and outcome.
+
+    Args:
+        job_id: the ID of the job to run.
+    """
+    close_old_connections()
+    job = Job.objects.get(id=job_id)
+    job.status = Job.Status.RUNNING
+    job.save(update_fields=["status"])
+
+    try:
+        if job.action == BOOT:
+            _run_boot(job)
+        else:
+            _run_action(job)
+    except Exception as e:
+        job.error = str(e) or type(e).__name__
+
+    failed = job.error or job.failures
+    job.status = Job.Status.FAILED if failed else Job.Status.SUCCEEDED
+    job.finished = timezone.now()
+    job.save(update_fields=["status", "error", "finished"])
+    close_old_connections()
+
+
+def _reset_after_fork() -> None:
+    # threads do not survive a fork so child processes must start their own pool
+    global _executor, _lock
+    _executor = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
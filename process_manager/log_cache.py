@@ -0,0 +1,294 @@
+"""A cache of the most recent log lines of each process.
+
+Every view of a process' logs reads the end of its log from the process manager. To
+avoid repeating these reads when a page is refreshed or several users follow the same
+process, each worker holds the most recent lines of recently viewed logs in a ring
+buffer per process. Buffers are reused for a short time, then brought up to date by
+reading just enough of the end of the log to find where it overlaps with the lines
+already held. Only a limited number of processes are cached, with the least recently
+viewed dropped first.
+
+Once the lines of a process are first searched, they are also indexed by their
+trigrams so that later searches only need to check the lines that may match. Processes
+that are only viewed are not indexed.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+from .log_index import TrigramIndex
+from .logs import overlap
+
+FetchMany = Callable[[list[str], int], tuple[dict[str, list[str]], dict[str, str]]]
+"""Reads the ends of several logs, returning the lines and any errors by UUID."""
+
+
+def _describe(error: Exception) -> str:
+    return str(error) or type(error).__name__
+
+
+@dataclass
+class _Entry:
+    lines: deque[str]
+    fetched_at: float = float("-inf")
+    complete: bool = False
+    """Whether the lines held are the whole log."""
+    end: int = 0
+    """The number of the line after the last one held, counting from the first."""
+    index: TrigramIndex | None = None
+    """The index of the lines held, only built once they are searched."""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def start(self) -> int:
+        """The number of the first line held."""
+        return self.end - len(self.lines)
+
+
+class LogCache:
+    """Per-process ring buffers of recent log lines with TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        fetch: Callable[[str, int], list[str]],
+        capacity: int,
+        max_processes: int,
+        ttl: float,
+        increment: int = 100,
+        fetch_many: FetchMany | None = None,
+    ) -> None:
+        """Create an empty cache.
+
+        Args:
+            fetch: callable that reads the given number of lines from the end of the
+                log of the process with the given UUID.
+            capacity: maximum number of lines held for each process.
+            max_processes: maximum number of processes for which lines are held.
+            ttl: number of seconds for which lines are reused before checking for new
+                ones.
+            increment: number of lines first read from the end of a log when checking
+                for new lines. More are read if these do not overlap the lines held.
+            fetch_many: callable that reads the given number of lines from the end of
+                the logs of several processes at once, returning the lines and the
+                errors reading them by UUID. If given, get_many reads all the logs it
+                needs together rather than one after another.
+        """
+        self.fetch = fetch
+        self.fetch_many = fetch_many
+        self.capacity = capacity
+        self.max_processes = max_processes
+        self.ttl = ttl
+        self.increment = min(increment, capacity)
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, uuid: str, how_far: int, containing: Iterable[str] = ()) -> list[str]:
+        """Get the last lines of the log of a process.
+
+        Concurrent calls for the same process wait for a single read of the log.
+
+        Args:
+            uuid: UUID of the process.
+            how_far: the number of lines wanted, at most the capacity of the cache.
+            containing: if given, only those of the lines that contain all of these
+                strings, ignoring case, are returned.
+
+        Returns:
+            The lines, oldest first.
+        """
+        if how_far > self.capacity:
+            raise ValueError(f"At most {self.capacity} lines may be cached.")
+
+        entry = self._entry(uuid)
+        with entry.lock:
+            fresh = time.monotonic() - entry.fetched_at < self.ttl
+            if not fresh or not (entry.complete or len(entry.lines) >= how_far):
+                self._refresh(uuid, entry, how_far)
+            return self._select(entry, how_far, containing)
+
+    def get_many(
+        self, uuids: Iterable[str], how_far: int, containing: Iterable[str] = ()
+    ) -> tuple[dict[str, list[str]], dict[str, str]]:
+        """Get the last lines of the logs of several processes.
+
+        If the cache has fetch_many, the logs that need reading are read together,
+        otherwise they are read one at a time as by get. A log that cannot be read does
+        not stop the others being returned.
+
+        Args:
+            uuids: UUIDs of the processes.
+            how_far: the number of lines wanted, at most the capacity of the cache.
+            containing: as for get.
+
+        Returns:
+            The lines of each process whose log was read, oldest first, and the error
+            for each process whose log could not be read, both by UUID.
+        """
+        if how_far > self.capacity:
+            raise ValueError(f"At most {self.capacity} lines may be cached.")
+
+        uuids = list(uuids)
+        containing = list(containing)
+        if self.fetch_many is None:
+            results = {}
+            errors = {}
+            for uuid in uuids:
+                try:
+                    results[uuid] = self.get(uuid, how_far, containing)
+                except Exception as e:
+                    errors[uuid] = _describe(e)
+            return results, errors
+
+        refreshed, errors = self._refresh_many(self.fetch_many, uuids, how_far)
+        results = {}
+        for uuid, entry in refreshed.items():
+            with entry.lock:
+                results[uuid] = self._select(entry, how_far, containing)
+        return results, errors
+
+    def _refresh_many(
+        self, fetch_many: FetchMany, uuids: list[str], how_far: int
+    ) -> tuple[dict[str, _Entry], dict[str, str]]:
+        """Bring the entries of several processes up to date with batched reads.
+
+        Returns:
+            The entries that are up to date and the error for each process whose log
+            could not be read, both by UUID.
+        """
+        fetched_at = time.monotonic()
+        refreshed = {}
+        missing = []
+        stale = []
+        for uuid in uuids:
+            entry = self._entry(uuid)
+            with entry.lock:
+                held = entry.complete or len(entry.lines) >= how_far
+                if not held:
+                    missing.append(uuid)
+                elif fetched_at - entry.fetched_at >= self.ttl:
+                    stale.append(uuid)
+                else:
+                    refreshed[uuid] = entry
+
+        # entries without enough lines are read in full and the rest checked for new
+        # lines, starting with the usual increment
+        errors: dict[str, str] = {}
+        for group, count in ((missing, how_far), (stale, self.increment)):
+            if not group:
+                continue
+            logs, failed = fetch_many(group, count)
+            errors.update(failed)
+            for uuid, lines in logs.items():
+                entry = self._entry(uuid)
+                with entry.lock:
+                    try:
+                        if group is missing:
+                            self._replace(entry, lines, how_far)
+                        else:
+                            self._extend(uuid, entry, lines)
+                    except Exception as e:
+                        errors[uuid] = _describe(e)
+                        continue
+                    entry.fetched_at = fetched_at
+                refreshed[uuid] = entry
+        return {uuid: refreshed[uuid] for uuid in uuids if uuid in refreshed}, errors
+
+    def _select(
+        self, entry: _Entry, how_far: int, containing: Iterable[str]
+    ) -> list[str]:
+        """Get the last lines held in an entry containing the strings, if any."""
+        first = max(len(entry.lines) - how_far, 0)
+        literals = [literal.lower() for literal in containing]
+        if literals and entry.index is None:
+            entry.index = self._build_index(entry)
+        numbers = None if entry.index is None else entry.index.candidates(literals)
+        if numbers is None:
+            lines = list(itertools.islice(entry.lines, first, None))
+        else:
+            offset = entry.start
+            lines = [
+                entry.lines[number - offset]
+                for number in sorted(numbers)
+                if number - offset >= first
+            ]
+        return [line for line in lines if all(lit in line.lower() for lit in literals)]
+
+    def _entry(self, uuid: str) -> _Entry:
+        """Get the entry for a process, creating it and evicting others if required."""
+        with self._lock:
+            if (entry := self._entries.get(uuid)) is not None:
+                self._entries.move_to_end(uuid)
+                return entry
+
+            entry = self._entries[uuid] = _Entry(deque(maxlen=self.capacity))
+            while len(self._entries) > self.max_processes:
+                self._entries.popitem(last=False)
+            return entry
+
+    def _refresh(self, uuid: str, entry: _Entry, how_far: int) -> None:
+        fetched_at = time.monotonic()
+        if entry.complete or len(entry.lines) >= how_far:
+            self._extend(uuid, entry)
+        else:
+            # older lines than those held are wanted so the whole window is read
+            self._replace(entry, self.fetch(uuid, how_far), how_far)
+        entry.fetched_at = fetched_at
+
+    def _extend(self, uuid: str, entry: _Entry, first: list[str] | None = None) -> None:
+        """Add the lines written since the entry was last refreshed.
+
+        The first read of the end of the log may be given if already made.
+        """
+        how_far = self.increment
+        current = first
+        while True:
+            if current is None:
+                current = self.fetch(uuid, how_far)
+            start = max(len(entry.lines) - len(current), 0)
+            common = overlap(list(itertools.islice(entry.lines, start, None)), current)
+            # stop once the lines read overlap those held, the whole log has been
+            # read or reading any more would not fit in the buffer
+            if common or len(current) < how_far or how_far == self.capacity:
+                break
+            how_far = min(how_far * 2, self.capacity)
+            current = None
+
+        if not common:
+            # either more lines have been written than fit, or the log was replaced
+            self._replace(entry, current, how_far)
+            return
+
+        new = current[common:]
+        if len(entry.lines) + len(new) > self.capacity:
+            entry.complete = False
+        self._append(entry, new)
+
+    def _replace(self, entry: _Entry, lines: list[str], how_far: int) -> None:
+        entry.lines.clear()
+        entry.end = 0
+        entry.index = None
+        self._append(entry, lines)
+        entry.complete = len(lines) < how_far
+
+    def _append(self, entry: _Entry, lines: list[str]) -> None:
+        for line in lines:
+            if entry.index is not None:
+                entry.index.add(entry.end, line)
+            entry.lines.append(line)
+            entry.end += 1
+
+        # the index keeps the lines dropped from the buffer so is rebuilt once these
+        # outnumber those still held
+        if entry.index is not None and entry.index.size > 2 * self.capacity:
+            entry.index = self._build_index(entry)
+
+    @staticmethod
+    def _build_index(entry: _Entry) -> TrigramIndex:
+        index = TrigramIndex()
+        for number, line in enumerate(entry.lines, start=entry.start):
+            index.add(number, line)
+        return index
@@ -0,0 +1,146 @@
+"""A lightweight inverted index for searching cached log lines.
+
+Lines are indexed by the trigrams, i.e. sequences of three characters, that they
+contain, ignoring case. A search for a string then only needs to check the lines that
+contain every trigram of the string, found by intersecting their posting lists, rather
+than every line held.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+_META = frozenset(".^$*+?{}[]|()\\")
+_QUANTIFIERS = frozenset("*?{")
+_ESCAPED_CLASSES = frozenset("dDwWsSbBAZ0123456789")
+_ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8}
+"""The number of hexadecimal digits following each numeric escape."""
+
+
+def trigrams(text: str) -> set[str]:
+    """Get the trigrams of a string, ignoring case."""
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def required_literals(pattern: str) -> list[str]:
+    """Find strings that every match of a regular expression must contain.
+
+    This is deliberately conservative. Only runs of plain characters outside any group
+    or character set are found, and none at all for patterns using alternation.
+
+    Args:
+        pattern: the regular expression.
+
+    Returns:
+        The literal strings, possibly none.
+    """
+    if "|" in pattern:
+        return []
+
+    literals = []
+    run: list[str] = []
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal: str | None = None
+        if char == "\\" and i + 1 < len(pattern):
+            i += 1
+            escaped = pattern[i]
+            # numeric and named escapes, and group references, are skipped along with
+            # their digits or name, which are not literal
+            if escaped in _ESCAPE_DIGITS:
+                i = min(i + _ESCAPE_DIGITS[escaped], len(pattern) - 1)
+            elif escaped == "N" and pattern[i + 1 : i + 2] == "{":
+                end = pattern.find("}", i)
+                i = end if end >= 0 else len(pattern) - 1
+            elif escaped.isdigit():
+                for _ in range(2):
+                    if pattern[i + 1 : i + 2].isdigit():
+                        i += 1
+            elif escaped not in _ESCAPED_CLASSES and escaped.isascii():
+                literal = escaped if not escaped.isalpha() else None
+        elif char == "[":
+            # skip the character set, including escaped characters and a ] first in
+            # the set, after any ^, which is part of it rather than closing it
+            i += 1
+            if pattern[i : i + 1] == "^":
+                i += 1
+            if pattern[i : i + 1] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+        elif char == "{":
+            while i < len(pattern) - 1 and pattern[i] != "}":
+                i += 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char not in _META:
+            literal = char
+
+        following = pattern[i + 1 : i + 2]
+        if literal is not None and depth == 0 and following not in _QUANTIFIERS:
+            run.append(literal)
+            if following == "+":
+                literals.append("".join(run))
+                run = []
+        else:
+            if run:
+                literals.append("".join(run))
+            run = []
+        i += 1
+
+    if run:
+        literals.append("".join(run))
+    return literals
+
+
+class TrigramIndex:
+    """Inverted index from trigrams to the numbers of the lines containing them.
+
+    Line numbers must be added in increasing order. Lines that are no longer wanted,
+    e.g. that have been dropped from a buffer, are not removed so callers must ignore
+    their numbers and rebuild the index once too many have built up.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self._postings: defaultdict[str, list[int]] = defaultdict(list)
+        self.size = 0
+        """The number of lines that have been indexed."""
+
+    def add(self, number: int, line: str) -> None:
+        """Index a line.
+
+        Args:
+            number: the number of the line, greater than that of any line already
+                indexed.
+            line: the content of the line.
+        """
+        for trigram in trigrams(line):
+            self._postings[trigram].append(number)
+        self.size += 1
+
+    def candidates(self, literals: Iterable[str]) -> set[int] | None:
+        """Find the lines that may contain all of the given strings, ignoring case.
+
+        Args:
+            literals: the strings to look for.
+
+        Returns:
+            The numbers of the lines containing all trigrams of the strings, or None if
+            the strings are too short to rule out any lines.
+        """
+        wanted = set().union(*(trigrams(literal) for literal in literals))
+        if not wanted:
+            return None
+
+        postings = sorted((self._postings.get(t, []) for t in wanted), key=len)
+        numbers = set(postings[0])
+        for posting in postings[1:]:
+            if not numbers:
+                break
+            numbers.intersection_update(posting)
+        return numbers
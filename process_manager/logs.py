@@ -0,0 +1,231 @@
+"""Functions for paging through and following the logs of processes.
+
+The process manager only returns the last lines of a log, given how many are wanted.
+Older pages are read by asking for more lines and dropping those already shown. Logs
+are followed by repeatedly reading their last lines and finding where these overlap
+with the lines read before.
+"""
+
+import hashlib
+import heapq
+import logging
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.http import QueryDict
+from django.utils.html import format_html
+
+from .log_index import required_literals
+
+MAX_LINES = 10_000
+"""The largest number of lines that may be requested at once."""
+
+_LEVEL = re.compile(r"\b(DEBUG|INFO|WARNING|WARN|ERROR|CRITICAL|FATAL)\b")
+_TIMESTAMP = re.compile(r"(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})(?:[.,](\d+))?")
+
+
+def line_level(line: str) -> int | None:
+    """Get the logging level of a log line from the first level name it contains.
+
+    Args:
+        line: the log line.
+
+    Returns:
+        The level as a number, as in the logging module, or None if the line does not
+        name a level.
+    """
+    if (match := _LEVEL.search(line)) is None:
+        return None
+    return logging.getLevelNamesMapping()[match[1]]
+
+
+@dataclass
+class LogQuery:
+    """A search of log lines.
+
+    Text is matched ignoring case. Lines without a level are only matched if no
+    minimum level is given.
+    """
+
+    text: str = ""
+    """The text to search for."""
+    regex: bool = False
+    """Whether the text is a regular expression rather than a plain string."""
+    min_level: int = 0
+    """The lowest logging level of the lines to find, or 0 for any."""
+    pattern: re.Pattern[str] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Compile the text to search for, raising re.error if it is invalid."""
+        self.pattern = re.compile(
+            self.text if self.regex else re.escape(self.text), re.IGNORECASE
+        )
+
+    def literals(self) -> list[str]:
+        """Strings that all matching lines contain, for looking up in an index."""
+        return required_literals(self.text) if self.regex else [self.text]
+
+    def matches(self, line: str) -> bool:
+        """Whether a log line matches the query."""
+        if self.min_level:
+            level = line_level(line)
+            if level is None or level < self.min_level:
+                return False
+        return self.pattern.search(line) is not None
+
+
+def log_window(params: QueryDict) -> int:
+    """Get the number of log lines to show at once from request parameters.
+
+    Args:
+        params: the request parameters, which may include a number of "lines".
+
+    Returns:
+        The requested number of lines, limited to MAX_LINES, or the PROCESS_LOG_LINES
+        setting if none or an invalid number was given.
+    """
+    lines = params.get("lines", "")
+    if not lines.isdigit() or int(lines) == 0:
+        return settings.PROCESS_LOG_LINES
+    return min(int(lines), MAX_LINES)
+
+
+def line_id(line: str) -> str:
+    """Get a short identifier for a log line, used as a server-sent event ID."""
+    return hashlib.blake2b(line.encode(), digest_size=8).hexdigest()
+
+
+def lines_after(lines: Sequence[str], last_id: str) -> list[str]:
+    """Get the lines after the last one with the given identifier.
+
+    Args:
+        lines: the log lines, oldest first.
+        last_id: the identifier of the last line already seen, from line_id.
+
+    Returns:
+        The following lines, or all of them if none has the identifier.
+    """
+    for i in range(len(lines) - 1, -1, -1):
+        if line_id(lines[i]) == last_id:
+            return list(lines[i + 1 :])
+    return list(lines)
+
+
+def overlap(previous: Sequence[str], current: Sequence[str]) -> int:
+    """Find how many lines two reads of the end of a log have in common.
+
+    Args:
+        previous: the last lines of the log when previously read.
+        current: the last lines of the log now.
+
+    Returns:
+        The length of the longest run of lines at the start of the current read that
+        matches the end of the previous one.
+    """
+    for length in range(min(len(previous), len(current)), 0, -1):
+        if previous[-length:] == current[:length]:
+            return length
+    return 0
+
+
+def new_lines(previous: Sequence[str], current: Sequence[str]) -> list[str]:
+    """Get the lines at the end of a log that were not present when last read.
+
+    The new lines are those following the lines the two reads have in common. If they
+    do not overlap, more lines were written in between than were read and all the
+    current lines are new.
+
+    Args:
+        previous: the last lines of the log when previously read.
+        current: the last lines of the log now.
+
+    Returns:
+        The lines added to the log since it was previously read.
+    """
+    return list(current[overlap(previous, current) :])
+
+
+def drop_last(lines: Iterable[str], count: int) -> Iterator[str]:
+    """Drop the last lines of a stream, passing on the others as soon as possible.
+
+    Args:
+        lines: the stream of lines.
+        count: the number of lines to drop from the end.
+
+    Yields:
+        All but the last lines. Only `count` lines are held in memory at once.
+    """
+    held: deque[str] = deque()
+    for line in lines:
+        held.append(line)
+        if len(held) > count:
+            yield held.popleft()
+
+
+def line_timestamp(line: str) -> str | None:
+    """Get the time a log line was written from the first timestamp it contains.
+
+    Args:
+        line: the log line.
+
+    Returns:
+        The timestamp in a form that sorts in time order, or None if the line does not
+        contain one.
+    """
+    if (match := _TIMESTAMP.search(line)) is None:
+        return None
+    date, time, fraction = match.groups()
+    return f"{date}T{time}.{(fraction or '').ljust(6, '0')[:6]}"
+
+
+def _timestamped(source: int, lines: Iterable[str]) -> Iterator[tuple[str, int, str]]:
+    # lines without a timestamp, e.g. those of a traceback, stay after the line before
+    timestamp = ""
+    for line in lines:
+        timestamp = line_timestamp(line) or timestamp
+        yield timestamp, source, line
+
+
+def merge_logs(logs: Sequence[Iterable[str]]) -> Iterator[tuple[int, str]]:
+    """Merge the lines of several logs in the order they were written.
+
+    Each log is expected to be in time order already, so they are merged lazily by
+    their timestamps. Lines without a timestamp follow the line before them in the same
+    log.
+
+    Args:
+        logs: the lines of each log.
+
+    Yields:
+        The index of the log each line is from and the line.
+    """
+    merged = heapq.merge(*(_timestamped(i, lines) for i, lines in enumerate(logs)))
+    for _, source, line in merged:
+        yield source, line
+
+
+def format_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Render log lines as HTML for display, one element per line."""
+    for line in lines:
+        yield format_html('<div class="log-line">{}</div>\n', line)
+
+
+def format_merged_lines(lines: Iterable[tuple[str, str]]) -> Iterator[str]:
+    """Render log lines from several processes as HTML, labelled with their process.
+
+    Args:
+        lines: the name of the process and the content of each line.
+
+    Yields:
+        The HTML for each line.
+    """
+    for process, line in lines:
+        yield format_html(
+            '<div class="log-line">'
+            '<span class="text-body-secondary">{}</span> {}</div>\n',
+            process,
+            line,
+        )
@@ -0,0 +1,70 @@
+"""Functions for the Kafka broadcast messages shown to users.
+
+Messages are stored once in the KafkaMessage table. Each user's session holds a cursor,
+the id of the last message shown to them, so that they only receive newer messages.
+"""
+
+from django.contrib.sessions.backends.base import SessionBase
+from django.http import QueryDict
+
+from main.models import KafkaMessage
+
+CURSOR_KEY = "message_cursor"
+BATCH_SIZE = 100
+"""Maximum number of messages sent to a user at once."""
+
+
+def get_cursor(session: SessionBase) -> int:
+    """Get the id of the last message shown to the user.
+
+    Sessions without a cursor start from the most recent message so that users are
+    only shown messages that arrive after they first open the page.
+
+    Args:
+        session: the user's session.
+
+    Returns:
+        The message id.
+    """
+    if (cursor := session.get(CURSOR_KEY)) is None:
+        cursor = session[CURSOR_KEY] = KafkaMessage.latest_id()
+    return cursor
+
+
+def message_filters(params: QueryDict) -> dict[str, str | int]:
+    """Get the message filters chosen by the user from request parameters.
+
+    Args:
+        params: the request parameters, which may include a "session" name and a
+            minimum "severity" level.
+
+    Returns:
+        Lookups for filtering KafkaMessage objects. Blank or invalid parameters are
+        ignored.
+    """
+    filters: dict[str, str | int] = {}
+    if session := params.get("session", "").strip():
+        filters["session"] = session
+    if (severity := params.get("severity", "")).isdigit():
+        filters["severity__gte"] = int(severity)
+    return filters
+
+
+def messages_since(cursor: int, **filters: str | int) -> list[KafkaMessage]:
+    """Get the next batch of messages newer than a cursor, oldest first.
+
+    Args:
+        cursor: the id of the last message already seen.
+        filters: lookups that messages must match, from message_filters.
+
+    Returns:
+        The new messages.
+    """
+    messages = KafkaMessage.objects.filter(id__gt=cursor, **filters)
+    return list(messages.order_by("id")[:BATCH_SIZE])
+
+
+def message_sessions() -> list[str]:
+    """Get the names of all sessions that have sent messages, for filtering by."""
+    sessions = KafkaMessage.objects.exclude(session="").order_by("session")
+    return list(sessions.values_list("session", flat=True).distinct())
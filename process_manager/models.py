@@ -1,3 +1,87 @@
 """Models module for the process_manager app."""
 
-# Create your models here.
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """An action on processes, run in the background.
+
+    Results are recorded for each process as the action on it completes so that the
+    progress of a job can be shown while it runs.
+    """
+
+    class Status(models.TextChoices):
+        """The stages of a job."""
+
+        PENDING = "pending"
+        RUNNING = "running"
+        SUCCEEDED = "succeeded"
+        FAILED = "failed"
+
+    action = models.CharField(max_length=32)
+    """The action to perform, a ProcessAction value or "boot"."""
+    arguments = models.JSONField(default=dict)
+    """The arguments of the action, e.g. the UUIDs of the processes to act on."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL
+    )
+    status = models.CharField(max_length=16, choices=Status, default=Status.PENDING)
+    total = models.PositiveIntegerField(default=0)
+    """The number of processes, or sessions to boot, that the action applies to."""
+    results = models.JSONField(default=dict)
+    """The error for each process or session completed, or an empty string if none."""
+    error = models.TextField(blank=True)
+    """The reason the job as a whole failed, if it did."""
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """Meta class for the Job model."""
+
+        ordering = ("-created",)
+
+    def __str__(self) -> str:
+        """A description of the job."""
+        return f"{self.action.capitalize()} {self.total} ({self.status})"
+
+    @property
+    def done(self) -> int:
+        """The number of processes or sessions completed."""
+        return len(self.results)
+
+    @property
+    def failures(self) -> dict[str, str]:
+        """The error for each process or session that failed."""
+        return {key: error for key, error in self.results.items() if error}
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has succeeded or failed."""
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+    @classmethod
+    def expire(cls, timeout: float) -> int:
+        """Mark jobs that have not finished within a timeout as failed.
+
+        Jobs are run by the worker that received them, so are left unfinished if it
+        stops while they run.
+
+        Args:
+            timeout: the number of seconds after which unfinished jobs are failed.
+
+        Returns:
+            The number of jobs marked as failed.
+        """
+        now = timezone.now()
+        return cls.objects.filter(
+            status__in=(cls.Status.PENDING, cls.Status.RUNNING),
+            created__lt=now - timedelta(seconds=timeout),
+        ).update(
+            status=cls.Status.FAILED,
+            error="The job did not finish in time and may have been interrupted.",
+            finished=now,
+        )
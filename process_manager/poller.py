@@ -0,0 +1,312 @@
+"""Background polling of the process manager with row level change tracking.
+
+A single poller per worker fetches the state of all processes on a fixed cadence and
+compares it, keyed by UUID, with the previous state. Each poll that changes anything is
+recorded under a new version so that clients only need to fetch the rows that have
+changed since the version they last saw, rather than re-rendering the whole table.
+Polling stops while no client is reading the poller and resumes on the next read.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from druncschema.process_manager_pb2 import ProcessInstance, ProcessInstanceList
+
+from .process_manager_interface import get_session_info
+from .sessions import SessionSummary, update_summaries
+from .tables import ProcessRow
+
+logger = logging.getLogger(__name__)
+
+_STATUS_NAMES: dict[int, str] = {
+    value: name for name, value in ProcessInstance.StatusCode.items()
+}
+
+_last_snapshot: tuple[ProcessInstanceList, dict[str, ProcessRow]] | None = None
+
+
+def snapshot_rows(session_info: ProcessInstanceList) -> dict[str, ProcessRow]:
+    """Convert the result of a ps call to table rows keyed by process UUID.
+
+    The rows of the most recent snapshot are kept, so converting the same snapshot
+    again, e.g. when it is shared by several requests, returns the same rows. The rows
+    must therefore not be modified.
+
+    Args:
+        session_info: the response from the process manager.
+
+    Returns:
+        The table row for each process.
+    """
+    global _last_snapshot
+    last = _last_snapshot
+    if last is not None and last[0] is session_info:
+        return last[1]
+
+    rows = {}
+    for process_instance in session_info.data.values:
+        metadata = process_instance.process_description.metadata
+        uuid_ = process_instance.uuid.uuid
+        rows[uuid_] = ProcessRow(
+            uuid_,
+            metadata.name,
+            metadata.user,
+            metadata.session,
+            _STATUS_NAMES[process_instance.status_code],
+            process_instance.return_code,
+        )
+    _last_snapshot = (session_info, rows)
+    return rows
+
+
+@dataclass
+class _Change:
+    """The UUIDs affected by a single poll."""
+
+    number: int
+    added: set[str]
+    changed: set[str]
+    removed: set[str]
+
+
+def diff_rows(old: dict[str, ProcessRow], new: dict[str, ProcessRow]) -> _Change | None:
+    """Compare two sets of rows keyed by UUID.
+
+    Args:
+        old: the rows from the previous poll.
+        new: the rows from the current poll.
+
+    Returns:
+        The UUIDs that were added, changed or removed, or None if nothing changed. The
+        change number is left as zero for the caller to fill in.
+    """
+    added = new.keys() - old.keys()
+    removed = old.keys() - new.keys()
+    changed = {uuid_ for uuid_ in new.keys() & old.keys() if new[uuid_] != old[uuid_]}
+    if not (added or removed or changed):
+        return None
+    return _Change(0, added, changed, removed)
+
+
+@dataclass
+class ProcessChanges:
+    """The changes a client needs to apply to get to the current version."""
+
+    version: str
+    added: list[ProcessRow] = field(default_factory=list)
+    changed: list[ProcessRow] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    full: bool = False
+    """If True, added holds every row and the client should discard what it has."""
+
+    @property
+    def structural(self) -> bool:
+        """Whether rows have been added or removed rather than just updated."""
+        return self.full or bool(self.added or self.removed)
+
+
+class ProcessPoller:
+    """Polls the process manager and records which rows change between polls."""
+
+    def __init__(
+        self,
+        fetch: Callable[[], ProcessInstanceList],
+        history: int = 60,
+        interval: float | None = None,
+        idle_timeout: float | None = None,
+    ) -> None:
+        """Create a poller that has not yet polled.
+
+        Args:
+            fetch: callable that gets the current state of all processes.
+            history: number of changes to remember. Clients further behind than this
+                receive all rows.
+            interval: if given, seconds between polls made by a background thread.
+                The thread is started by the first read of the poller, after polling
+                once so the reader sees the current state.
+            idle_timeout: if given, seconds without reads after which the background
+                thread stops. It is started again by the next read.
+        """
+        self.fetch = fetch
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self._last_read = time.monotonic()
+        self._polling = False
+        self.rows: dict[str, ProcessRow] = {}
+        self.sessions: dict[str, SessionSummary] = {}
+        """Summaries of the sessions of the rows, by session name."""
+        self._epoch = uuid.uuid4().hex[:8]
+        self._number = 0
+        self._history: deque[_Change] = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        """Identifier for the current state of the rows."""
+        return f"{self._epoch}-{self._number}"
+
+    def poll(self) -> bool:
+        """Fetch the current state of all processes and record any changes.
+
+        Returns:
+            Whether anything changed since the previous poll.
+        """
+        rows = snapshot_rows(self.fetch())
+        with self._lock:
+            change = diff_rows(self.rows, rows)
+            if change is None:
+                return False
+            self._number += 1
+            change.number = self._number
+            self._history.append(change)
+            self.sessions = update_summaries(
+                self.sessions,
+                self.rows,
+                rows,
+                change.added | change.changed | change.removed,
+            )
+            self.rows = rows
+            return True
+
+    def run(self, interval: float, stop: threading.Event) -> None:
+        """Poll repeatedly until stopped or idle.
+
+        Errors from the process manager are logged and polling continues so that a
+        temporary outage does not stop updates permanently.
+
+        Args:
+            interval: seconds between polls.
+            stop: event that ends polling when set.
+        """
+        while not stop.wait(interval):
+            if self._stop_if_idle():
+                return
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Failed to poll the process manager.")
+
+    def _stop_if_idle(self) -> bool:
+        """Whether polling should stop as the poller has not been read recently."""
+        with self._lock:
+            if (
+                self.idle_timeout is None
+                or time.monotonic() - self._last_read < self.idle_timeout
+            ):
+                return False
+            self._polling = False
+            return True
+
+    def _read(self) -> None:
+        """Note that the poller is being read, resuming background polling if needed.
+
+        Readers arriving while polling resumes wait for the first poll to complete.
+        """
+        with self._lock:
+            self._last_read = time.monotonic()
+            running = self.interval is None or self._polling
+        if running:
+            return
+
+        with self._start_lock:
+            with self._lock:
+                if self._polling:
+                    return
+            self.poll()
+            with self._lock:
+                self._polling = True
+            threading.Thread(
+                target=self.run,
+                args=(self.interval, threading.Event()),
+                name="process-poller",
+                daemon=True,
+            ).start()
+
+    def current(self) -> tuple[str, dict[str, ProcessRow]]:
+        """Get the current version together with the rows at that version."""
+        self._read()
+        with self._lock:
+            return self.version, self.rows
+
+    def current_sessions(self) -> tuple[str, dict[str, SessionSummary]]:
+        """Get the current version together with the session summaries at it."""
+        self._read()
+        with self._lock:
+            return self.version, self.sessions
+
+    def changes_since(self, version: str) -> ProcessChanges:
+        """Get the rows that have changed since a previous version.
+
+        Args:
+            version: the version the client currently has. Versions from another
+                poller, or too old to be in the history, result in all rows.
+
+        Returns:
+            The changes to apply to get to the current version.
+        """
+        self._read()
+        with self._lock:
+            epoch, _, number_ = version.partition("-")
+            number = int(number_) if epoch == self._epoch and number_.isdigit() else -1
+            oldest = self._history[0].number if self._history else self._number + 1
+            if not (number == self._number or oldest - 1 <= number < self._number):
+                return ProcessChanges(
+                    self.version, added=list(self.rows.values()), full=True
+                )
+
+            added: set[str] = set()
+            touched: set[str] = set()
+            for change in self._history:
+                if change.number > number:
+                    added |= change.added
+                    touched |= change.added | change.changed | change.removed
+
+            changes = ProcessChanges(self.version)
+            for uuid_ in sorted(touched):
+                if (row := self.rows.get(uuid_)) is None:
+                    changes.removed.append(uuid_)
+                elif uuid_ in added:
+                    changes.added.append(row)
+                else:
+                    changes.changed.append(row)
+            return changes
+
+
+_poller: ProcessPoller | None = None
+_poller_lock = threading.Lock()
+
+
+def get_process_poller() -> ProcessPoller:
+    """Get the poller for this worker, creating it on first use.
+
+    The poller polls in the background while it is being read and stops once it has
+    not been read for PROCESS_POLL_IDLE_TIMEOUT seconds.
+    """
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = ProcessPoller(
+                get_session_info,
+                settings.PROCESS_POLL_HISTORY,
+                interval=settings.PROCESS_POLL_INTERVAL,
+                idle_timeout=settings.PROCESS_POLL_IDLE_TIMEOUT,
+            )
+        return _poller
+
+
+def _reset_after_fork() -> None:
+    # the polling thread does not survive a fork so child processes start their own
+    global _poller, _poller_lock
+    _poller = None
+    _poller_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,37 +1,221 @@
 """Module providing functions to interact with the drunc process manager."""
 
 import asyncio
-from collections.abc import Iterable
+import itertools
+import threading
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+)
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from enum import Enum
 
+import grpc
 from django.conf import settings
 from drunc.process_manager.process_manager_driver import ProcessManagerDriver
-from drunc.utils.shell_utils import DecodedResponse, create_dummy_token_from_uname
+from drunc.utils.shell_utils import create_dummy_token_from_uname
 from druncschema.process_manager_pb2 import (
     LogRequest,
     ProcessInstanceList,
     ProcessQuery,
     ProcessUUID,
 )
+from prometheus_client import Counter, Histogram
+
+from main.metrics import timed
+
+from .event_loop import iterate, run_coroutine
+from .log_cache import LogCache
+from .logs import LogQuery
+from .snapshot import SnapshotCache
+
+_UNHEALTHY_STATES = (
+    grpc.ChannelConnectivity.TRANSIENT_FAILURE,
+    grpc.ChannelConnectivity.SHUTDOWN,
+)
+_CLOSE_GRACE = 5.0
+"""Seconds that calls still using a driver removed from the pool have to complete."""
+
+_CALL_SECONDS = Histogram(
+    "drunc_ui_process_manager_call_seconds",
+    "Time taken by calls to the process manager interface, by function.",
+    ["function"],
+)
+_CALL_ERRORS = Counter(
+    "drunc_ui_process_manager_call_errors_total",
+    "Calls to the process manager interface that raised an error, by function.",
+    ["function"],
+)
+_RPC_SECONDS = Histogram(
+    "drunc_ui_process_manager_rpc_seconds",
+    "Time taken by RPCs made to the process manager, by RPC.",
+    ["rpc"],
+)
+_instrumented = timed(_CALL_SECONDS, _CALL_ERRORS)
+
+
+class DriverPool:
+    """A pool of long-lived ProcessManagerDriver instances.
+
+    Drivers (and their underlying aio channels) are created lazily and handed out
+    round-robin so that concurrent calls are spread over a fixed number of HTTP/2
+    connections. A driver is health checked every time it is acquired and replaced if
+    its channel has failed or been shut down. As aio channels are bound to the event
+    loop they were created in, the pool is also reset if used from a different loop
+    (see event_loop for the shared loop normally used). The channels of drivers removed
+    from the pool are closed on their loop if it is still running.
+    """
+
+    def __init__(self, address: str, size: int) -> None:
+        """Create an empty pool.
+
+        Args:
+            address: address of the process manager gRPC server.
+            size: maximum number of drivers to hold open.
+        """
+        if size < 1:
+            raise ValueError("Driver pool size must be at least 1.")
+        self.address = address
+        self.size = size
+        self._drivers: list[ProcessManagerDriver | None] = [None] * size
+        self._slots = itertools.cycle(range(size))
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing: set[asyncio.Task[None]] = set()
+        self._lock = threading.Lock()
+
+    def _create_driver(self) -> ProcessManagerDriver:
+        token = create_dummy_token_from_uname()
+        return ProcessManagerDriver(self.address, token=token, aio_channel=True)
+
+    @staticmethod
+    def _is_healthy(driver: ProcessManagerDriver) -> bool:
+        state = driver.channel.get_state(try_to_connect=False)
+        return state not in _UNHEALTHY_STATES
+
+    def acquire(self) -> ProcessManagerDriver:
+        """Get a healthy driver from the pool, creating one if required."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        with self._lock:
+            if loop is not self._loop:
+                self._clear()
+                self._loop = loop
+
+            slot = next(self._slots)
+            driver = self._drivers[slot]
+            if driver is None or not self._is_healthy(driver):
+                if driver is not None:
+                    self._close(driver)
+                driver = self._drivers[slot] = self._create_driver()
+            return driver
+
+    def discard(self, driver: ProcessManagerDriver) -> None:
+        """Remove a driver from the pool so it is recreated on next use.
+
+        Args:
+            driver: the driver to remove, typically after a failed call.
+        """
+        with self._lock:
+            for slot, pooled in enumerate(self._drivers):
+                if pooled is driver:
+                    self._drivers[slot] = None
+                    self._close(driver)
+
+    def _clear(self) -> None:
+        for driver in self._drivers:
+            if driver is not None:
+                self._close(driver)
+        self._drivers = [None] * self.size
+
+    def _close(self, driver: ProcessManagerDriver) -> None:
+        """Close the channel of a driver on the loop it belongs to, if it is running."""
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+
+        def close() -> None:
+            task = loop.create_task(driver.channel.close(grace=_CLOSE_GRACE))
+            # tasks are only weakly referenced by the loop so are held until done
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
 
+        loop.call_soon_threadsafe(close)
 
+
+_pool: DriverPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Get the driver pool for this worker, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                settings.PROCESS_MANAGER_URL, settings.PROCESS_MANAGER_POOL_SIZE
+            )
+        return _pool
+
+
+@_instrumented
 def get_process_manager_driver() -> ProcessManagerDriver:
-    """Get a ProcessManagerDriver instance."""
-    token = create_dummy_token_from_uname()
-    return ProcessManagerDriver(
-        settings.PROCESS_MANAGER_URL, token=token, aio_channel=True
-    )
+    """Get a ProcessManagerDriver instance from the driver pool."""
+    return get_driver_pool().acquire()
 
 
-async def _get_session_info() -> ProcessInstanceList:
+@asynccontextmanager
+async def _driver() -> AsyncIterator[ProcessManagerDriver]:
+    """Provide a pooled driver, discarding it if the call made with it fails."""
     pmd = get_process_manager_driver()
-    query = ProcessQuery(names=[".*"])
-    return await pmd.ps(query)
+    try:
+        yield pmd
+    except Exception:
+        get_driver_pool().discard(pmd)
+        raise
+
+
+async def _get_session_info() -> ProcessInstanceList:
+    async with _driver() as pmd:
+        query = ProcessQuery(names=[".*"])
+        with _RPC_SECONDS.labels(rpc="ps").time():
+            return await pmd.ps(query)
+
+
+_snapshot_cache: SnapshotCache[ProcessInstanceList] | None = None
+_snapshot_cache_lock = threading.Lock()
+
 
+def get_snapshot_cache() -> SnapshotCache[ProcessInstanceList]:
+    """Get the cache of ps snapshots for this worker, creating it on first use."""
+    global _snapshot_cache
+    with _snapshot_cache_lock:
+        if _snapshot_cache is None:
+            _snapshot_cache = SnapshotCache(
+                lambda: run_coroutine(_get_session_info()),
+                ttl=settings.PROCESS_SNAPSHOT_TTL,
+                cache_alias=settings.PROCESS_SNAPSHOT_CACHE,
+            )
+        return _snapshot_cache
 
-def get_session_info() -> ProcessInstanceList:
-    """Get info about all sessions from process manager."""
-    return asyncio.run(_get_session_info())
+
+@_instrumented
+def get_session_info(cached: bool = True) -> ProcessInstanceList:
+    """Get info about all sessions from process manager.
+
+    Args:
+        cached: if True, a recent snapshot shared with other callers may be returned
+            instead of making a new call.
+    """
+    if cached:
+        return get_snapshot_cache().get()
+    return run_coroutine(_get_session_info())
 
 
 class ProcessAction(Enum):
@@ -42,58 +226,206 @@ class ProcessAction(Enum):
     FLUSH = "flush"
 
 
-async def _process_call(uuids: Iterable[str], action: ProcessAction) -> None:
-    pmd = get_process_manager_driver()
-    uuids_ = [ProcessUUID(uuid=u) for u in uuids]
-
-    match action:
-        case ProcessAction.RESTART:
-            for uuid_ in uuids_:
-                query = ProcessQuery(uuids=[uuid_])
-                await pmd.restart(query)
-        case ProcessAction.KILL:
-            query = ProcessQuery(uuids=uuids_)
-            await pmd.kill(query)
-        case ProcessAction.FLUSH:
-            query = ProcessQuery(uuids=uuids_)
-            await pmd.flush(query)
-
-
-def process_call(uuids: Iterable[str], action: ProcessAction) -> None:
+@dataclass
+class ActionResult:
+    """The outcome of an action on a number of processes."""
+
+    action: ProcessAction
+    succeeded: list[str] = field(default_factory=list)
+    """UUIDs of the processes for which the action succeeded."""
+    failed: dict[str, str] = field(default_factory=dict)
+    """The error for each process for which the action failed, by UUID."""
+
+
+async def _restart(
+    pmd: ProcessManagerDriver, uuids: list[str]
+) -> list[BaseException | None]:
+    semaphore = asyncio.Semaphore(settings.PROCESS_RESTART_CONCURRENCY)
+
+    async def restart(uuid: str) -> None:
+        async with semaphore:
+            await pmd.restart(ProcessQuery(uuids=[ProcessUUID(uuid=uuid)]))
+
+    return await asyncio.gather(
+        *(restart(uuid) for uuid in uuids), return_exceptions=True
+    )
+
+
+async def _process_call(uuids: Iterable[str], action: ProcessAction) -> ActionResult:
+    uuids = list(uuids)
+    outcomes: list[BaseException | None] = [None] * len(uuids)
+    try:
+        async with _driver() as pmd:
+            match action:
+                case ProcessAction.RESTART:
+                    # restarts are made one process at a time so are sent concurrently
+                    outcomes = await _restart(pmd, uuids)
+                case ProcessAction.KILL:
+                    query = ProcessQuery(uuids=[ProcessUUID(uuid=u) for u in uuids])
+                    await pmd.kill(query)
+                case ProcessAction.FLUSH:
+                    query = ProcessQuery(uuids=[ProcessUUID(uuid=u) for u in uuids])
+                    await pmd.flush(query)
+    except Exception as e:
+        outcomes = [e] * len(uuids)
+
+    result = ActionResult(action)
+    for uuid, outcome in zip(uuids, outcomes):
+        if outcome is None:
+            result.succeeded.append(uuid)
+        else:
+            result.failed[uuid] = str(outcome) or type(outcome).__name__
+    return result
+
+
+@_instrumented
+def process_call(uuids: Iterable[str], action: ProcessAction) -> ActionResult:
     """Perform an action on a process with a given UUID.
 
+    Restarts are made concurrently, at most PROCESS_RESTART_CONCURRENCY at once.
+
     Args:
         uuids: List of UUIDs of the process to be actioned.
         action: Action to be performed {restart,flush,kill}.
+
+    Returns:
+        Which processes the action succeeded and failed for.
     """
-    return asyncio.run(_process_call(uuids, action))
+    result = run_coroutine(_process_call(uuids, action))
+    get_snapshot_cache().invalidate()
+    return result
 
 
-async def _get_process_logs(uuid: str) -> list[DecodedResponse]:
-    pmd = get_process_manager_driver()
-    query = ProcessQuery(uuids=[ProcessUUID(uuid=uuid)])
-    request = LogRequest(query=query, how_far=100)
-    return [item async for item in pmd.logs(request)]
+async def _iter_process_logs(uuid: str, how_far: int) -> AsyncGenerator[str, None]:
+    async with _driver() as pmd:
+        query = ProcessQuery(uuids=[ProcessUUID(uuid=uuid)])
+        request = LogRequest(query=query, how_far=how_far)
+        async for item in pmd.logs(request):
+            yield item.data.line
+
+
+def _read_process_logs(uuid: str, how_far: int) -> Iterator[str]:
+    return iterate(_iter_process_logs(uuid, how_far))
+
+
+_log_cache: LogCache | None = None
+_log_cache_lock = threading.Lock()
+
 
+def get_log_cache() -> LogCache:
+    """Get the cache of recent log lines for this worker, creating it on first use."""
+    global _log_cache
+    with _log_cache_lock:
+        if _log_cache is None:
+            _log_cache = LogCache(
+                lambda uuid, how_far: list(_read_process_logs(uuid, how_far)),
+                capacity=settings.PROCESS_LOG_CACHE_LINES,
+                max_processes=settings.PROCESS_LOG_CACHE_PROCESSES,
+                ttl=settings.PROCESS_LOG_CACHE_TTL,
+                fetch_many=gather_process_logs,
+            )
+        return _log_cache
 
-def get_process_logs(uuid: str) -> list[DecodedResponse]:
-    """Retrieve logs for a process from the process manager.
+
+# for uncached logs, only the time taken to start streaming is recorded
+@_instrumented
+def iter_process_logs(uuid: str, how_far: int, cached: bool = True) -> Iterator[str]:
+    """Stream the last lines of the logs of a process from the process manager.
+
+    Lines are yielded as they are received rather than once the whole log has been
+    read.
 
     Args:
       uuid: UUID of the process.
+      how_far: the number of lines to read from the end of the log.
+      cached: if True and no more lines are wanted than the log cache holds, lines
+        are served from the cache, which only reads new lines from the process
+        manager.
 
     Returns:
-      The process logs.
+      An iterator over the log lines, oldest first.
     """
-    return asyncio.run(_get_process_logs(uuid))
+    if cached and how_far <= (cache := get_log_cache()).capacity:
+        return iter(cache.get(uuid, how_far))
+    return _read_process_logs(uuid, how_far)
+
+
+async def _gather_process_logs(
+    uuids: list[str], how_far: int
+) -> list[list[str] | BaseException]:
+    semaphore = asyncio.Semaphore(settings.PROCESS_LOG_CONCURRENCY)
+
+    async def read(uuid: str) -> list[str]:
+        async with semaphore:
+            return [line async for line in _iter_process_logs(uuid, how_far)]
+
+    return await asyncio.gather(*(read(uuid) for uuid in uuids), return_exceptions=True)
+
+
+@_instrumented
+def gather_process_logs(
+    uuids: Iterable[str], how_far: int
+) -> tuple[dict[str, list[str]], dict[str, str]]:
+    """Read the logs of several processes concurrently.
+
+    At most PROCESS_LOG_CONCURRENCY logs are read from the process manager at once.
+    A log that cannot be read does not stop the others being read.
+
+    Args:
+      uuids: UUIDs of the processes.
+      how_far: the number of lines to read from the end of each log.
+
+    Returns:
+      The lines of the log of each process that was read, oldest first, and the error
+      for each process whose log could not be read, both by UUID.
+    """
+    uuids = list(uuids)
+    logs = {}
+    errors = {}
+    outcomes = run_coroutine(_gather_process_logs(uuids, how_far))
+    for uuid, outcome in zip(uuids, outcomes):
+        if isinstance(outcome, BaseException):
+            errors[uuid] = str(outcome) or type(outcome).__name__
+        else:
+            logs[uuid] = outcome
+    return logs, errors
+
+
+@_instrumented
+def search_process_logs(
+    uuids: Iterable[str], query: LogQuery
+) -> tuple[dict[str, list[str]], dict[str, str]]:
+    """Search the recent logs of processes.
+
+    The last PROCESS_LOG_CACHE_LINES lines of each log are searched, using the log
+    cache and its index. Logs not already cached are read concurrently. A log that
+    cannot be read does not stop the others being searched.
+
+    Args:
+      uuids: UUIDs of the processes to search.
+      query: the search to make.
+
+    Returns:
+      The matching lines of each process with any, oldest first, and the error for
+      each process whose log could not be read, both by UUID.
+    """
+    cache = get_log_cache()
+    results = {}
+    logs, errors = cache.get_many(uuids, cache.capacity, containing=query.literals())
+    for uuid, lines in logs.items():
+        if matches := [line for line in lines if query.matches(line)]:
+            results[uuid] = matches
+    return results, errors
 
 
 async def _boot_process(user: str, data: dict[str, str | int]) -> None:
-    pmd = get_process_manager_driver()
-    async for item in pmd.dummy_boot(user=user, **data):
-        pass
+    async with _driver() as pmd:
+        with _RPC_SECONDS.labels(rpc="boot").time():
+            async for item in pmd.dummy_boot(user=user, **data):
+                pass
 
 
+@_instrumented
 def boot_process(user: str, data: dict[str, str | int]) -> None:
     """Boot a process with the given data.
 
@@ -101,4 +433,86 @@ def boot_process(user: str, data: dict[str, str | int]) -> None:
         user: the user to boot the process as.
         data: the data for the process.
     """
-    return asyncio.run(_boot_process(user, data))
+    run_coroutine(_boot_process(user, data))
+    get_snapshot_cache().invalidate()
+
+
+async def _boot_processes(
+    user: str, sessions: list[dict[str, str | int]]
+) -> AsyncGenerator[tuple[int, BaseException | None], None]:
+    semaphore = asyncio.Semaphore(settings.PROCESS_BOOT_CONCURRENCY)
+    rate = settings.PROCESS_BOOT_RATE
+    interval = 1 / rate if rate > 0 else 0.0
+    loop = asyncio.get_running_loop()
+    pacing = asyncio.Lock()
+    next_start = loop.time()
+
+    async def boot(
+        position: int, data: dict[str, str | int]
+    ) -> tuple[int, BaseException | None]:
+        nonlocal next_start
+        try:
+            async with semaphore:
+                # boots wait for their turn once admitted, so that those admitted
+                # together as others finish are still started at most rate each second
+                async with pacing:
+                    await asyncio.sleep(max(next_start - loop.time(), 0))
+                    next_start = loop.time() + interval
+                async with asyncio.timeout(settings.PROCESS_MANAGER_TIMEOUT):
+                    await _boot_process(user, data)
+        except Exception as e:
+            return position, e
+        return position, None
+
+    tasks = [asyncio.ensure_future(boot(i, data)) for i, data in enumerate(sessions)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@_instrumented
+def boot_processes(
+    user: str,
+    sessions: Iterable[dict[str, str | int]],
+    on_booted: Callable[[str, str], None] | None = None,
+) -> dict[str, str]:
+    """Boot several sessions concurrently.
+
+    At most PROCESS_BOOT_CONCURRENCY sessions are booted at once and at most
+    PROCESS_BOOT_RATE boots are started each second. Each boot is given
+    PROCESS_MANAGER_TIMEOUT seconds to complete.
+
+    Args:
+        user: the user to boot the processes as.
+        sessions: the data for the processes of each session, as for boot_process.
+        on_booted: called in the calling thread with the session name and error, as
+            returned, as each boot completes.
+
+    Returns:
+        The error booting each session by session name, or an empty string if the
+        session was booted.
+    """
+    sessions = list(sessions)
+    # a boot completes within the timeout of a single boot, once started, and any
+    # boots ahead of it waiting to start
+    rate = settings.PROCESS_BOOT_RATE
+    timeout = settings.PROCESS_MANAGER_TIMEOUT
+    if rate > 0:
+        timeout += settings.PROCESS_BOOT_CONCURRENCY / rate
+
+    outcomes: dict[int, str] = {}
+    try:
+        for position, outcome in iterate(_boot_processes(user, sessions), timeout):
+            error = "" if outcome is None else str(outcome) or type(outcome).__name__
+            outcomes[position] = error
+            if on_booted is not None:
+                on_booted(str(sessions[position]["session_name"]), error)
+    finally:
+        get_snapshot_cache().invalidate()
+    return {
+        str(data["session_name"]): outcomes[position]
+        for position, data in enumerate(sessions)
+    }
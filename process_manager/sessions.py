@@ -0,0 +1,97 @@
+"""Per-session summaries of the state of processes.
+
+Operators usually want to know whether each session is healthy rather than the state of
+every process. The number of processes in each session with each status and exit code is
+kept up to date from the rows that change between polls, so that an overview of all
+sessions costs time proportional to the number of sessions to show, not the number of
+processes.
+"""
+
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+
+from .tables import ProcessRow
+
+
+@dataclass(slots=True)
+class SessionSummary:
+    """Counts of the processes in a session."""
+
+    session: str
+    processes: int = 0
+    statuses: Counter[str] = field(default_factory=Counter)
+    """The number of processes with each status code."""
+    exit_codes: Counter[int] = field(default_factory=Counter)
+    """The number of processes with each exit code."""
+
+    @property
+    def failed(self) -> int:
+        """The number of processes with a non-zero exit code."""
+        return self.processes - self.exit_codes[0]
+
+    def copy(self) -> "SessionSummary":
+        """Get a copy of the summary that can be updated independently."""
+        return SessionSummary(
+            self.session,
+            self.processes,
+            Counter(self.statuses),
+            Counter(self.exit_codes),
+        )
+
+    def add(self, row: ProcessRow) -> None:
+        """Count a process in the session."""
+        self.processes += 1
+        self.statuses[row.status_code] += 1
+        self.exit_codes[row.exit_code] += 1
+
+    def remove(self, row: ProcessRow) -> None:
+        """Stop counting a process in the session."""
+        self.processes -= 1
+        self.statuses[row.status_code] -= 1
+        self.exit_codes[row.exit_code] -= 1
+        # drop counts of zero so that only statuses and codes still in use are shown
+        self.statuses = +self.statuses
+        self.exit_codes = +self.exit_codes
+
+
+def update_summaries(
+    summaries: Mapping[str, SessionSummary],
+    old: Mapping[str, ProcessRow],
+    new: Mapping[str, ProcessRow],
+    uuids: Iterable[str],
+) -> dict[str, SessionSummary]:
+    """Update session summaries for the processes that have changed.
+
+    The summaries given are not modified, so they may still be in use elsewhere. Only
+    those of sessions with changed processes are copied.
+
+    Args:
+        summaries: the summaries of the sessions of the old rows, by session name.
+        old: the previous rows, by process UUID.
+        new: the current rows, by process UUID.
+        uuids: the UUIDs of the processes added, changed or removed.
+
+    Returns:
+        The summaries of the sessions of the new rows, by session name.
+    """
+    result = dict(summaries)
+    copied: set[str] = set()
+
+    def summary(session: str) -> SessionSummary:
+        if session not in copied:
+            current = result.get(session)
+            result[session] = current.copy() if current else SessionSummary(session)
+            copied.add(session)
+        return result[session]
+
+    for uuid in uuids:
+        if (row := old.get(uuid)) is not None:
+            summary(row.session).remove(row)
+        if (row := new.get(uuid)) is not None:
+            summary(row.session).add(row)
+
+    for session in copied:
+        if not result[session].processes:
+            del result[session]
+    return result
@@ -0,0 +1,127 @@
+"""A shared, time-limited cache of process manager ps snapshots.
+
+Every open process table polls the process manager for the state of all processes.
+Rather than issuing one ps call per request, results are held for a short time and
+shared between all requests handled by a worker. Concurrent requests that miss the
+cache are coalesced so that only one of them makes the call while the others wait for
+its result. Optionally, snapshots are also stored in a Django cache backend so that
+they can be shared between workers.
+"""
+
+import math
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Generic, TypeVar
+
+from django.core.cache import caches
+
+T = TypeVar("T")
+
+
+class SnapshotCache(Generic[T]):
+    """Time-limited, single-flight cache of process manager snapshots."""
+
+    key = "process_manager:snapshot"
+
+    def __init__(
+        self,
+        fetch: Callable[[], T],
+        ttl: float,
+        cache_alias: str | None = None,
+    ) -> None:
+        """Create an empty cache.
+
+        Args:
+            fetch: callable that gets a fresh snapshot from the process manager.
+            ttl: number of seconds for which a snapshot is reused.
+            cache_alias: name of a Django cache in which to share snapshots between
+                workers. Snapshots must be picklable to use this. If None, snapshots
+                are only held in memory.
+        """
+        self.fetch = fetch
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self._value: T | None = None
+        self._fetched_at = 0.0
+        self._inflight: Future[T] | None = None
+        self._generation = 0
+        """Incremented on invalidation so that fetches started before are discarded."""
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        """Get the current snapshot, fetching a new one if it has expired."""
+        with self._lock:
+            if self._value is not None and self._age() < self.ttl:
+                return self._value
+            if self._inflight is not None:
+                future = self._inflight
+                leader = False
+            else:
+                future = self._inflight = Future()
+                leader = True
+            generation = self._generation
+
+        if not leader:
+            return future.result()
+
+        try:
+            value, fetched_at = self._load_or_fetch(generation)
+        except BaseException as e:
+            with self._lock:
+                if self._inflight is future:
+                    self._inflight = None
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # a snapshot fetched before an invalidation may predate the change that
+            # caused it, so is returned to those waiting for it but not kept
+            if self._generation == generation:
+                self._value = value
+                self._fetched_at = fetched_at
+            if self._inflight is future:
+                self._inflight = None
+        future.set_result(value)
+        return value
+
+    def invalidate(self) -> None:
+        """Discard the current snapshot so the next call fetches a new one.
+
+        Snapshots being fetched at the time are not kept, and later calls do not wait
+        for them.
+        """
+        with self._lock:
+            self._value = None
+            self._inflight = None
+            self._generation += 1
+            if self.cache_alias:
+                caches[self.cache_alias].delete(self.key)
+
+    def _age(self) -> float:
+        return time.time() - self._fetched_at
+
+    def _load_or_fetch(self, generation: int) -> tuple[T, float]:
+        """Get a snapshot from the shared cache if fresh enough, else fetch one.
+
+        A fetched snapshot is only shared if the cache has not been invalidated since
+        the given generation.
+        """
+        cache = caches[self.cache_alias] if self.cache_alias else None
+        if cache is not None and (cached := cache.get(self.key)) is not None:
+            fetched_at, value = cached
+            if time.time() - fetched_at < self.ttl:
+                return value, fetched_at
+
+        fetched_at = time.time()
+        value = self.fetch()
+        if cache is not None:
+            with self._lock:
+                if self._generation == generation:
+                    cache.set(
+                        self.key,
+                        (fetched_at, value),
+                        timeout=math.ceil(self.ttl) + 1,
+                    )
+        return value, fetched_at
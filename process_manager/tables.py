@@ -1,6 +1,18 @@
 """Tables for the process_manager app."""
 
+import re
+from collections.abc import Container, Iterable, Mapping
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import ClassVar
+
 import django_tables2 as tables
+from django.conf import settings
+from django.core.paginator import EmptyPage
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import SafeString
+from django_tables2.data import TableListData
+from django_tables2.utils import OrderBy, OrderByTuple
 
 restart_column_template = (
     "<a href={href} onclick=\"return confirm('{message}')\">{text}</a>".format(
@@ -22,16 +34,50 @@ flush_column_template = (
     "<a href=\"{% url 'process_manager:flush' record.uuid %}\">FLUSH</a>"
 )
 
+session_column_template = (
+    "<a href=\"{% url 'process_manager:index' %}?session={{ record.session|urlencode }}"
+    '">{{ record.session }}</a>'
+)
+
 logs_column_template = (
     "<a href=\"{% url 'process_manager:logs' record.uuid %}\">LOGS</a>"
 )
 
 
+@dataclass(frozen=True, slots=True)
+class ProcessRow:
+    """Table data for a single process."""
+
+    uuid: str
+    name: str
+    user: str
+    session: str
+    status_code: str
+    exit_code: int
+
+
+class _RowData(TableListData):
+    """Table data holding ProcessRows.
+
+    Rows are sorted by looking up their attributes directly, which is much cheaper than
+    the generic accessors django-tables2 uses for sorting lists of records.
+    """
+
+    def order_by(self, aliases: OrderByTuple) -> None:
+        # sorts are stable so sorting by the least significant column first gives the
+        # order of all columns together
+        for alias in reversed(aliases):
+            order_by = OrderBy(alias)
+            self.data.sort(
+                key=attrgetter(order_by.bare), reverse=order_by.is_descending
+            )
+
+
 class ProcessTable(tables.Table):
     """Defines and Process Table for the data from the Process Manager."""
 
     class Meta:  # noqa: D106
-        orderable = False
+        row_attrs: ClassVar = {"id": lambda record: f"process-{record.uuid}"}
 
     uuid = tables.Column(verbose_name="UUID")
     name = tables.Column(verbose_name="Name")
@@ -39,10 +85,133 @@ class ProcessTable(tables.Table):
     session = tables.Column(verbose_name="Session")
     status_code = tables.Column(verbose_name="Status Code")
     exit_code = tables.Column(verbose_name="Exit Code")
-    logs = tables.TemplateColumn(logs_column_template, verbose_name="Logs")
+    logs = tables.TemplateColumn(
+        logs_column_template, verbose_name="Logs", orderable=False
+    )
     select = tables.CheckBoxColumn(
         accessor="uuid",
         verbose_name="Select",
-        checked="checked",
+        orderable=False,
         attrs={"th__input": {"onclick": "toggle(this)"}},
     )
+
+    def __init__(
+        self,
+        data: Iterable[ProcessRow],
+        selected: Container[str] = frozenset(),
+        **kwargs: object,
+    ) -> None:
+        """Create a table of processes.
+
+        Args:
+            data: the rows of the table.
+            selected: UUIDs of the processes whose rows are checked.
+            kwargs: passed on to django_tables2.Table.
+        """
+        super().__init__(_RowData(list(data)), **kwargs)
+        self.selected = selected
+        self.columns["select"].column.checked = lambda value, record: value in selected
+
+
+_STATUS_BADGES = dict(RUNNING="text-bg-success", DEAD="text-bg-danger")
+
+
+class SessionTable(tables.Table):
+    """Table summarising the state of the processes in each session."""
+
+    class Meta:  # noqa: D106
+        orderable = False
+
+    session = tables.TemplateColumn(session_column_template, verbose_name="Session")
+    processes = tables.Column(verbose_name="Processes")
+    statuses = tables.Column(verbose_name="Status Codes")
+    exit_codes = tables.Column(verbose_name="Exit Codes")
+    actions = tables.TemplateColumn(
+        template_name="process_manager/partials/session_actions.html",
+        verbose_name="Actions",
+        extra_context=dict(
+            session_actions=[
+                ("Restart", "btn-success"),
+                ("Flush", "btn-warning"),
+                ("Kill", "btn-danger"),
+            ]
+        ),
+    )
+
+    def render_statuses(self, value: Mapping[str, int]) -> SafeString:
+        """Render the number of processes with each status as badges."""
+        return format_html_join(
+            " ",
+            '<span class="badge {}">{} {}</span>',
+            (
+                (_STATUS_BADGES.get(status, "text-bg-secondary"), status, count)
+                for status, count in sorted(value.items())
+            ),
+        )
+
+    def render_exit_codes(self, value: Mapping[int, int]) -> SafeString:
+        """Render the number of processes with each non-zero exit code."""
+        failed = sorted((code, count) for code, count in value.items() if code)
+        if not failed:
+            return format_html("{}", "")
+        return format_html_join(
+            " ",
+            '<span class="badge text-bg-warning">{}: {}</span>',
+            failed,
+        )
+
+
+def filter_rows(
+    rows: Iterable[ProcessRow],
+    session: str = "",
+    user: str = "",
+    status: str = "",
+    name: str = "",
+) -> list[ProcessRow]:
+    """Select the process table rows matching the given filters.
+
+    Args:
+        rows: the rows to filter.
+        session: if given, only rows for processes in this session are selected.
+        user: if given, only rows for processes run by this user are selected.
+        status: if given, only rows for processes with this status are selected.
+        name: if given, only rows for processes with a name matching this regular
+            expression are selected.
+
+    Returns:
+        The selected rows.
+    """
+    wanted = dict(session=session, user=user, status_code=status)
+    wanted = {key: value for key, value in wanted.items() if value}
+    pattern = re.compile(name) if name else None
+    return [
+        row
+        for row in rows
+        if all(getattr(row, key) == value for key, value in wanted.items())
+        and (pattern is None or pattern.search(row.name))
+    ]
+
+
+def configure_table(table: ProcessTable, params: Mapping[str, str]) -> None:
+    """Sort the table and select the page to show.
+
+    Only the rows of the page shown are rendered so that large tables stay cheap to
+    show. Pages beyond the last show the last page.
+
+    Args:
+        table: the table to configure.
+        params: the request parameters, with the sort order in "sort" and the page
+            number in "page".
+    """
+    if sort := params.get("sort"):
+        table.order_by = sort
+    page = params.get("page", "")
+    try:
+        table.paginate(
+            page=max(int(page), 1) if page.isdigit() else 1,
+            per_page=settings.PROCESS_TABLE_PAGE_SIZE,
+        )
+    except EmptyPage:
+        table.paginate(
+            page=table.paginator.num_pages, per_page=table.paginator.per_page
+        )
@@ -2,19 +2,36 @@
 
 from django.urls import include, path
 
-from .views import actions, pages, partials
+from .views import actions, pages, partials, streams
 
 app_name = "process_manager"
 
 partial_urlpatterns = [
     path("process_table/", partials.process_table, name="process_table"),
+    path("process_updates/", partials.process_updates, name="process_updates"),
+    path("process_data/", partials.process_data, name="process_data"),
+    path("sessions/", partials.session_summary, name="session_summary"),
     path("messages/", partials.messages, name="messages"),
+    path("logs/<uuid:uuid>/", partials.log_lines, name="log_lines"),
+    path("logs/merged/", partials.merged_log_lines, name="merged_log_lines"),
+    path("jobs/", partials.jobs, name="jobs"),
+]
+
+stream_urlpatterns = [
+    path("messages/", streams.messages, name="message_stream"),
+    path("logs/<uuid:uuid>/", streams.logs, name="log_stream"),
 ]
 
 urlpatterns = [
     path("", pages.index, name="index"),
+    path("live/", pages.live_table, name="live_table"),
+    path("sessions/", pages.sessions, name="sessions"),
     path("process_action/", actions.process_action, name="process_action"),
     path("logs/<uuid:uuid>", pages.logs, name="logs"),
+    path("logs/search/", pages.log_search, name="log_search"),
+    path("logs/merged/", pages.merged_logs, name="merged_logs"),
     path("boot_process/", pages.BootProcessView.as_view(), name="boot_process"),
+    path("boot_process/bulk/", pages.BulkBootView.as_view(), name="bulk_boot"),
     path("partials/", include(partial_urlpatterns)),
+    path("streams/", include(stream_urlpatterns)),
 ]
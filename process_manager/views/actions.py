@@ -1,10 +1,15 @@
 """View functions for performing actions on DUNE processes."""
 
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
 from django.urls import reverse
 
-from ..process_manager_interface import ProcessAction, process_call
+from main.models import User
+
+from ..forms import ProcessFilterForm
+from ..jobs import submit_action, submit_query_action
+from ..process_manager_interface import ProcessAction
 
 
 @login_required
@@ -12,7 +17,12 @@ from ..process_manager_interface import ProcessAction, process_call
 def process_action(request: HttpRequest) -> HttpResponse:
     """Perform an action on the selected processes.
 
-    Both the action and the selected processes are retrieved from the request.
+    Both the action and the selected processes are retrieved from the request. The
+    action is run in the background and its progress shown on the index page.
+
+    If the "scope" of the request is "matching" the action is instead performed on all
+    processes matching the session, user, status and name filters in the request, which
+    are resolved on the server rather than listed by the browser.
 
     Args:
         request: Django HttpRequest object.
@@ -27,6 +37,21 @@ def process_action(request: HttpRequest) -> HttpResponse:
         # action.lower() is not a valid enum value
         return HttpResponseRedirect(reverse("process_manager:index"))
 
-    if uuids_ := request.POST.getlist("select"):
-        process_call(uuids_, action_enum)
+    user = request.user if isinstance(request.user, User) else None
+    if request.POST.get("scope") == "matching":
+        form = ProcessFilterForm(request.POST)
+        if not form.is_valid() or not any(form.cleaned_data.values()):
+            messages.error(request, "Choose valid filters for the processes to act on.")
+        else:
+            submit_query_action(user, form.cleaned_data, action_enum)
+            messages.info(
+                request,
+                f"{action_enum.value.capitalize()} of matching processes started.",
+            )
+    elif uuids_ := request.POST.getlist("select"):
+        submit_action(user, uuids_, action_enum)
+        messages.info(
+            request,
+            f"{action_enum.value.capitalize()} of {len(uuids_)} process(es) started.",
+        )
     return HttpResponseRedirect(reverse("process_manager:index"))
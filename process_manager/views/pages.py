@@ -2,21 +2,60 @@
 
 import uuid
 
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import PermissionRequiredMixin
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.views.generic.edit import FormView
+from druncschema.process_manager_pb2 import ProcessInstance
 
-from ..forms import BootProcessForm
-from ..process_manager_interface import boot_process, get_process_logs
+from main.models import KafkaMessage, User
+
+from ..forms import BootProcessForm, BulkBootForm, LogSearchForm
+from ..jobs import submit_boot
+from ..logs import LogQuery, log_window
+from ..messages import message_sessions
+from ..poller import snapshot_rows
+from ..process_manager_interface import get_session_info, search_process_logs
 
 
 @login_required
 def index(request: HttpRequest) -> HttpResponse:
     """View that renders the index/home page."""
-    return render(request=request, template_name="process_manager/index.html")
+    context = dict(
+        sessions=message_sessions(),
+        severities=KafkaMessage.Severity.choices,
+        statuses=ProcessInstance.StatusCode.keys(),
+        session=request.GET.get("session", ""),
+    )
+    return render(
+        request=request, context=context, template_name="process_manager/index.html"
+    )
+
+
+@login_required
+def sessions(request: HttpRequest) -> HttpResponse:
+    """View that renders a summary of the processes in each session."""
+    return render(request=request, template_name="process_manager/sessions.html")
+
+
+@login_required
+def live_table(request: HttpRequest) -> HttpResponse:
+    """View that renders the process table in the browser.
+
+    The page fetches the process rows as JSON and then only the changes to them, and
+    renders just the rows scrolled into view, so that it stays responsive with many
+    thousands of processes.
+    """
+    context = dict(poll_interval=int(settings.PROCESS_POLL_INTERVAL * 1000))
+    return render(
+        request=request,
+        context=context,
+        template_name="process_manager/live_table.html",
+    )
 
 
 @login_required
@@ -24,20 +63,85 @@ def index(request: HttpRequest) -> HttpResponse:
 def logs(request: HttpRequest, uuid: uuid.UUID) -> HttpResponse:
     """Display the logs of a process.
 
+    The page itself holds no log lines. The last lines are streamed to it and followed
+    as they are written, and older lines can be loaded a page at a time.
+
     Args:
-      request: the triggering request.
+      request: the triggering request. The number of lines per page may be given as
+        the "lines" query parameter.
       uuid: identifier for the process.
 
     Returns:
       The rendered page.
     """
-    logs_response = get_process_logs(str(uuid))
-    context = dict(log_text="\n".join(val.data.line for val in logs_response))
+    context = dict(uuid=uuid, lines=log_window(request.GET))
     return render(
         request=request, context=context, template_name="process_manager/logs.html"
     )
 
 
+@login_required
+@permission_required("main.can_view_process_logs", raise_exception=True)
+def log_search(request: HttpRequest) -> HttpResponse:
+    """Search the recent logs of a whole session or of selected processes.
+
+    Args:
+      request: the triggering request, with the search in the query string.
+
+    Returns:
+      The rendered page with the search form, any matching lines and the errors
+      reading any logs that could not be searched.
+    """
+    rows = snapshot_rows(get_session_info())
+    form = LogSearchForm(
+        request.GET or None,
+        sessions=sorted({row.session for row in rows.values()}),
+        processes=[(uuid, f"{row.name} ({row.session})") for uuid, row in rows.items()],
+    )
+
+    results = []
+    errors = []
+    if form.is_valid():
+        data = form.cleaned_data
+        uuids = [
+            uuid
+            for uuid, row in rows.items()
+            if row.session == data["session"] or uuid in data["processes"]
+        ]
+        query = LogQuery(data["query"], data["regex"], data["level"] or 0)
+        matches, failed = search_process_logs(uuids, query)
+        results = [(rows[uuid], lines) for uuid, lines in matches.items()]
+        errors = [(rows[uuid], error) for uuid, error in failed.items()]
+
+    context = dict(form=form, results=results, errors=errors)
+    return render(
+        request=request,
+        context=context,
+        template_name="process_manager/log_search.html",
+    )
+
+
+@login_required
+@permission_required("main.can_view_process_logs", raise_exception=True)
+def merged_logs(request: HttpRequest) -> HttpResponse:
+    """Display the logs of several processes merged in the order they were written.
+
+    Args:
+      request: the triggering request. The processes are given by repeated "uuid"
+        query parameters and the number of lines from each by "lines".
+
+    Returns:
+      The rendered page, which loads the lines once shown.
+    """
+    uuids = request.GET.getlist("uuid")
+    context = dict(query=request.GET.urlencode(), count=len(uuids))
+    return render(
+        request=request,
+        context=context,
+        template_name="process_manager/merged_logs.html",
+    )
+
+
 class BootProcessView(PermissionRequiredMixin, FormView[BootProcessForm]):
     """View for the BootProcess form."""
 
@@ -47,7 +151,30 @@ class BootProcessView(PermissionRequiredMixin, FormView[BootProcessForm]):
     permission_required = "main.can_modify_processes"
 
     def form_valid(self, form: BootProcessForm) -> HttpResponse:
-        """Boot a Process when valid form data has been POSTed.
+        """Boot a Process in the background when valid form data has been POSTed.
+
+        Args:
+            form: the form instance that has been validated.
+
+        Returns:
+            A redirect to the index page.
+        """
+        user = self.request.user
+        submit_boot(user if isinstance(user, User) else None, [form.cleaned_data])
+        messages.info(self.request, "Boot started.")
+        return super().form_valid(form)
+
+
+class BulkBootView(PermissionRequiredMixin, FormView[BulkBootForm]):
+    """View for the BulkBoot form."""
+
+    template_name = "process_manager/bulk_boot.html"
+    form_class = BulkBootForm
+    success_url = reverse_lazy("process_manager:index")
+    permission_required = "main.can_modify_processes"
+
+    def form_valid(self, form: BulkBootForm) -> HttpResponse:
+        """Boot the sessions in the background when valid form data has been POSTed.
 
         Args:
             form: the form instance that has been validated.
@@ -55,5 +182,8 @@ class BootProcessView(PermissionRequiredMixin, FormView[BootProcessForm]):
         Returns:
             A redirect to the index page.
         """
-        boot_process("root", form.cleaned_data)
+        user = self.request.user
+        sessions = form.cleaned_data["boot"]
+        submit_boot(user if isinstance(user, User) else None, sessions)
+        messages.info(self.request, f"Boot of {len(sessions)} session(s) started.")
         return super().form_valid(form)
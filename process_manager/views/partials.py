@@ -1,76 +1,310 @@
 """View functions for partials."""
 
-import django_tables2
-from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.http import HttpRequest, HttpResponse
+import dataclasses
+import hashlib
+import uuid
+from collections.abc import Container, Iterable, Iterator
+from http import HTTPStatus
+from operator import attrgetter
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, permission_required
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    QueryDict,
+    StreamingHttpResponse,
+)
 from django.shortcuts import render
-from druncschema.process_manager_pb2 import (
-    ProcessInstance,
+from django.utils.http import parse_etags, quote_etag
+
+from main.models import User
+
+from ..forms import ProcessFilterForm
+from ..logs import (
+    drop_last,
+    format_lines,
+    format_merged_lines,
+    log_window,
+    merge_logs,
+)
+from ..messages import CURSOR_KEY, get_cursor, message_filters, messages_since
+from ..models import Job
+from ..poller import get_process_poller, snapshot_rows
+from ..process_manager_interface import (
+    gather_process_logs,
+    get_session_info,
+    iter_process_logs,
 )
+from ..tables import (
+    ProcessRow,
+    ProcessTable,
+    SessionTable,
+    configure_table,
+    filter_rows,
+)
+
+
+def _process_table(
+    rows: Iterable[ProcessRow], params: QueryDict, selected: Container[str]
+) -> ProcessTable:
+    """Create the process table showing the page of rows chosen by the parameters."""
+    form = ProcessFilterForm(params)
+    form.is_valid()
+    table = ProcessTable(filter_rows(rows, **form.cleaned_data), selected=selected)
+    configure_table(table, params)
+    return table
+
 
-from ..process_manager_interface import get_session_info
-from ..tables import ProcessTable
+def _shown(table: ProcessTable) -> list[str]:
+    """Get the UUIDs of the processes on the page of the table shown."""
+    return [row.record.uuid for row in table.paginated_rows]
+
+
+def _table_etag(version: str, params: QueryDict) -> str:
+    """Identify the content of the process table requested with the given parameters.
+
+    Args:
+        version: the version of the process rows.
+        params: the request parameters, i.e. the filters, sort order, page and
+            selection. Those holding what the client already shows are ignored.
+
+    Returns:
+        A hash of the version and parameters.
+    """
+    digest = hashlib.blake2b(version.encode(), digest_size=16)
+    for key, values in sorted(params.lists()):
+        if key not in ("csrfmiddlewaretoken", "etag", "shown"):
+            digest.update(repr((key, values)).encode())
+    return digest.hexdigest()
 
 
 @login_required
 def process_table(request: HttpRequest) -> HttpResponse:
-    """Renders the process table.
+    """Renders a page of the process table.
 
     This view may be called using either GET or POST methods. GET renders the table with
     no check boxes selected. POST renders the table with checked boxes for any table row
     with a uuid provided in the select key of the request data.
+
+    Rows are filtered by the session, user, status and name regular expression given in
+    the request data, then sorted by the "sort" column and only the "page" shown is
+    rendered.
+
+    The response carries an ETag identifying the processes and parameters shown. A GET
+    request whose If-None-Match header holds the ETag gets a 304 Not Modified response
+    and a POST request whose "etag" key holds it gets 204 No Content, which htmx does
+    not swap, so that the table is not rendered again when nothing has changed.
+    """
+    params = request.POST if request.method == "POST" else request.GET
+    version, rows = get_process_poller().current()
+    etag = _table_etag(version, params)
+    if request.method == "GET":
+        if quote_etag(etag) in parse_etags(request.headers.get("If-None-Match", "")):
+            return HttpResponseNotModified(headers=dict(ETag=quote_etag(etag)))
+    elif request.POST.get("etag") == etag:
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+    selected_rows = set(request.POST.getlist("select", []))
+    table = _process_table(rows.values(), params, selected_rows)
+
+    # If all rows shown are selected, we check the header box
+    # The value is irrelevant, we just need to set the attribute
+    shown = _shown(table)
+    if shown and all(uuid_ in selected_rows for uuid_ in shown):
+        table.columns["select"].attrs["th__input"]["checked"] = "checked"
+
+    response = render(
+        request=request,
+        context=dict(table=table, sort=params.get("sort", ""), shown=shown, etag=etag),
+        template_name="process_manager/partials/process_table.html",
+    )
+    response["ETag"] = quote_etag(etag)
+    return response
+
+
+@login_required
+def process_updates(request: HttpRequest) -> HttpResponse:
+    """Renders the process table rows that have changed since a given version.
+
+    Changed rows are rendered as out-of-band swaps so that only those rows are replaced
+    in the page, along with a replacement of the polling element carrying the new
+    version. If processes have been added or removed, or the rows on the page shown by
+    the client, given by the "shown" key of the request data, are no longer those that
+    the filters, sort order and page select, no rows are rendered and the client is
+    instead told to reload the whole table via the HX-Trigger header.
+
+    If nothing has changed since the given version the response is 204 No Content, so
+    that polls of an idle table cost next to nothing.
     """
-    selected_rows = request.POST.getlist("select", [])
-    session_info = get_session_info()
+    poller = get_process_poller()
+    client_version = request.POST.get("version", "")
+    changes = poller.changes_since(client_version)
+    if changes.version == client_version:
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
 
-    status_enum_lookup = dict(item[::-1] for item in ProcessInstance.StatusCode.items())
+    _, rows = poller.current()
+    shown = _shown(_process_table(rows.values(), request.POST, ()))
+    reload = changes.structural or shown != request.POST.getlist("shown")
 
     table_data = []
-    process_instances = session_info.data.values
-    for process_instance in process_instances:
-        metadata = process_instance.process_description.metadata
-        uuid = process_instance.uuid.uuid
-        table_data.append(
-            {
-                "uuid": uuid,
-                "name": metadata.name,
-                "user": metadata.user,
-                "session": metadata.session,
-                "status_code": status_enum_lookup[process_instance.status_code],
-                "exit_code": process_instance.return_code,
-                "checked": (uuid in selected_rows),
-            }
+    if not reload:
+        shown_rows = set(shown)
+        table_data = [row for row in changes.changed if row.uuid in shown_rows]
+    table = ProcessTable(table_data, selected=set(request.POST.getlist("select")))
+
+    response = render(
+        request=request,
+        context=dict(table=table, version=changes.version),
+        template_name="process_manager/partials/process_updates.html",
+    )
+    if reload:
+        response["HX-Trigger"] = "processes-changed"
+    return response
+
+
+_ROW_FIELDS = [field.name for field in dataclasses.fields(ProcessRow)]
+_row_values = attrgetter(*_ROW_FIELDS)
+
+
+@login_required
+def process_data(request: HttpRequest) -> HttpResponse:
+    """Returns the process table rows as JSON, for tables rendered in the browser.
+
+    Clients pass the version they last received in the "version" query parameter and
+    get only the rows that have been added or changed, and the UUIDs of the processes
+    removed, since. Clients without a version known to the poller get every row, with
+    "full" set to tell them to discard the rows they hold. Rows are sent as lists of
+    values in the order of "fields" to keep large responses small.
+
+    If nothing has changed since the given version the response is 204 No Content.
+    """
+    version = request.GET.get("version", "")
+    changes = get_process_poller().changes_since(version)
+    if changes.version == version:
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+    return JsonResponse(
+        dict(
+            version=changes.version,
+            full=changes.full,
+            fields=_ROW_FIELDS,
+            rows=[_row_values(row) for row in changes.added + changes.changed],
+            removed=changes.removed,
         )
-    table = ProcessTable(table_data)
+    )
 
-    # sort table data based on request parameters
-    table_configurator = django_tables2.RequestConfig(request)
-    table_configurator.configure(table)
 
-    # If all rows are selected, we check the header box
-    # The value is irrelevant, we just need to set the attribute
-    if len(selected_rows) == len(table_data):
-        table.columns["select"].attrs["th__input"]["checked"] = "checked"
+@login_required
+def session_summary(request: HttpRequest) -> HttpResponse:
+    """Renders the summary of each session.
+
+    The summaries are kept up to date by the poller so rendering them only depends on
+    the number of sessions. The page polls with the version it last received in the
+    "version" query parameter, and gets 204 No Content if nothing has changed since.
+    """
+    version, sessions = get_process_poller().current_sessions()
+    if request.GET.get("version") == version:
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
 
+    table = SessionTable(sorted(sessions.values(), key=attrgetter("session")))
     return render(
         request=request,
-        context=dict(table=table),
-        template_name="process_manager/partials/process_table.html",
+        context=dict(table=table, version=version),
+        template_name="process_manager/partials/session_summary.html",
     )
 
 
 @login_required
 def messages(request: HttpRequest) -> HttpResponse:
-    """Renders and pops Kafka messages from the user's session."""
-    with transaction.atomic():
-        # atomic to avoid race condition with kafka consumer
-        messages = request.session.load().get("messages", [])
-        request.session.pop("messages", [])
-        request.session.save()
+    """Renders Kafka messages that have not yet been shown to the user.
+
+    Messages can be filtered by the session and minimum severity given in the query
+    string.
+    """
+    filters = message_filters(request.GET)
+    messages = messages_since(get_cursor(request.session), **filters)
+    if messages:
+        request.session[CURSOR_KEY] = messages[-1].id
 
     return render(
         request=request,
         context=dict(messages=messages[::-1]),
         template_name="process_manager/partials/message_items.html",
     )
+
+
+@login_required
+@permission_required("main.can_view_process_logs", raise_exception=True)
+def log_lines(request: HttpRequest, uuid: uuid.UUID) -> StreamingHttpResponse:
+    """Streams a page of the log lines of a process.
+
+    Pages count back from the end of the log. The "skip" query parameter gives the
+    number of lines at the end of the log that are already shown and "lines" the
+    number of lines to show before them. Lines are sent as they are received from the
+    process manager rather than once the whole page has been read.
+    """
+    skip = request.GET.get("skip", "")
+    skip_lines = int(skip) if skip.isdigit() else 0
+    lines = iter_process_logs(str(uuid), skip_lines + log_window(request.GET))
+    return StreamingHttpResponse(format_lines(drop_last(lines, skip_lines)))
+
+
+@login_required
+@permission_required("main.can_view_process_logs", raise_exception=True)
+def merged_log_lines(request: HttpRequest) -> StreamingHttpResponse:
+    """Streams the logs of several processes merged by timestamp.
+
+    The logs of the processes given by repeated "uuid" query parameters are read
+    concurrently once the response has started, then merged and sent a line at a time.
+    The "lines" query parameter gives the number of lines read from the end of each
+    log. A line reporting the error is sent for each log that could not be read.
+    """
+    uuids = []
+    for value in dict.fromkeys(request.GET.getlist("uuid")):
+        try:
+            uuids.append(str(uuid.UUID(value)))
+        except ValueError:
+            continue
+
+    names = {
+        uuid_: row.name for uuid_, row in snapshot_rows(get_session_info()).items()
+    }
+    how_far = log_window(request.GET)
+
+    def lines() -> Iterator[tuple[str, str]]:
+        logs, errors = gather_process_logs(uuids, how_far)
+        for uuid_, error in errors.items():
+            yield names.get(uuid_, uuid_), f"Failed to read the log: {error}"
+        read = [uuid_ for uuid_ in uuids if uuid_ in logs]
+        for i, line in merge_logs([logs[uuid_] for uuid_ in read]):
+            yield names.get(read[i], read[i]), line
+
+    return StreamingHttpResponse(format_merged_lines(lines()))
+
+
+@login_required
+def jobs(request: HttpRequest) -> HttpResponse:
+    """Renders the progress of the user's most recent jobs.
+
+    The partial is polled while any of the jobs are running. Once all have finished the
+    response has the status code 286, which tells htmx to stop polling. Jobs that have
+    not finished within PROCESS_JOB_TIMEOUT, e.g. as their worker was restarted, are
+    marked as failed so that polling does not continue forever.
+    """
+    user = request.user if isinstance(request.user, User) else None
+    recent = list(Job.objects.filter(user=user)[: settings.PROCESS_JOBS_SHOWN])
+    if not all(job.is_finished for job in recent) and Job.expire(
+        settings.PROCESS_JOB_TIMEOUT
+    ):
+        recent = list(Job.objects.filter(user=user)[: settings.PROCESS_JOBS_SHOWN])
+    response = render(
+        request=request,
+        context=dict(jobs=recent),
+        template_name="process_manager/partials/jobs.html",
+    )
+    if all(job.is_finished for job in recent):
+        response.status_code = 286
+    return response
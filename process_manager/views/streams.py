@@ -0,0 +1,83 @@
+"""View functions for server-sent event streams."""
+
+import uuid
+
+from django.contrib.auth.decorators import login_required, permission_required
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpRequest, StreamingHttpResponse
+from django.template.loader import render_to_string
+
+from main.sse import event_stream, format_event
+
+from ..logs import format_lines, line_id, lines_after, log_window, new_lines
+from ..messages import CURSOR_KEY, get_cursor, message_filters, messages_since
+from ..process_manager_interface import iter_process_logs
+
+
+@login_required
+def messages(request: HttpRequest) -> StreamingHttpResponse:
+    """Streams new Kafka messages to the user as they arrive.
+
+    Each event carries the id of the last message it contains. Browsers send this back
+    when reconnecting so the stream resumes where it left off, otherwise it starts from
+    the cursor stored in the user's session. Only messages matching the session and
+    severity given in the query string are sent.
+    """
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    cursor = (
+        int(last_event_id) if last_event_id.isdigit() else get_cursor(request.session)
+    )
+    session_key = request.session.session_key
+    filters = message_filters(request.GET)
+
+    def poll() -> list[str]:
+        nonlocal cursor
+        if not (messages := messages_since(cursor, **filters)):
+            return []
+
+        cursor = messages[-1].id
+        store = SessionStore(session_key=session_key)
+        store[CURSOR_KEY] = cursor
+        store.save()
+
+        html = render_to_string(
+            "process_manager/partials/message_items.html",
+            context=dict(messages=messages[::-1]),
+        )
+        return [format_event(html, event="messages", id=str(cursor))]
+
+    return event_stream(request, poll)
+
+
+@login_required
+@permission_required("main.can_view_process_logs", raise_exception=True)
+def logs(request: HttpRequest, uuid: uuid.UUID) -> StreamingHttpResponse:
+    """Streams the last lines of the logs of a process and follows new lines.
+
+    The stream starts with the last lines of the log, the number given by the "lines"
+    query parameter. The log is then read again on each poll and any new lines sent.
+    Each event carries the identifier of its last line so that reconnecting browsers
+    resume after it. The same identifier may be given as the "after" query parameter
+    to resume a stream that was closed deliberately.
+    """
+    window = log_window(request.GET)
+    last_id = request.headers.get("Last-Event-ID") or request.GET.get("after", "")
+    previous: list[str] | None = None
+
+    def poll() -> list[str]:
+        nonlocal previous
+        current = list(iter_process_logs(str(uuid), window))
+        if previous is not None:
+            lines = new_lines(previous, current)
+        elif last_id:
+            lines = lines_after(current, last_id)
+        else:
+            lines = current
+        previous = current
+
+        if not lines:
+            return []
+        html = "".join(format_lines(lines))
+        return [format_event(html, event="lines", id=line_id(lines[-1]))]
+
+    return event_stream(request, poll)
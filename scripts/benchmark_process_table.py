@@ -0,0 +1,133 @@
+"""Micro-benchmark of rendering the process table for a large number of processes.
+
+This is intended to be run within docker from the `app` service, i.e.:
+
+```
+docker compose exec app python scripts/benchmark_process_table.py --processes 10000
+```
+
+It does not need a running process manager. A snapshot of the given number of
+processes is made up, all of them selected, and each stage of rendering a page of the
+process table timed, along with the process_table view as a whole. The best time of
+each stage over the repeats is reported.
+
+The form data selecting the processes is parsed once, without the usual limit of
+DATA_UPLOAD_MAX_NUMBER_FIELDS, as thousands of fields are posted.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "drunc_ui.settings")
+
+import django
+
+django.setup()
+
+from django.template.loader import render_to_string  # noqa: E402
+from django.test import RequestFactory, override_settings  # noqa: E402
+from druncschema.process_manager_pb2 import (  # noqa: E402
+    ProcessDescription,
+    ProcessInstance,
+    ProcessInstanceList,
+    ProcessMetadata,
+    ProcessUUID,
+)
+
+from main.models import User  # noqa: E402
+from process_manager.poller import ProcessPoller, snapshot_rows  # noqa: E402
+from process_manager.tables import (  # noqa: E402
+    ProcessTable,
+    configure_table,
+    filter_rows,
+)
+from process_manager.views.partials import process_table  # noqa: E402
+
+
+def make_session_info(n_processes: int) -> SimpleNamespace:
+    """Make up a ps response for processes spread over sessions of 10 processes."""
+    values = []
+    for i in range(n_processes):
+        uuid_ = str(uuid.uuid4())
+        metadata = ProcessMetadata(
+            name=f"process-{i}", user="root", session=f"session-{i // 10}"
+        )
+        values.append(
+            ProcessInstance(
+                process_description=ProcessDescription(metadata=metadata),
+                status_code=ProcessInstance.StatusCode.RUNNING,
+                return_code=0,
+                uuid=ProcessUUID(uuid=uuid_),
+            )
+        )
+    return SimpleNamespace(data=ProcessInstanceList(values=values))
+
+
+def best(stage: Callable[[], object], repeat: int) -> float:
+    """Get the shortest time in milliseconds taken by a stage over the repeats."""
+    return min(timeit.repeat(stage, number=1, repeat=repeat)) * 1000
+
+
+def main(n_processes: int, repeat: int) -> None:
+    """Run the benchmark."""
+    session_info = make_session_info(n_processes)
+    rows = snapshot_rows(session_info)
+    selected = set(rows)
+    params = dict(sort="-name", page="2")
+    request = RequestFactory().post("/", dict(params, select=list(selected)))
+    with override_settings(DATA_UPLOAD_MAX_NUMBER_FIELDS=None):
+        # the parsed form data is kept by the request for the view to reuse
+        request.POST
+    request.user = User(username="benchmark")
+
+    def page() -> ProcessTable:
+        table = ProcessTable(filter_rows(rows.values()), selected=selected)
+        configure_table(table, params)
+        return table
+
+    def render() -> str:
+        return render_to_string(
+            "process_manager/partials/process_table.html",
+            context=dict(table=table, sort=params["sort"], shown=[], etag=""),
+            request=request,
+        )
+
+    poller = ProcessPoller(lambda: session_info)
+    poller.poll()
+
+    def view() -> object:
+        with patch(
+            "process_manager.views.partials.get_process_poller", return_value=poller
+        ):
+            return process_table(request)
+
+    table = page()
+    stages: dict[str, Callable[[], object]] = {
+        "convert new snapshot": lambda: snapshot_rows(
+            SimpleNamespace(data=session_info.data)
+        ),
+        "convert cached snapshot": lambda: snapshot_rows(session_info),
+        "filter, sort and paginate": page,
+        "render page": render,
+        "process_table view": view,
+    }
+
+    print(f"{n_processes} processes, best of {repeat}:")
+    for name, stage in stages.items():
+        print(f"  {name:<28}{best(stage, repeat):8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.processes, args.repeat)
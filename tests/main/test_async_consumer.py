@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from asgiref.sync import sync_to_async
+
+from main.async_consumer import ConsumerOptions, consume
+from main.broker import InMemoryBroker
+from main.models import KafkaMessage
+
+from .test_ingest import make_payload
+
+
+@pytest.mark.asyncio
+async def test_in_memory_broker_timeout():
+    """Test that waiting for records times out with no records."""
+    subscription = InMemoryBroker().subscribe("topic")
+    assert await subscription.getmany(timeout_ms=10, max_records=10) == []
+
+
+async def wait_for_messages(count):
+    """Wait until the given number of messages have been stored."""
+    for _ in range(100):
+        if await sync_to_async(KafkaMessage.objects.count)() >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_consume():
+    """Test multiple patterns are consumed concurrently and shut down cleanly."""
+    broker = InMemoryBroker()
+    stop = asyncio.Event()
+    consumer = asyncio.create_task(
+        consume(
+            broker,
+            [r"control\..*\.process_manager", r"control\..*\.controller"],
+            stop,
+            ConsumerOptions(timeout_ms=10),
+        )
+    )
+
+    await broker.publish("control.sess.process_manager", make_payload("pm 1"))
+    await broker.publish("control.sess.controller", make_payload("controller"))
+    await broker.publish("other.topic", make_payload("ignored"))
+    await broker.publish("control.sess.process_manager", make_payload("pm 2"))
+    await wait_for_messages(3)
+
+    stop.set()
+    await asyncio.wait_for(consumer, 5)
+
+    bodies = await sync_to_async(
+        lambda: set(KafkaMessage.objects.values_list("body", flat=True))
+    )()
+    assert bodies == {"pm 1", "pm 2", "controller"}
+
+    process_manager, controller = broker.subscriptions
+    assert process_manager.committed == {"control.sess.process_manager": 2}
+    assert controller.committed == {"control.sess.controller": 1}
+    assert process_manager.closed and controller.closed
@@ -0,0 +1,23 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from main.models import KafkaMessage
+
+from ..utils import make_messages
+
+
+@pytest.mark.django_db
+def test_compact_messages(settings):
+    """Test the compact_messages command applies the retention limits."""
+    settings.KAFKA_MESSAGE_RETENTION_COUNT = 2
+    make_messages(["a", "b", "c"])
+
+    out = StringIO()
+    call_command("compact_messages", stdout=out)
+    assert "Deleted 1 messages." in out.getvalue()
+    assert KafkaMessage.objects.count() == 2
+
+    call_command("compact_messages", max_count=1, stdout=out)
+    assert KafkaMessage.objects.count() == 1
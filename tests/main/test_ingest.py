@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock
+
+import pytest
+from druncschema.broadcast_pb2 import BroadcastMessage, BroadcastType
+from prometheus_client import REGISTRY
+
+from main.ingest import store_records, to_message
+from main.models import KafkaMessage
+
+
+def make_payload(text, message_type="TEXT_MESSAGE"):
+    """Create a serialised BroadcastMessage holding some text."""
+    bm = BroadcastMessage()
+    bm.emitter.process = "process_manager"
+    bm.emitter.session = "test-session"
+    bm.type = BroadcastType.Value(message_type)
+    bm.data.value = text.encode("utf-8")
+    return bm.SerializeToString()
+
+
+def make_record(text, offset=0, topic="control.test.process_manager", partition=0):
+    """Create a Kafka record like object holding a BroadcastMessage."""
+    record = MagicMock()
+    record.topic = topic
+    record.partition = partition
+    record.offset = offset
+    record.timestamp = 1_700_000_000_000
+    record.value = make_payload(text)
+    return record
+
+
+def test_to_message():
+    """Test a record is decoded to an unsaved message."""
+    message = to_message(make_record("hello", offset=3))
+    assert message.body == "hello"
+    assert message.offset == 3
+    assert message.timestamp.timestamp() == 1_700_000_000
+    assert message.emitter == "process_manager"
+    assert message.session == "test-session"
+    assert message.message_type == "TEXT_MESSAGE"
+    assert message.severity == KafkaMessage.Severity.INFO
+    assert message.pk is None
+
+
+@pytest.mark.parametrize(
+    "message_type,severity",
+    [
+        ("DEBUG", KafkaMessage.Severity.DEBUG),
+        ("EXCEPTION_RAISED", KafkaMessage.Severity.ERROR),
+        ("UNHANDLED_EXCEPTION_RAISED", KafkaMessage.Severity.ERROR),
+    ],
+)
+def test_to_message_severity(message_type, severity):
+    """Test the severity of a message is derived from its type."""
+    record = make_record("hello")
+    record.value = make_payload("hello", message_type)
+    assert to_message(record).severity == severity
+
+
+def test_to_message_invalid():
+    """Test records that are not BroadcastMessages are skipped."""
+    record = make_record("hello")
+    record.value = b"\x0a\xff"
+    assert to_message(record) is None
+
+
+@pytest.mark.django_db
+def test_store_records():
+    """Test records are stored once, even if delivered more than once."""
+    records = [make_record("a", offset=0), make_record("b", offset=1)]
+    assert store_records(records) == 2
+    store_records(records[1:] + [make_record("c", offset=2)])
+    assert list(KafkaMessage.objects.values_list("body", flat=True)) == ["a", "b", "c"]
+
+
+@pytest.mark.django_db
+def test_store_records_metrics():
+    """Test the messages received and batches written are recorded."""
+    topic = "control.metrics.process_manager"
+
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(f"drunc_ui_kafka_{name}", labels) or 0
+
+    messages = sample("messages_total", topic=topic)
+    undecodable = sample("undecodable_messages_total")
+    batches = sample("batch_size_count")
+
+    invalid = make_record("b", offset=1, topic=topic)
+    invalid.value = b"\x0a\xff"
+    store_records([make_record("a", topic=topic), invalid])
+
+    assert sample("messages_total", topic=topic) == messages + 2
+    assert sample("undecodable_messages_total") == undecodable + 1
+    assert sample("batch_size_count") == batches + 1
@@ -0,0 +1,53 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from main.models import KafkaMessage
+
+from .test_ingest import make_record
+
+
+@pytest.mark.django_db
+def test_kafka_consumer(mocker):
+    """Test polled records are stored before offsets are committed."""
+    consumer_class = mocker.patch(
+        "main.management.commands.kafka_consumer.KafkaConsumer"
+    )
+    consumer = consumer_class.return_value
+    consumer.poll.side_effect = [
+        {"partition 0": [make_record("a", 0)], "partition 1": [make_record("b", 1)]},
+        {},
+        KeyboardInterrupt,
+    ]
+    consumer.commit.side_effect = lambda: assert_stored(2)
+
+    call_command("kafka_consumer", max_poll_records=10, stdout=StringIO())
+
+    assert consumer_class.call_args.kwargs["enable_auto_commit"] is False
+    assert consumer_class.call_args.kwargs["max_poll_records"] == 10
+    consumer.commit.assert_called_once()
+    consumer.close.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_kafka_consumer_linger(mocker):
+    """Test records are accumulated over polls and written on shutdown."""
+    consumer = mocker.patch(
+        "main.management.commands.kafka_consumer.KafkaConsumer"
+    ).return_value
+    consumer.poll.side_effect = [
+        {"partition 0": [make_record("a", 0)]},
+        {"partition 0": [make_record("b", 1)]},
+        KeyboardInterrupt,
+    ]
+
+    call_command("kafka_consumer", linger=60_000, stdout=StringIO())
+
+    assert_stored(2)
+    consumer.commit.assert_called_once()
+
+
+def assert_stored(count):
+    """Check the number of stored messages."""
+    assert KafkaMessage.objects.count() == count
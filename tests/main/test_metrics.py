@@ -0,0 +1,34 @@
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
+
+from main.metrics import get_registry, timed
+
+
+def test_get_registry(monkeypatch):
+    """Test the metrics of this process are exposed by default."""
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    assert get_registry() is REGISTRY
+
+
+def test_get_registry_multiprocess(monkeypatch, tmp_path):
+    """Test the metrics of all processes are exposed with a multiprocess directory."""
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    registry = get_registry()
+    assert registry is not REGISTRY
+    assert list(registry.collect()) == []
+
+
+def test_timed():
+    """Test calls are timed and errors counted by function name."""
+    registry = CollectorRegistry()
+    histogram = Histogram("seconds", "Time.", ["function"], registry=registry)
+    errors = Counter("errors_total", "Errors.", ["function"], registry=registry)
+
+    @timed(histogram, errors)
+    def fail(message):
+        raise RuntimeError(message)
+
+    with pytest.raises(RuntimeError, match="bad"):
+        fail("bad")
+    assert registry.get_sample_value("seconds_count", {"function": "fail"}) == 1
+    assert registry.get_sample_value("errors_total", {"function": "fail"}) == 1
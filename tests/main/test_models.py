@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from main.models import KafkaMessage
+
+from ..utils import make_messages
+
+
+@pytest.mark.django_db
+class TestKafkaMessage:
+    """Tests for the KafkaMessage model."""
+
+    def test_latest_id(self):
+        """Test the id of the most recent message is returned."""
+        assert KafkaMessage.latest_id() == 0
+        messages = make_messages(["a", "b"])
+        assert KafkaMessage.latest_id() == messages[-1].id
+
+    def test_compact_max_count(self):
+        """Test only the most recent messages of each topic are kept."""
+        make_messages(["a1", "a2", "a3"], topic="a")
+        make_messages(["b1"], topic="b")
+
+        assert KafkaMessage.compact(max_count=2) == 1
+        assert set(KafkaMessage.objects.values_list("body", flat=True)) == {
+            "a2",
+            "a3",
+            "b1",
+        }
+
+    def test_compact_max_age(self):
+        """Test messages older than the maximum age are deleted."""
+        old, new = make_messages(["old", "new"])
+        old.timestamp = timezone.now() - timedelta(hours=2)
+        old.save()
+
+        assert KafkaMessage.compact(max_age=timedelta(hours=1)) == 1
+        assert list(KafkaMessage.objects.all()) == [new]
+
+    def test_compact_no_limits(self):
+        """Test nothing is deleted without limits."""
+        make_messages(["a", "b"])
+        assert KafkaMessage.compact() == 0
+        assert KafkaMessage.objects.count() == 2
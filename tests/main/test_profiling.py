@@ -0,0 +1,122 @@
+import sqlite3
+from cProfile import Profile
+from http import HTTPStatus
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.urls import reverse
+
+from main.middleware import ProfilingMiddleware
+from main.models import RequestProfile
+from main.profiling import breakdown, summarise
+
+
+def query():
+    """Make a query to an in-memory database."""
+    sqlite3.connect(":memory:").execute("SELECT 1")
+
+
+def test_breakdown():
+    """Test time is broken down by the area of code it was spent in."""
+    profile = Profile()
+    profile.runcall(query)
+    assert list(breakdown(profile)) == ["database"]
+    assert "query" in summarise(profile, 5)
+
+
+def requested(rf, user, path="/"):
+    """Create a request from a user asking for it to be profiled."""
+    request = rf.get(path, headers={"X-Profile": "1"})
+    request.user = user
+    return request
+
+
+@pytest.fixture
+def middleware(settings):
+    """Provide an enabled profiling middleware recording every profile."""
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_THRESHOLD = 0
+    return ProfilingMiddleware(lambda request: HttpResponse())
+
+
+def test_disabled(settings):
+    """Test the middleware is not used unless enabled."""
+    settings.PROFILING_ENABLED = False
+    with pytest.raises(MiddlewareNotUsed):
+        ProfilingMiddleware(lambda request: HttpResponse())
+
+
+@pytest.mark.django_db
+def test_header(middleware, rf, admin_user):
+    """Test requests with the profiling header are profiled and recorded."""
+    middleware(requested(rf, admin_user, "/path/?page=2"))
+
+    profile = RequestProfile.objects.get()
+    assert profile.path == "/path/?page=2"
+    assert profile.user == admin_user
+    assert profile.status == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_header_not_staff(middleware, rf, django_user_model):
+    """Test the profiling header is ignored for users who are not staff."""
+    user = django_user_model.objects.create_user(username="user")
+    middleware(requested(rf, user))
+    middleware(rf.get("/", headers={"X-Profile": "1"}))
+    assert not RequestProfile.objects.exists()
+
+
+@pytest.mark.django_db
+def test_concurrent(settings, rf, admin_user):
+    """Test requests arriving while another is profiled are handled unprofiled."""
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_THRESHOLD = 0
+    inner = ProfilingMiddleware(lambda request: HttpResponse())
+
+    def view(request):
+        assert inner(requested(rf, admin_user)).status_code == HTTPStatus.OK
+        return HttpResponse()
+
+    ProfilingMiddleware(view)(requested(rf, admin_user))
+    assert RequestProfile.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_sampling(middleware, rf, settings):
+    """Test only the sampled fraction of requests without the header is profiled."""
+    middleware(rf.get("/"))
+    assert not RequestProfile.objects.exists()
+
+    settings.PROFILING_SAMPLE_RATE = 1
+    middleware(rf.get("/"))
+    assert RequestProfile.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_threshold(middleware, rf, settings):
+    """Test only the profiles of slow requests are recorded."""
+    settings.PROFILING_THRESHOLD = 60
+    settings.PROFILING_SAMPLE_RATE = 1
+    middleware(rf.get("/"))
+    assert not RequestProfile.objects.exists()
+
+
+@pytest.mark.django_db
+def test_prune(middleware, rf, settings, admin_user):
+    """Test only the most recent profiles are kept."""
+    settings.PROFILING_KEEP = 2
+    for path in ("/a", "/b", "/c"):
+        middleware(requested(rf, admin_user, path))
+    assert [p.path for p in RequestProfile.objects.all()] == ["/c", "/b"]
+
+
+@pytest.mark.django_db
+def test_admin(admin_client, middleware, rf, admin_user):
+    """Test recorded profiles can be viewed in the admin site."""
+    middleware(requested(rf, admin_user, "/path"))
+    profile = RequestProfile.objects.get()
+    url = reverse("admin:main_requestprofile_change", args=[profile.pk])
+    response = admin_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert profile.stats.splitlines()[0].encode() in response.content
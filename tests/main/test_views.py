@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from django.urls import reverse
+from prometheus_client import CONTENT_TYPE_LATEST
 from pytest_django.asserts import assertContains, assertNotContains, assertTemplateUsed
 
 from ..utils import LoginRequiredTest
@@ -46,3 +47,25 @@ class TestIndexView(LoginRequiredTest):
         assertTemplateUsed(response, "main/help.html")
         assertContains(response, "<h1>Help</h1>")
         assertContains(response, "This is the help page.")
+
+
+class TestMetricsView:
+    """Tests for the metrics view."""
+
+    endpoint = reverse("main:metrics")
+
+    def test_metrics(self, client):
+        """Test metrics, including those of earlier requests, are exposed."""
+        client.get(reverse("main:help"))
+        response = client.get(self.endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assert response["Content-Type"] == CONTENT_TYPE_LATEST
+        assertContains(response, "# TYPE drunc_ui_request_duration_seconds histogram")
+        assertContains(response, 'view="main:help"')
+
+    def test_metrics_token(self, client, settings):
+        """Test the metrics can require a bearer token."""
+        settings.METRICS_TOKEN = "secret"
+        assert client.get(self.endpoint).status_code == HTTPStatus.UNAUTHORIZED
+        response = client.get(self.endpoint, headers={"Authorization": "Bearer secret"})
+        assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from process_manager.event_loop import get_event_loop, iterate, run_coroutine
+
+
+async def _current_loop():
+    return asyncio.get_running_loop()
+
+
+def test_run_coroutine_shared_loop():
+    """Test that coroutines all run on the same long-lived loop."""
+    first = run_coroutine(_current_loop())
+    second = run_coroutine(_current_loop())
+    assert first is second is get_event_loop()
+    assert first.is_running()
+
+
+def test_run_coroutine_exception():
+    """Test that exceptions raised by the coroutine are propagated."""
+
+    async def fail():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError, match="failed"):
+        run_coroutine(fail())
+
+
+def test_run_coroutine_timeout():
+    """Test that slow coroutines time out."""
+    with pytest.raises(TimeoutError):
+        run_coroutine(asyncio.sleep(1), timeout=0.01)
+
+
+def test_run_coroutine_from_loop():
+    """Test that calling from the loop thread is refused rather than deadlocking."""
+
+    async def nested():
+        return run_coroutine(_current_loop())
+
+    with pytest.raises(RuntimeError):
+        run_coroutine(nested())
+
+
+def test_iterate():
+    """Test that async generators are iterated on the loop and closed when stopped."""
+    closed = []
+
+    async def numbers():
+        try:
+            for i in range(3):
+                assert asyncio.get_running_loop() is get_event_loop()
+                yield i
+        finally:
+            closed.append(True)
+
+    assert list(iterate(numbers())) == [0, 1, 2]
+    assert closed == [True]
+
+    items = iterate(numbers())
+    assert next(items) == 0
+    items.close()
+    assert closed == [True, True]
@@ -1,6 +1,13 @@
+import pytest
 from django import forms
+from django.http import QueryDict
 
-from process_manager.forms import BootProcessForm
+from process_manager.forms import (
+    BootProcessForm,
+    BulkBootForm,
+    LogSearchForm,
+    ProcessFilterForm,
+)
 
 
 def test_boot_form_empty():
@@ -30,3 +37,82 @@ def test_boot_form_with_data(dummy_session_data):
     assert form.cleaned_data["n_processes"] == 1
     assert form.cleaned_data["sleep"] == 5
     assert form.cleaned_data["n_sleeps"] == 4
+
+
+def make_bulk_boot_form(**data):
+    """Create a BulkBootForm with the given data and default process settings."""
+    return BulkBootForm(data=dict(dict(n_processes=2, sleep=5, n_sleeps=4), **data))
+
+
+def test_bulk_boot_form():
+    """Test sessions are booted from both a list and a template."""
+    form = make_bulk_boot_form(
+        sessions="one\n\ntwo 5\n", name_prefix="load", n_sessions=2
+    )
+    assert form.is_valid(), form.errors
+    assert form.cleaned_data["boot"] == [
+        dict(session_name="one", n_processes=2, sleep=5, n_sleeps=4),
+        dict(session_name="two", n_processes=5, sleep=5, n_sleeps=4),
+        dict(session_name="load-1", n_processes=2, sleep=5, n_sleeps=4),
+        dict(session_name="load-2", n_processes=2, sleep=5, n_sleeps=4),
+    ]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        dict(),
+        dict(sessions="one two"),
+        dict(sessions="one 0"),
+        dict(sessions="one\none"),
+        dict(sessions="load-1", name_prefix="load"),
+        dict(n_sessions=2),
+        dict(name_prefix="load", n_sessions=501),
+    ],
+)
+def test_bulk_boot_form_invalid(data):
+    """Test invalid or too many sessions are rejected."""
+    assert not make_bulk_boot_form(**data).is_valid()
+
+
+def test_process_filter_form():
+    """Test the name filter must be a valid regular expression."""
+    form = ProcessFilterForm(QueryDict("session=s&name=^a.*"))
+    assert form.is_valid()
+    assert form.cleaned_data == dict(session="s", user="", status="", name="^a.*")
+
+    form = ProcessFilterForm(QueryDict("name=("))
+    assert not form.is_valid()
+    assert "name" in form.errors
+
+
+def make_log_search_form(query):
+    """Create a LogSearchForm with one session of two processes."""
+    return LogSearchForm(
+        QueryDict(query),
+        sessions=["session"],
+        processes=[("uuid1", "process 1"), ("uuid2", "process 2")],
+    )
+
+
+def test_log_search_form():
+    """Test the LogSearchForm."""
+    form = make_log_search_form("query=error&processes=uuid1&processes=uuid2&level=40")
+    assert form.is_valid()
+    assert form.cleaned_data["processes"] == ["uuid1", "uuid2"]
+    assert form.cleaned_data["level"] == 40
+
+    assert make_log_search_form("session=session").is_valid()
+
+
+def test_log_search_form_invalid():
+    """Test the LogSearchForm rejects invalid searches."""
+    form = make_log_search_form("query=error")
+    assert not form.is_valid()
+    assert form.non_field_errors()
+
+    form = make_log_search_form("query=(&regex=on&session=session")
+    assert not form.is_valid()
+    assert "query" in form.errors
+
+    assert not make_log_search_form("session=other").is_valid()
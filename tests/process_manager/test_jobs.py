@@ -0,0 +1,155 @@
+import pytest
+
+from process_manager.jobs import (
+    run_job,
+    submit_action,
+    submit_boot,
+    submit_query_action,
+)
+from process_manager.models import Job
+from process_manager.poller import ProcessPoller
+from process_manager.process_manager_interface import ActionResult, ProcessAction
+
+from .test_poller import make_session_info
+
+
+@pytest.mark.django_db
+class TestJobs:
+    """Tests for running jobs in the background."""
+
+    def test_submit_action(
+        self, admin_user, mocker, django_capture_on_commit_callbacks
+    ):
+        """Test a job is recorded and started once committed."""
+        executor = mocker.patch("process_manager.jobs.get_executor")
+        with django_capture_on_commit_callbacks(execute=True):
+            job = submit_action(admin_user, ["a", "b"], ProcessAction.KILL)
+
+        assert job.status == Job.Status.PENDING
+        assert job.total == 2
+        assert job.arguments == dict(uuids=["a", "b"])
+        executor().submit.assert_called_once_with(run_job, job.id)
+
+    def test_run_action(self, admin_user, mocker, settings):
+        """Test actions are made in batches and the results of each recorded."""
+        settings.PROCESS_JOB_BATCH_SIZE = 2
+        mock = mocker.patch(
+            "process_manager.jobs.process_call",
+            side_effect=lambda uuids, action: ActionResult(
+                action,
+                succeeded=[u for u in uuids if u != "bad"],
+                failed={u: "error" for u in uuids if u == "bad"},
+            ),
+        )
+        job = submit_action(admin_user, ["a", "bad", "c"], ProcessAction.RESTART)
+        run_job(job.id)
+
+        assert [call.args[0] for call in mock.call_args_list] == [["a", "bad"], ["c"]]
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.results == dict(a="", bad="error", c="")
+        assert job.failures == dict(bad="error")
+        assert job.finished is not None
+
+    def test_run_boot(self, admin_user, mocker, dummy_session_data):
+        """Test sessions are booted together and the result of each recorded."""
+        saved = []
+
+        def boot_processes(user, sessions, on_booted):
+            for s in sessions:
+                on_booted(
+                    s["session_name"], "error" if s["session_name"] == "c" else ""
+                )
+                saved.append(dict(Job.objects.get(id=job.id).results))
+
+        mock = mocker.patch(
+            "process_manager.jobs.boot_processes", side_effect=boot_processes
+        )
+        sessions = [dict(dummy_session_data, session_name=name) for name in "abc"]
+        job = submit_boot(admin_user, sessions)
+        assert job.total == 3
+        run_job(job.id)
+
+        mock.assert_called_once_with("root", sessions, mocker.ANY)
+        assert saved[0] == dict(a="")
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.results == dict(a="", b="", c="error")
+
+    @pytest.fixture
+    def poller(self, mocker):
+        """Mock the worker's poller with a running and a dead process."""
+        poller = ProcessPoller(lambda: make_session_info({"a": 0, "b": 1}))
+        poller.poll()
+        mocker.patch("process_manager.jobs.get_process_poller", return_value=poller)
+        return poller
+
+    def test_run_kill(self, admin_user, mocker, settings):
+        """Test kills are a single call however many processes they are for."""
+        settings.PROCESS_JOB_BATCH_SIZE = 2
+        mock = mocker.patch(
+            "process_manager.jobs.process_call",
+            return_value=ActionResult(ProcessAction.KILL, succeeded=["a", "b", "c"]),
+        )
+        job = submit_action(admin_user, ["a", "b", "c"], ProcessAction.KILL)
+        run_job(job.id)
+
+        mock.assert_called_once_with(["a", "b", "c"], ProcessAction.KILL)
+        job.refresh_from_db()
+        assert job.results == dict(a="", b="", c="")
+
+    def test_run_query(self, admin_user, mocker, poller, settings):
+        """Test the processes matching the filters are acted on by UUID."""
+        settings.PROCESS_JOB_BATCH_SIZE = 1
+        mock = mocker.patch(
+            "process_manager.jobs.process_call",
+            return_value=ActionResult(
+                ProcessAction.FLUSH, succeeded=["a"], failed=dict(b="unavailable")
+            ),
+        )
+        filters = dict(session="session", user="", status="", name="")
+        job = submit_query_action(admin_user, filters, ProcessAction.FLUSH)
+        run_job(job.id)
+
+        mock.assert_called_once_with(["a", "b"], ProcessAction.FLUSH)
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.total == 2
+        assert job.results == dict(a="", b="unavailable")
+
+    def test_run_query_status(self, admin_user, mocker, poller):
+        """Test processes are selected by status from the poller's rows."""
+        mock = mocker.patch(
+            "process_manager.jobs.process_call",
+            return_value=ActionResult(ProcessAction.KILL, succeeded=["b"]),
+        )
+        filters = dict(session="", user="", status="DEAD", name="")
+        job = submit_query_action(admin_user, filters, ProcessAction.KILL)
+        assert job.total == 1
+        run_job(job.id)
+
+        mock.assert_called_once_with(["b"], ProcessAction.KILL)
+
+    def test_run_query_other_session(self, admin_user, mocker, poller):
+        """Test processes outside the session are not acted on."""
+        mock = mocker.patch("process_manager.jobs.process_call")
+        filters = dict(session="other", user="", status="", name="")
+        job = submit_query_action(admin_user, filters, ProcessAction.KILL)
+        run_job(job.id)
+
+        mock.assert_not_called()
+        job.refresh_from_db()
+        assert job.status == Job.Status.SUCCEEDED
+        assert job.total == 0
+
+    def test_run_error(self, admin_user, mocker):
+        """Test a job that fails as a whole records the error."""
+        mocker.patch(
+            "process_manager.jobs.process_call", side_effect=TimeoutError("timed out")
+        )
+        job = submit_action(admin_user, ["a"], ProcessAction.FLUSH)
+        run_job(job.id)
+
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.error == "timed out"
@@ -0,0 +1,162 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from process_manager.log_cache import LogCache
+
+
+@pytest.fixture
+def log():
+    """A log, as a list of lines, to be read by the cache."""
+    return [f"line {i}" for i in range(10)]
+
+
+@pytest.fixture
+def fetch(log):
+    """Mock reading the given number of lines from the end of the log."""
+    return MagicMock(side_effect=lambda uuid, how_far: log[-how_far:])
+
+
+def test_get_reuses_lines(fetch):
+    """Test that lines are reused until they expire."""
+    cache = LogCache(fetch, capacity=100, max_processes=10, ttl=60)
+    assert cache.get("uuid", 5) == [f"line {i}" for i in range(5, 10)]
+    assert cache.get("uuid", 3) == ["line 7", "line 8", "line 9"]
+    fetch.assert_called_once_with("uuid", 5)
+
+
+def test_get_more_lines(fetch):
+    """Test that the log is read again if more lines are wanted than held."""
+    cache = LogCache(fetch, capacity=100, max_processes=10, ttl=60)
+    cache.get("uuid", 2)
+    assert len(cache.get("uuid", 5)) == 5
+    fetch.assert_called_with("uuid", 5)
+
+
+def test_get_whole_log(fetch, log):
+    """Test that a short log is not read again for more lines than it has."""
+    cache = LogCache(fetch, capacity=100, max_processes=10, ttl=60)
+    assert cache.get("uuid", 20) == log
+    assert cache.get("uuid", 30) == log
+    fetch.assert_called_once()
+
+
+def test_get_new_lines(fetch, log):
+    """Test that only the end of the log is read once expired."""
+    cache = LogCache(fetch, capacity=100, max_processes=10, ttl=0, increment=3)
+    cache.get("uuid", 5)
+    log.extend(["new 1", "new 2"])
+    assert cache.get("uuid", 5) == ["line 7", "line 8", "line 9", "new 1", "new 2"]
+    fetch.assert_called_with("uuid", 3)
+
+
+def test_get_many_new_lines(fetch, log):
+    """Test that more of the log is read if its end does not overlap the lines held."""
+    cache = LogCache(fetch, capacity=100, max_processes=10, ttl=0, increment=2)
+    cache.get("uuid", 5)
+    log.extend(f"new {i}" for i in range(5))
+    assert cache.get("uuid", 5) == [f"new {i}" for i in range(5)]
+    assert [call.args[1] for call in fetch.call_args_list] == [5, 2, 4, 8]
+
+
+def test_capacity(fetch):
+    """Test that no more lines than the capacity are held or may be requested."""
+    cache = LogCache(fetch, capacity=4, max_processes=10, ttl=60)
+    assert len(cache.get("uuid", 4)) == 4
+    with pytest.raises(ValueError):
+        cache.get("uuid", 5)
+
+
+def test_least_recently_used_evicted(fetch):
+    """Test that the least recently viewed process is dropped from the cache."""
+    cache = LogCache(fetch, capacity=100, max_processes=2, ttl=60)
+    cache.get("a", 1)
+    cache.get("b", 1)
+    cache.get("a", 1)
+    cache.get("c", 1)
+    assert fetch.call_count == 3
+
+    cache.get("a", 1)
+    assert fetch.call_count == 3
+    cache.get("b", 1)
+    assert fetch.call_count == 4
+
+
+def test_get_containing(fetch, log):
+    """Test only the lines containing the strings are returned."""
+    cache = LogCache(fetch, capacity=100, max_processes=10, ttl=60)
+    log.append("LINE 10 error")
+    assert cache.get("uuid", 11, containing=["line 1"]) == ["line 1", "LINE 10 error"]
+    assert cache.get("uuid", 1, containing=["line 1"]) == ["LINE 10 error"]
+    assert cache.get("uuid", 11, containing=["e 1", "error"]) == ["LINE 10 error"]
+    assert cache.get("uuid", 11, containing=["missing"]) == []
+
+
+def test_get_containing_after_wrapping(fetch, log):
+    """Test the index follows the lines held as older ones are dropped."""
+    cache = LogCache(fetch, capacity=4, max_processes=10, ttl=0, increment=2)
+    cache.get("uuid", 4)
+    for i in range(10, 20):
+        log.append(f"line {i}")
+        assert cache.get("uuid", 4, containing=["line"]) == log[-4:]
+    assert cache.get("uuid", 4, containing=["line 1"]) == log[-4:]
+    assert cache.get("uuid", 4, containing=["line 9"]) == []
+
+
+def test_index_built_when_searched(fetch):
+    """Test lines are only indexed once they are first searched."""
+    cache = LogCache(fetch, capacity=100, max_processes=10, ttl=60)
+    cache.get("uuid", 5)
+    assert cache._entries["uuid"].index is None
+    assert cache.get("uuid", 5, containing=["line 9"]) == ["line 9"]
+    assert cache._entries["uuid"].index is not None
+
+
+def test_get_many(fetch, log):
+    """Test the logs that are not held or have expired are read together."""
+    fetch_many = MagicMock(
+        side_effect=lambda uuids, how_far: (
+            {uuid: log[-how_far:] for uuid in uuids},
+            {},
+        )
+    )
+    cache = LogCache(
+        fetch, capacity=100, max_processes=10, ttl=60, fetch_many=fetch_many
+    )
+    cache.get("a", 5)
+    assert cache.get_many(["a", "b", "c"], 5) == (dict.fromkeys("abc", log[-5:]), {})
+    fetch_many.assert_called_once_with(["b", "c"], 5)
+    fetch.assert_called_once()
+
+    cache.ttl = 0
+    log.append("new")
+    assert cache.get_many(["a", "b"], 2, containing=["new"]) == (
+        dict(a=["new"], b=["new"]),
+        {},
+    )
+    fetch_many.assert_called_with(["a", "b"], cache.increment)
+    fetch.assert_called_once()
+
+
+def test_get_many_errors(fetch, log):
+    """Test logs that cannot be read are reported without reading them again."""
+    fetch_many = MagicMock(
+        return_value=(dict(a=log[-2:]), dict(b="not found")),
+    )
+    cache = LogCache(
+        fetch, capacity=100, max_processes=10, ttl=60, fetch_many=fetch_many
+    )
+    assert cache.get_many(["a", "b"], 2) == (dict(a=log[-2:]), dict(b="not found"))
+    fetch.assert_not_called()
+
+
+def test_get_many_errors_without_fetch_many(log):
+    """Test logs read one at a time that cannot be read are reported."""
+
+    def fetch(uuid, how_far):
+        if uuid == "b":
+            raise RuntimeError("not found")
+        return log[-how_far:]
+
+    cache = LogCache(fetch, capacity=100, max_processes=10, ttl=60)
+    assert cache.get_many(["a", "b"], 2) == (dict(a=log[-2:]), dict(b="not found"))
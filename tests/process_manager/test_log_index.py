@@ -0,0 +1,64 @@
+import re
+
+import pytest
+
+from process_manager.log_index import TrigramIndex, required_literals, trigrams
+
+
+def test_trigrams():
+    """Test trigrams are found ignoring case."""
+    assert trigrams("AbCd") == {"abc", "bcd"}
+    assert trigrams("ab") == set()
+
+
+@pytest.mark.parametrize(
+    "pattern,expected",
+    [
+        ("error", ["error"]),
+        (r"conn\.refused", ["conn.refused"]),
+        (r"time ?out", ["time", "out"]),
+        (r"ab+c", ["ab", "c"]),
+        (r"x{2}yz", ["yz"]),
+        (r"fail\d+ed", ["fail", "ed"]),
+        (r"[abc]def", ["def"]),
+        (r"[]a]bc", ["bc"]),
+        (r"[^]]x", ["x"]),
+        (r"[^\]]yz", ["yz"]),
+        (r"(foo)bar", ["bar"]),
+        (r"\x41bc", ["bc"]),
+        (r"\u0041bc", ["bc"]),
+        (r"\U00000041bc", ["bc"]),
+        (r"\N{LATIN CAPITAL LETTER A}bc", ["bc"]),
+        (r"\101bc", ["bc"]),
+        (r"(a)\1bc", ["bc"]),
+        (r"foo|bar", []),
+        (r"^start.*end$", ["start", "end"]),
+    ],
+)
+def test_required_literals(pattern, expected):
+    """Test literals that all matches must contain are found."""
+    assert required_literals(pattern) == expected
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [r"time ?out", r"x{2}yz", r"fail\d+ed", r"\x41bc", r"\101bc", r"(a)\1bc"],
+)
+def test_required_literals_in_matches(pattern):
+    """Test that the literals found are contained in example matches."""
+    for text in ("timeout", "time out", "xxyz", "fail42ed", "Abc", "aabc"):
+        if re.search(pattern, text):
+            assert all(literal in text for literal in required_literals(pattern))
+
+
+def test_index_candidates():
+    """Test lines containing all trigrams of the strings are found."""
+    index = TrigramIndex()
+    for number, line in enumerate(["Connection refused", "all good", "refusing"]):
+        index.add(number, line)
+
+    assert index.candidates(["REFUS"]) == {0, 2}
+    assert index.candidates(["refused", "conn"]) == {0}
+    assert index.candidates(["missing"]) == set()
+    assert index.candidates(["ab"]) is None
+    assert index.size == 3
@@ -0,0 +1,138 @@
+import pytest
+from django.http import QueryDict
+
+from process_manager.logs import (
+    MAX_LINES,
+    LogQuery,
+    drop_last,
+    format_lines,
+    format_merged_lines,
+    line_id,
+    line_level,
+    line_timestamp,
+    lines_after,
+    log_window,
+    merge_logs,
+    new_lines,
+)
+
+
+@pytest.mark.parametrize(
+    "query,expected",
+    [("", 100), ("lines=20", 20), ("lines=0", 100), ("lines=x", 100)],
+)
+def test_log_window(query, expected, settings):
+    """Test the number of lines is read from the query string."""
+    settings.PROCESS_LOG_LINES = 100
+    assert log_window(QueryDict(query)) == expected
+
+
+def test_log_window_limit():
+    """Test the number of lines is limited."""
+    assert log_window(QueryDict(f"lines={MAX_LINES + 1}")) == MAX_LINES
+
+
+def test_lines_after():
+    """Test lines are resumed after the last one seen."""
+    lines = ["a", "b", "c"]
+    assert lines_after(lines, line_id("b")) == ["c"]
+    assert lines_after(lines, line_id("c")) == []
+    assert lines_after(lines, line_id("missing")) == lines
+
+
+@pytest.mark.parametrize(
+    "previous,current,expected",
+    [
+        (["a", "b", "c"], ["b", "c", "d", "e"], ["d", "e"]),
+        (["a", "b", "c"], ["a", "b", "c"], []),
+        (["a", "b"], ["x", "y"], ["x", "y"]),
+        ([], ["a"], ["a"]),
+        (["a", "a"], ["a", "a", "b"], ["b"]),
+    ],
+)
+def test_new_lines(previous, current, expected):
+    """Test lines added since the log was last read are found."""
+    assert new_lines(previous, current) == expected
+
+
+def test_drop_last():
+    """Test the last lines are dropped while earlier ones are passed on."""
+    assert list(drop_last(iter("abcde"), 2)) == ["a", "b", "c"]
+    assert list(drop_last(iter("ab"), 3)) == []
+    assert list(drop_last(iter("ab"), 0)) == ["a", "b"]
+
+
+def test_format_lines():
+    """Test lines are rendered with their content escaped."""
+    assert list(format_lines(["<b>"])) == ['<div class="log-line">&lt;b&gt;</div>\n']
+
+
+@pytest.mark.parametrize(
+    "line,level",
+    [
+        ("2024-01-01 12:00:00 ERROR something failed", 40),
+        ("[WARNING] low disk", 30),
+        ("INFORMATION only", None),
+        ("no level", None),
+    ],
+)
+def test_line_level(line, level):
+    """Test the level of a line is found from the level name it contains."""
+    assert line_level(line) == level
+
+
+def test_log_query_text():
+    """Test plain text is matched ignoring case."""
+    query = LogQuery("a.b")
+    assert query.matches("xA.By")
+    assert not query.matches("axb")
+    assert query.literals() == ["a.b"]
+
+
+def test_log_query_regex():
+    """Test regular expressions are matched."""
+    query = LogQuery(r"fail\w+", regex=True)
+    assert query.matches("FAILED")
+    assert not query.matches("fail")
+    assert query.literals() == ["fail"]
+
+
+def test_log_query_level():
+    """Test lines below the minimum level, or without a level, are not matched."""
+    query = LogQuery(min_level=30)
+    assert query.matches("ERROR x")
+    assert not query.matches("INFO x")
+    assert not query.matches("x")
+
+
+@pytest.mark.parametrize(
+    "line,timestamp",
+    [
+        ("2024-01-02 03:04:05,678 INFO x", "2024-01-02T03:04:05.678000"),
+        ("[2024-01-02T03:04:05.123456789]", "2024-01-02T03:04:05.123456"),
+        ("at 2024-01-02 03:04:05", "2024-01-02T03:04:05.000000"),
+        ("no time", None),
+    ],
+)
+def test_line_timestamp(line, timestamp):
+    """Test timestamps are found in sortable form."""
+    assert line_timestamp(line) == timestamp
+
+
+def test_merge_logs():
+    """Test logs are merged by timestamp, keeping untimed lines in place."""
+    first = ["2024-01-01 00:00:01 a1", "traceback", "2024-01-01 00:00:03 a2"]
+    second = ["2024-01-01 00:00:02 b1", "2024-01-01 00:00:04 b2"]
+    assert list(merge_logs([first, second])) == [
+        (0, "2024-01-01 00:00:01 a1"),
+        (0, "traceback"),
+        (1, "2024-01-01 00:00:02 b1"),
+        (0, "2024-01-01 00:00:03 a2"),
+        (1, "2024-01-01 00:00:04 b2"),
+    ]
+
+
+def test_format_merged_lines():
+    """Test lines are rendered with the name of their process."""
+    (html,) = format_merged_lines([("<p>", "line")])
+    assert "&lt;p&gt;</span> line" in html
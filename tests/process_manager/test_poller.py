@@ -0,0 +1,157 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from process_manager.poller import ProcessPoller, diff_rows, snapshot_rows
+from process_manager.tables import ProcessRow
+
+
+def make_session_info(statuses, sessions=None):
+    """Create ProcessInstanceList like data from a mapping of UUID to status code.
+
+    Processes are in the session given by the optional mapping of UUID to session, or
+    "session" otherwise.
+    """
+    sessions = sessions or {}
+    session_info = MagicMock()
+    instance_mocks = []
+    for uuid, status_code in statuses.items():
+        instance_mock = MagicMock()
+        instance_mock.uuid.uuid = uuid
+        metadata = instance_mock.process_description.metadata
+        metadata.name = "process"
+        metadata.user = "root"
+        metadata.session = sessions.get(uuid, "session")
+        instance_mock.status_code = status_code
+        instance_mock.return_code = 0
+        instance_mocks.append(instance_mock)
+    session_info.data.values.__iter__.return_value = instance_mocks
+    return session_info
+
+
+def make_row(uuid, status_code="RUNNING"):
+    """Create a minimal table row."""
+    return ProcessRow(uuid, "name", "user", "session", status_code, 0)
+
+
+def test_snapshot_rows():
+    """Test rows are converted once per snapshot."""
+    session_info = make_session_info({"a": 0, "b": 1})
+    rows = snapshot_rows(session_info)
+    assert list(rows) == ["a", "b"]
+    assert rows["a"].status_code == "RUNNING"
+    assert rows["b"].status_code == "DEAD"
+    assert snapshot_rows(session_info) is rows
+    assert snapshot_rows(make_session_info({"a": 0, "b": 1})) is not rows
+
+
+def test_diff_rows():
+    """Test that rows are compared by UUID."""
+    old = {"a": make_row("a"), "b": make_row("b"), "c": make_row("c")}
+    new = {"a": make_row("a"), "b": make_row("b", "DEAD"), "d": make_row("d")}
+    change = diff_rows(old, new)
+    assert change.added == {"d"}
+    assert change.changed == {"b"}
+    assert change.removed == {"c"}
+
+    assert diff_rows(new, dict(new)) is None
+
+
+class TestProcessPoller:
+    """Tests for the ProcessPoller class."""
+
+    @pytest.fixture
+    def poller(self):
+        """A poller whose process states can be set via its statuses attribute."""
+        poller = ProcessPoller(lambda: make_session_info(poller.statuses))
+        poller.statuses = {}
+        return poller
+
+    def test_poll(self, poller):
+        """Test that the version only changes when the rows do."""
+        initial = poller.version
+        poller.statuses = {"a": 0}
+        assert poller.poll()
+        assert poller.version != initial
+        assert list(poller.rows) == ["a"]
+
+        version = poller.version
+        assert not poller.poll()
+        assert poller.version == version
+
+    def test_sessions(self, poller):
+        """Test that session summaries are kept up to date with the rows."""
+        poller.statuses = {"a": 0, "b": 1}
+        poller.poll()
+        version, sessions = poller.current_sessions()
+        assert version == poller.version
+        assert sum(summary.processes for summary in sessions.values()) == 2
+
+        poller.statuses = {"a": 0}
+        poller.poll()
+        _, sessions = poller.current_sessions()
+        assert [summary.statuses for summary in sessions.values()] == [{"RUNNING": 1}]
+
+    def test_changes_since_unknown_version(self, poller):
+        """Test that clients with an unrecognised version get all rows."""
+        poller.statuses = {"a": 0, "b": 0}
+        poller.poll()
+        changes = poller.changes_since("")
+        assert changes.full
+        assert changes.structural
+        assert {row.uuid for row in changes.added} == {"a", "b"}
+        assert changes.version == poller.version
+
+    def test_changes_since(self, poller):
+        """Test that only rows changed since the given version are returned."""
+        poller.statuses = {"a": 0, "b": 0, "c": 0}
+        poller.poll()
+        version = poller.version
+        assert not poller.changes_since(version).structural
+
+        poller.statuses = {"a": 0, "b": 1, "c": 0}
+        poller.poll()
+        poller.statuses = {"a": 0, "b": 1, "d": 0}
+        poller.poll()
+
+        changes = poller.changes_since(version)
+        assert not changes.full
+        assert [row.uuid for row in changes.changed] == ["b"]
+        assert [row.uuid for row in changes.added] == ["d"]
+        assert changes.removed == ["c"]
+
+    def test_changes_since_history_exceeded(self):
+        """Test that clients too far behind get all rows."""
+        statuses = {"a": 0}
+        poller = ProcessPoller(lambda: make_session_info(statuses), history=1)
+        poller.poll()
+        version = poller.version
+        for status_code in (1, 0):
+            statuses["a"] = status_code
+            poller.poll()
+        assert poller.changes_since(version).full
+
+
+def test_poller_idle():
+    """Test background polling stops when the poller is not read and then resumes."""
+    fetch = MagicMock(return_value=make_session_info({"a": 0}))
+    poller = ProcessPoller(fetch, interval=0.01, idle_timeout=0.05)
+    assert fetch.call_count == 0
+
+    version, rows = poller.current()
+    assert list(rows) == ["a"]
+    assert fetch.call_count >= 1
+
+    deadline = time.monotonic() + 5
+    while poller._polling and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not poller._polling
+
+    calls = fetch.call_count
+    time.sleep(0.05)
+    assert fetch.call_count == calls
+
+    poller.changes_since(version)
+    assert fetch.call_count == calls + 1
+    assert poller._polling
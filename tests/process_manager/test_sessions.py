@@ -0,0 +1,46 @@
+from process_manager.sessions import update_summaries
+from process_manager.tables import ProcessRow, SessionTable
+
+
+def make_row(uuid, session, status_code="RUNNING", exit_code=0):
+    """Create a table row for a process in a session."""
+    return ProcessRow(uuid, "name", "user", session, status_code, exit_code)
+
+
+def test_update_summaries():
+    """Test summaries are updated for the processes that change."""
+    old = {
+        "a": make_row("a", "one"),
+        "b": make_row("b", "one"),
+        "c": make_row("c", "two"),
+    }
+    summaries = update_summaries({}, {}, old, old)
+    assert summaries["one"].processes == 2
+    assert summaries["one"].statuses == {"RUNNING": 2}
+    assert summaries["two"].processes == 1
+
+    new = {
+        "a": make_row("a", "one"),
+        "b": make_row("b", "one", "DEAD", 1),
+        "d": make_row("d", "three"),
+    }
+    updated = update_summaries(summaries, old, new, ["b", "c", "d"])
+    assert set(updated) == {"one", "three"}
+    assert updated["one"].statuses == {"RUNNING": 1, "DEAD": 1}
+    assert updated["one"].exit_codes == {0: 1, 1: 1}
+    assert updated["one"].failed == 1
+    assert updated["three"].processes == 1
+
+    # the summaries given are left as they were
+    assert summaries["one"].statuses == {"RUNNING": 2}
+    assert "two" in summaries
+
+
+def test_session_table_render():
+    """Test counts are rendered as badges, showing only non-zero exit codes."""
+    table = SessionTable([])
+    statuses = table.render_statuses({"RUNNING": 2, "DEAD": 1})
+    assert statuses.index("DEAD 1") < statuses.index("RUNNING 2")
+    assert "text-bg-danger" in statuses
+    assert table.render_exit_codes({0: 3}) == ""
+    assert "1: 2" in table.render_exit_codes({0: 1, 1: 2})
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+from druncschema.process_manager_pb2 import ProcessInstance, ProcessInstanceList
+
+from process_manager.snapshot import SnapshotCache
+
+
+def test_get_reuses_snapshot():
+    """Test that a snapshot is reused until it expires."""
+    fetch = MagicMock(side_effect=lambda: ProcessInstanceList())
+    cache = SnapshotCache(fetch, ttl=60)
+    assert cache.get() is cache.get()
+    fetch.assert_called_once()
+
+
+def test_get_expired():
+    """Test that a new snapshot is fetched once the ttl has passed."""
+    fetch = MagicMock(side_effect=lambda: ProcessInstanceList())
+    cache = SnapshotCache(fetch, ttl=0)
+    assert cache.get() is not cache.get()
+    assert fetch.call_count == 2
+
+
+def test_invalidate():
+    """Test that invalidating the cache forces a new fetch."""
+    fetch = MagicMock(side_effect=lambda: ProcessInstanceList())
+    cache = SnapshotCache(fetch, ttl=60)
+    cache.get()
+    cache.invalidate()
+    cache.get()
+    assert fetch.call_count == 2
+
+
+def test_invalidate_during_fetch():
+    """Test that a snapshot fetched while the cache is invalidated is not kept."""
+    snapshots = [ProcessInstanceList(), ProcessInstanceList()]
+
+    def fetch():
+        if fetch_mock.call_count == 1:
+            cache.invalidate()
+        return snapshots[fetch_mock.call_count - 1]
+
+    fetch_mock = MagicMock(side_effect=fetch)
+    cache = SnapshotCache(fetch_mock, ttl=60)
+    assert cache.get() is snapshots[0]
+    assert cache.get() is snapshots[1]
+    assert cache.get() is snapshots[1]
+    assert fetch_mock.call_count == 2
+
+
+def test_get_coalesces_concurrent_calls():
+    """Test that concurrent cache misses result in a single fetch."""
+    release = threading.Event()
+    snapshot = ProcessInstanceList()
+
+    def fetch():
+        release.wait(5)
+        return snapshot
+
+    fetch_mock = MagicMock(side_effect=fetch)
+    cache = SnapshotCache(fetch_mock, ttl=60)
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(cache.get) for _ in range(5)]
+        release.set()
+        results = [future.result() for future in futures]
+
+    fetch_mock.assert_called_once()
+    assert all(result is snapshot for result in results)
+
+
+def test_get_error():
+    """Test that errors are raised and the next call tries again."""
+    fetch = MagicMock(side_effect=[RuntimeError("unavailable"), ProcessInstanceList()])
+    cache = SnapshotCache(fetch, ttl=60)
+    with pytest.raises(RuntimeError):
+        cache.get()
+    cache.get()
+    assert fetch.call_count == 2
+
+
+def test_shared_cache(settings):
+    """Test that snapshots are shared between instances through a Django cache."""
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    snapshot = ProcessInstanceList(
+        values=[ProcessInstance(status_code=ProcessInstance.StatusCode.RUNNING)]
+    )
+    fetch = MagicMock(return_value=snapshot)
+
+    first = SnapshotCache(fetch, ttl=60, cache_alias="default")
+    second = SnapshotCache(fetch, ttl=60, cache_alias="default")
+    assert first.get() == snapshot
+    assert second.get() == snapshot
+    fetch.assert_called_once()
+
+    second.invalidate()
+    first.invalidate()
+    first.get()
+    assert fetch.call_count == 2
@@ -0,0 +1,82 @@
+import pytest
+
+from process_manager.tables import (
+    ProcessRow,
+    ProcessTable,
+    configure_table,
+    filter_rows,
+)
+
+
+def make_rows(n):
+    """Create table rows for n processes in two sessions."""
+    return [
+        ProcessRow(
+            uuid=f"uuid-{i}",
+            name=f"process-{i}",
+            user="root" if i % 3 else "other",
+            session=f"session-{i % 2}",
+            status_code="RUNNING" if i % 4 else "DEAD",
+            exit_code=0,
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize(
+    "filters,expected",
+    [
+        (dict(), list(range(8))),
+        (dict(session="session-1"), [1, 3, 5, 7]),
+        (dict(user="other"), [0, 3, 6]),
+        (dict(status="DEAD"), [0, 4]),
+        (dict(name="-[12]$"), [1, 2]),
+        (dict(session="session-0", status="RUNNING"), [2, 6]),
+    ],
+)
+def test_filter_rows(filters, expected):
+    """Test rows are selected by every filter given."""
+    rows = filter_rows(make_rows(8), **filters)
+    assert [row.uuid for row in rows] == [f"uuid-{i}" for i in expected]
+
+
+@pytest.mark.parametrize(
+    "params,expected",
+    [
+        (dict(), ["uuid-0", "uuid-1", "uuid-2"]),
+        (dict(page="2"), ["uuid-3", "uuid-4", "uuid-5"]),
+        (dict(page="9"), ["uuid-6"]),
+        (dict(page="0"), ["uuid-0", "uuid-1", "uuid-2"]),
+        (dict(sort="-name", page="1"), ["uuid-6", "uuid-5", "uuid-4"]),
+    ],
+)
+def test_configure_table(params, expected, settings):
+    """Test the table is sorted and only the page requested is shown."""
+    settings.PROCESS_TABLE_PAGE_SIZE = 3
+    table = ProcessTable(make_rows(7))
+    configure_table(table, params)
+    assert [row.record.uuid for row in table.paginated_rows] == expected
+
+
+def test_sort_by_several_columns():
+    """Test rows are sorted by each column in order of significance."""
+    table = ProcessTable(make_rows(6))
+    table.order_by = ("-session", "user", "-name")
+    assert [row.record.uuid for row in table.rows] == [
+        "uuid-3",
+        "uuid-5",
+        "uuid-1",
+        "uuid-0",
+        "uuid-4",
+        "uuid-2",
+    ]
+
+
+def test_selected():
+    """Test the rows of the selected processes are checked."""
+    table = ProcessTable(make_rows(3), selected={"uuid-1"})
+    assert ["checked" in row.get_cell("select") for row in table.rows] == [
+        False,
+        True,
+        False,
+    ]
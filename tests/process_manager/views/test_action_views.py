@@ -2,6 +2,7 @@ from http import HTTPStatus
 from uuid import uuid4
 
 import pytest
+from django.contrib.messages import get_messages
 from django.urls import reverse
 
 from process_manager.views.actions import ProcessAction
@@ -31,12 +32,44 @@ class TestProcessActionView(PermissionRequiredTest):
     @pytest.mark.parametrize("action", ["kill", "restart", "flush"])
     def test_valid_action(self, action, auth_process_client, mocker):
         """Test process_action view with a valid action."""
-        mock = mocker.patch("process_manager.views.actions.process_call")
         uuids_ = [str(uuid4()), str(uuid4())]
+        mock = mocker.patch("process_manager.views.actions.submit_action")
         response = auth_process_client.post(
             self.endpoint, data={"action": action, "select": uuids_}
         )
         assert response.status_code == HTTPStatus.FOUND
         assert response.url == reverse("process_manager:index")
 
-        mock.assert_called_once_with(uuids_, ProcessAction(action))
+        mock.assert_called_once_with(
+            response.wsgi_request.user, uuids_, ProcessAction(action)
+        )
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        assert messages == [f"{action.capitalize()} of 2 process(es) started."]
+
+    def test_matching_action(self, auth_process_client, mocker):
+        """Test actions on the processes matching filters are resolved by query."""
+        mock = mocker.patch("process_manager.views.actions.submit_query_action")
+        response = auth_process_client.post(
+            self.endpoint,
+            data={"action": "kill", "scope": "matching", "session": "session"},
+        )
+        assert response.status_code == HTTPStatus.FOUND
+
+        mock.assert_called_once_with(
+            response.wsgi_request.user,
+            dict(session="session", user="", status="", name=""),
+            ProcessAction.KILL,
+        )
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        assert messages == ["Kill of matching processes started."]
+
+    @pytest.mark.parametrize("filters", [{}, {"name": "("}])
+    def test_matching_action_invalid(self, filters, auth_process_client, mocker):
+        """Test actions are not made without valid filters."""
+        mock = mocker.patch("process_manager.views.actions.submit_query_action")
+        response = auth_process_client.post(
+            self.endpoint, data=dict(filters, action="kill", scope="matching")
+        )
+        mock.assert_not_called()
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        assert messages == ["Choose valid filters for the processes to act on."]
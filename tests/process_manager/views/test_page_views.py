@@ -1,10 +1,12 @@
 from http import HTTPStatus
 from uuid import uuid4
 
+import pytest
 from django.urls import reverse
 from pytest_django.asserts import assertContains, assertTemplateUsed
 
-from ...utils import LoginRequiredTest, PermissionRequiredTest
+from ...utils import LoginRequiredTest, PermissionRequiredTest, make_messages
+from ..test_poller import make_session_info
 
 
 class TestIndexView(LoginRequiredTest):
@@ -18,6 +20,40 @@ class TestIndexView(LoginRequiredTest):
             response = auth_client.get(self.endpoint)
         assert response.status_code == HTTPStatus.OK
 
+    def test_message_sessions(self, auth_client):
+        """Test the sessions that have sent messages are offered as filters."""
+        make_messages(["a", "b"], session="b")
+        make_messages(["c"], session="a")
+        make_messages(["no session"])
+        response = auth_client.get(self.endpoint)
+        assert response.context["sessions"] == ["a", "b"]
+
+
+class TestSessionsView(LoginRequiredTest):
+    """Test the process_manager.views.pages.sessions view function."""
+
+    endpoint = reverse("process_manager:sessions")
+
+    def test_get(self, auth_client):
+        """Tests the page loads the session summary."""
+        with assertTemplateUsed(template_name="process_manager/sessions.html"):
+            response = auth_client.get(self.endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assertContains(response, reverse("process_manager:session_summary"))
+
+
+class TestLiveTableView(LoginRequiredTest):
+    """Test the process_manager.views.pages.live_table view function."""
+
+    endpoint = reverse("process_manager:live_table")
+
+    def test_get(self, auth_client):
+        """Tests the page polls for process data."""
+        with assertTemplateUsed(template_name="process_manager/live_table.html"):
+            response = auth_client.get(self.endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assertContains(response, reverse("process_manager:process_data"))
+
 
 class TestLogsView(PermissionRequiredTest):
     """Tests for the logs view."""
@@ -25,15 +61,81 @@ class TestLogsView(PermissionRequiredTest):
     uuid = uuid4()
     endpoint = reverse("process_manager:logs", kwargs=dict(uuid=uuid))
 
-    def test_get(self, auth_logs_client, mocker):
+    def test_get(self, auth_logs_client):
         """Test the logs view for a privileged user."""
-        mock = mocker.patch("process_manager.views.pages.get_process_logs")
         with assertTemplateUsed(template_name="process_manager/logs.html"):
+            response = auth_logs_client.get(self.endpoint, dict(lines="20"))
+        assert response.status_code == HTTPStatus.OK
+
+        assert response.context["uuid"] == self.uuid
+        assert response.context["lines"] == 20
+        assertContains(
+            response,
+            reverse("process_manager:log_stream", kwargs=dict(uuid=self.uuid)),
+        )
+
+
+class TestLogSearchView(PermissionRequiredTest):
+    """Tests for the log_search view."""
+
+    endpoint = reverse("process_manager:log_search")
+
+    @pytest.fixture(autouse=True)
+    def uuids(self, mocker):
+        """Mock the process manager to return two sessions of processes."""
+        uuids = [str(uuid4()) for _ in range(3)]
+        session_info = make_session_info(
+            dict.fromkeys(uuids, 0), sessions=dict(zip(uuids, ("s1", "s1", "s2")))
+        )
+        for process in session_info.data.values:
+            process.process_description.metadata.name = f"process {process.uuid.uuid}"
+        mocker.patch(
+            "process_manager.views.pages.get_session_info", return_value=session_info
+        )
+        return uuids
+
+    def test_get(self, auth_logs_client, mocker):
+        """Test the search form is shown without searching."""
+        mock = mocker.patch("process_manager.views.pages.search_process_logs")
+        with assertTemplateUsed(template_name="process_manager/log_search.html"):
             response = auth_logs_client.get(self.endpoint)
         assert response.status_code == HTTPStatus.OK
+        assert response.context["results"] == []
+        mock.assert_not_called()
+
+    def test_search(self, auth_logs_client, mocker, uuids):
+        """Test the processes of a session and those selected are searched."""
+        mock = mocker.patch(
+            "process_manager.views.pages.search_process_logs",
+            return_value=({uuids[0]: ["ERROR failed"]}, {uuids[2]: "not found"}),
+        )
+        response = auth_logs_client.get(
+            self.endpoint,
+            dict(query="failed", session="s2", processes=uuids[0], level=40),
+        )
+
+        searched, query = mock.call_args.args
+        assert searched == [uuids[0], uuids[2]]
+        assert query.text == "failed"
+        assert query.min_level == 40
+        assertContains(response, "ERROR failed")
+        assertContains(response, f"process {uuids[0]}")
+        assertContains(response, f"process {uuids[2]}</a> (s2): not found")
+
+
+class TestMergedLogsView(PermissionRequiredTest):
+    """Tests for the merged_logs view."""
 
-        mock.assert_called_once_with(str(self.uuid))
-        assert "log_text" in response.context
+    endpoint = reverse("process_manager:merged_logs")
+
+    def test_get(self, auth_logs_client):
+        """Test the page loads the merged lines of the selected processes."""
+        with assertTemplateUsed(template_name="process_manager/merged_logs.html"):
+            response = auth_logs_client.get(self.endpoint, dict(uuid=["a", "b"]))
+        assert response.status_code == HTTPStatus.OK
+        assertContains(
+            response, reverse("process_manager:merged_log_lines") + "?uuid=a&amp;uuid=b"
+        )
 
 
 class TestBootProcess(PermissionRequiredTest):
@@ -65,7 +167,7 @@ class TestBootProcess(PermissionRequiredTest):
 
     def test_post_valid(self, auth_process_client, mocker, dummy_session_data):
         """Test the POST request for the BootProcess view."""
-        mock = mocker.patch("process_manager.views.pages.boot_process")
+        mock = mocker.patch("process_manager.views.pages.submit_boot")
         response = auth_process_client.post(
             reverse("process_manager:boot_process"), data=dummy_session_data
         )
@@ -73,4 +175,37 @@ class TestBootProcess(PermissionRequiredTest):
 
         assert response.url == reverse("process_manager:index")
 
-        mock.assert_called_once_with("root", dummy_session_data)
+        mock.assert_called_once_with(response.wsgi_request.user, [dummy_session_data])
+
+
+class TestBulkBoot(PermissionRequiredTest):
+    """Grouping the tests for the BulkBoot view."""
+
+    template_name = "process_manager/bulk_boot.html"
+    endpoint = reverse("process_manager:bulk_boot")
+
+    def test_get_privileged(self, auth_process_client):
+        """Test the GET request for the BulkBoot view (privileged)."""
+        with assertTemplateUsed(template_name=self.template_name):
+            response = auth_process_client.get(self.endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assertContains(response, f'form action="{self.endpoint}"')
+
+    def test_post_invalid(self, auth_process_client):
+        """Test the POST request for the BulkBoot view with invalid data."""
+        with assertTemplateUsed(template_name=self.template_name):
+            response = auth_process_client.post(self.endpoint, data=dict())
+        assert response.status_code == HTTPStatus.OK
+
+    def test_post_valid(self, auth_process_client, mocker):
+        """Test the POST request for the BulkBoot view."""
+        mock = mocker.patch("process_manager.views.pages.submit_boot")
+        data = dict(
+            name_prefix="load", n_sessions=3, n_processes=2, sleep=5, n_sleeps=4
+        )
+        response = auth_process_client.post(self.endpoint, data=data, follow=True)
+        assertContains(response, "Boot of 3 session(s) started.")
+
+        user, sessions = mock.call_args.args
+        assert user == response.wsgi_request.user
+        assert [s["session_name"] for s in sessions] == ["load-1", "load-2", "load-3"]
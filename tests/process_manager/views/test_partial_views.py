@@ -1,14 +1,18 @@
+from datetime import timedelta
 from http import HTTPStatus
-from unittest.mock import MagicMock
 from uuid import uuid4
 
 import pytest
 from django.urls import reverse
-from pytest_django.asserts import assertTemplateUsed
+from django.utils import timezone
+from pytest_django.asserts import assertContains, assertTemplateUsed
 
+from process_manager.models import Job
+from process_manager.poller import ProcessPoller
 from process_manager.tables import ProcessTable
 
-from ...utils import LoginRequiredTest
+from ...utils import LoginRequiredTest, PermissionRequiredTest, make_messages
+from ..test_poller import make_session_info
 
 
 class TestProcessTableView(LoginRequiredTest):
@@ -25,14 +29,14 @@ class TestProcessTableView(LoginRequiredTest):
         assert isinstance(response.context["table"], ProcessTable)
 
     def _mock_session_info(self, mocker, uuids):
-        """Mocks views.get_session_info with ProcessInstanceList like data."""
-        mock = mocker.patch("process_manager.views.partials.get_session_info")
-        instance_mocks = [MagicMock() for uuid in uuids]
-        for instance_mock, uuid in zip(instance_mocks, uuids):
-            instance_mock.uuid.uuid = str(uuid)
-            instance_mock.status_code = 0
-        mock().data.values.__iter__.return_value = instance_mocks
-        return mock
+        """Mocks the worker's poller with processes with the given UUIDs."""
+        statuses = dict.fromkeys(map(str, uuids), 0)
+        poller = ProcessPoller(lambda: make_session_info(statuses))
+        poller.poll()
+        mocker.patch(
+            "process_manager.views.partials.get_process_poller", return_value=poller
+        )
+        return poller
 
     def test_post_checked_rows(self, mocker, auth_client):
         """Tests table data is correct when post data is included."""
@@ -46,8 +50,9 @@ class TestProcessTableView(LoginRequiredTest):
         table = response.context["table"]
         assert isinstance(table, ProcessTable)
 
+        select = table.columns["select"].column
         for row in table.data.data:
-            assert row["checked"] == (row["uuid"] in selected_uuids)
+            assert select.is_checked(row.uuid, row) == (row.uuid in selected_uuids)
         assert "checked" not in table.columns["select"].attrs["th__input"]
 
     def test_post_header_checked(self, mocker, auth_client):
@@ -63,11 +68,198 @@ class TestProcessTableView(LoginRequiredTest):
         assert isinstance(table, ProcessTable)
 
         # All rows should be checked
-        assert all(row["checked"] for row in table.data.data)
+        select = table.columns["select"].column
+        assert all(select.is_checked(row.uuid, row) for row in table.data.data)
 
         # So header should be checked as well
         assert table.columns["select"].attrs["th__input"]["checked"] == "checked"
 
+    def test_not_modified(self, mocker, auth_client):
+        """Tests the table is not rendered again when the client already has it."""
+        uuids = [str(uuid4()) for _ in range(2)]
+        poller = self._mock_session_info(mocker, uuids)
+
+        response = auth_client.get(self.endpoint)
+        etag = response["ETag"]
+        assertContains(response, f'name="etag" value={etag}')
+        response = auth_client.get(self.endpoint, headers={"If-None-Match": etag})
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        data = dict(select=uuids[:1])
+        response = auth_client.post(self.endpoint, data=data)
+        etag = response["ETag"].strip('"')
+        response = auth_client.post(self.endpoint, data=dict(data, etag=etag))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+        # a different selection or processes need rendering again
+        response = auth_client.post(self.endpoint, data=dict(select=uuids, etag=etag))
+        assert response.status_code == HTTPStatus.OK
+        poller.fetch = lambda: make_session_info({uuids[0]: 1})
+        poller.poll()
+        response = auth_client.post(self.endpoint, data=dict(data, etag=etag))
+        assert response.status_code == HTTPStatus.OK
+
+    def test_page(self, mocker, auth_client, settings):
+        """Tests only the requested page of the filtered and sorted rows is shown."""
+        settings.PROCESS_TABLE_PAGE_SIZE = 2
+        all_uuids = [str(uuid4()) for _ in range(5)]
+        self._mock_session_info(mocker, all_uuids)
+
+        response = auth_client.post(
+            self.endpoint, data=dict(sort="-uuid", page="2", select=all_uuids)
+        )
+        assert response.status_code == HTTPStatus.OK
+        expected = sorted(all_uuids, reverse=True)[2:4]
+        assert response.context["shown"] == expected
+        for uuid in expected:
+            assertContains(response, f'name="shown" value="{uuid}"')
+        assert response.context["table"].page.number == 2
+        assertContains(
+            response,
+            '<input type="hidden" id="table-page" name="page" value="2">',
+            html=True,
+        )
+
+
+class TestProcessUpdatesView(LoginRequiredTest):
+    """Test the process_manager.views.process_updates view function."""
+
+    endpoint = reverse("process_manager:process_updates")
+    template_name = "process_manager/partials/process_updates.html"
+
+    @pytest.fixture
+    def poller(self, mocker):
+        """Mock the worker's poller with one whose processes can be set."""
+        uuids = [str(uuid4()), str(uuid4())]
+        statuses = dict.fromkeys(uuids, 0)
+        poller = ProcessPoller(lambda: make_session_info(statuses))
+        poller.statuses = statuses
+        poller.uuids = uuids
+        poller.poll()
+        mocker.patch(
+            "process_manager.views.partials.get_process_poller", return_value=poller
+        )
+        return poller
+
+    def test_unknown_version(self, auth_client, poller):
+        """Tests that clients without a known version are told to reload the table."""
+        with assertTemplateUsed(template_name=self.template_name):
+            response = auth_client.post(self.endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assert response["HX-Trigger"] == "processes-changed"
+        assert response.context["version"] == poller.version
+        assert len(response.context["table"].rows) == 0
+
+    def test_changed_rows(self, auth_client, poller):
+        """Tests that only changed rows are rendered, with selections preserved."""
+        a, b = poller.uuids
+        version = poller.version
+        poller.statuses[b] = 1
+        poller.poll()
+
+        response = auth_client.post(
+            self.endpoint, data=dict(version=version, select=[b], shown=[a, b])
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert "HX-Trigger" not in response
+        assert response.context["version"] == poller.version
+        assert response.context["table"].data.data == [poller.rows[b]]
+        assertContains(response, f'id="process-{b}"')
+        assertContains(response, f'value="{b}" checked="checked"')
+
+    def test_unchanged(self, auth_client, poller):
+        """Tests polls are answered with no content when nothing has changed."""
+        response = auth_client.post(
+            self.endpoint, data=dict(version=poller.version, shown=poller.uuids)
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_shown_rows_changed(self, auth_client, poller):
+        """Tests clients are told to reload the table when the page shown changes."""
+        version = poller.version
+        poller.statuses[poller.uuids[1]] = 1
+        poller.poll()
+
+        response = auth_client.post(
+            self.endpoint,
+            data=dict(version=version, shown=poller.uuids, status="RUNNING"),
+        )
+        assert response["HX-Trigger"] == "processes-changed"
+        assert len(response.context["table"].rows) == 0
+
+
+class TestProcessDataView(LoginRequiredTest):
+    """Test the process_manager.views.partials.process_data view function."""
+
+    endpoint = reverse("process_manager:process_data")
+
+    def test_get(self, auth_client, mocker):
+        """Tests all rows are sent at first, then only those that have changed."""
+        a, b = str(uuid4()), str(uuid4())
+        statuses = {a: 0, b: 0}
+        poller = ProcessPoller(lambda: make_session_info(statuses))
+        poller.poll()
+        mocker.patch(
+            "process_manager.views.partials.get_process_poller", return_value=poller
+        )
+
+        data = auth_client.get(self.endpoint).json()
+        assert data["full"]
+        assert data["version"] == poller.version
+        assert data["removed"] == []
+        assert [dict(zip(data["fields"], row)) for row in data["rows"]] == [
+            dict(
+                uuid=uuid,
+                name="process",
+                user="root",
+                session="session",
+                status_code="RUNNING",
+                exit_code=0,
+            )
+            for uuid in (a, b)
+        ]
+
+        version = poller.version
+        response = auth_client.get(self.endpoint, data=dict(version=version))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+        statuses[a] = 1
+        del statuses[b]
+        poller.poll()
+        data = auth_client.get(self.endpoint, data=dict(version=version)).json()
+        assert not data["full"]
+        assert [row[0] for row in data["rows"]] == [a]
+        assert data["rows"][0][data["fields"].index("status_code")] == "DEAD"
+        assert data["removed"] == [b]
+
+
+class TestSessionSummaryView(LoginRequiredTest):
+    """Test the process_manager.views.partials.session_summary view function."""
+
+    endpoint = reverse("process_manager:session_summary")
+
+    def test_get(self, auth_client, mocker):
+        """Tests a row per session is rendered, until nothing has changed."""
+        a, b = str(uuid4()), str(uuid4())
+        poller = ProcessPoller(
+            lambda: make_session_info({a: 0, b: 1}, sessions={a: "one", b: "two"})
+        )
+        poller.poll()
+        mocker.patch(
+            "process_manager.views.partials.get_process_poller", return_value=poller
+        )
+
+        response = auth_client.get(self.endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["version"] == poller.version
+        table = response.context["table"]
+        assert [row.record.session for row in table.rows] == ["one", "two"]
+        assertContains(response, "RUNNING 1")
+        assertContains(response, "DEAD 1")
+
+        response = auth_client.get(self.endpoint, data=dict(version=poller.version))
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
 
 class TestMessagesView(LoginRequiredTest):
     """Test the process_manager.views.messages view function."""
@@ -75,20 +267,155 @@ class TestMessagesView(LoginRequiredTest):
     endpoint = reverse("process_manager:messages")
 
     def test_get(self, auth_client):
-        """Tests basic calls of view method."""
-        from django.contrib.sessions.backends.db import SessionStore
-        from django.contrib.sessions.models import Session
-
-        session = Session.objects.get()
+        """Tests that only messages not yet shown to the user are rendered."""
         message_data = ["message 1", "message 2"]
-        store = SessionStore(session_key=session.session_key)
-        store["messages"] = message_data
-        store.save()
+        existing = make_messages(["old message"])
 
+        # the first request sets the cursor to the latest message
+        response = auth_client.get(self.endpoint)
+        assert response.context["messages"] == []
+        assert auth_client.session["message_cursor"] == existing[-1].id
+
+        created = make_messages(message_data)
         with assertTemplateUsed("process_manager/partials/message_items.html"):
             response = auth_client.get(self.endpoint)
         assert response.status_code == HTTPStatus.OK
 
-        # messages have been removed from the session and added to the context
-        assert response.context["messages"] == message_data[::-1]
-        assert "messages" not in store.load()
+        # newest message first and the cursor moved past the shown messages
+        assert [str(m) for m in response.context["messages"]] == message_data[::-1]
+        assert auth_client.session["message_cursor"] == created[-1].id
+
+    def test_get_filtered(self, auth_client):
+        """Tests that messages are filtered by session and minimum severity."""
+        session = auth_client.session
+        session["message_cursor"] = 0
+        session.save()
+        make_messages(["debug"], session="a", severity=10)
+        make_messages(["other session"], session="b", severity=40)
+        make_messages(["error"], session="a", severity=40)
+
+        response = auth_client.get(self.endpoint, dict(session="a", severity="20"))
+        assert [str(m) for m in response.context["messages"]] == ["error"]
+
+        response = auth_client.get(self.endpoint)
+        assert response.context["messages"] == []
+
+
+class TestLogLinesView(PermissionRequiredTest):
+    """Test the process_manager.views.partials.log_lines view function."""
+
+    uuid = uuid4()
+    endpoint = reverse("process_manager:log_lines", kwargs=dict(uuid=uuid))
+
+    def test_get(self, auth_logs_client, mocker):
+        """Tests a page of lines before those already shown is streamed."""
+        mock = mocker.patch(
+            "process_manager.views.partials.iter_process_logs",
+            return_value=iter(["line 1", "line 2", "line 3", "line 4"]),
+        )
+        response = auth_logs_client.get(self.endpoint, dict(lines="2", skip="2"))
+        assert response.status_code == HTTPStatus.OK
+        content = b"".join(response.streaming_content).decode()
+
+        mock.assert_called_once_with(str(self.uuid), 4)
+        assert "line 2" in content
+        assert "line 3" not in content
+
+
+class TestMergedLogLinesView(PermissionRequiredTest):
+    """Test the process_manager.views.partials.merged_log_lines view function."""
+
+    endpoint = reverse("process_manager:merged_log_lines")
+
+    def test_get(self, auth_logs_client, mocker):
+        """Tests the logs of the processes are merged by timestamp."""
+        first, second = str(uuid4()), str(uuid4())
+        session_info = make_session_info({first: 0, second: 0})
+        for process, name in zip(session_info.data.values, ("one", "two")):
+            process.process_description.metadata.name = name
+        mocker.patch(
+            "process_manager.views.partials.get_session_info",
+            return_value=session_info,
+        )
+        mock = mocker.patch(
+            "process_manager.views.partials.gather_process_logs",
+            return_value=(
+                {
+                    first: ["2024-01-01 00:00:02 later"],
+                    second: ["2024-01-01 00:00:01 earlier"],
+                },
+                {},
+            ),
+        )
+
+        response = auth_logs_client.get(
+            self.endpoint, dict(uuid=[first, second, "invalid"], lines=5)
+        )
+        mock.assert_not_called()
+        content = b"".join(response.streaming_content).decode()
+
+        mock.assert_called_once_with([first, second], 5)
+        assert content.index("two</span> 2024-01-01 00:00:01 earlier") < content.index(
+            "one</span> 2024-01-01 00:00:02 later"
+        )
+
+    def test_get_failed(self, auth_logs_client, mocker):
+        """Tests a log that cannot be read is reported without losing the others."""
+        first, second = str(uuid4()), str(uuid4())
+        mocker.patch(
+            "process_manager.views.partials.get_session_info",
+            return_value=make_session_info({first: 0, second: 0}),
+        )
+        mocker.patch(
+            "process_manager.views.partials.gather_process_logs",
+            return_value=(
+                {first: ["2024-01-01 00:00:01 line"]},
+                {second: "not found"},
+            ),
+        )
+
+        response = auth_logs_client.get(self.endpoint, dict(uuid=[first, second]))
+        content = b"".join(response.streaming_content).decode()
+
+        assert response.status_code == HTTPStatus.OK
+        assert "Failed to read the log: not found" in content
+        assert "2024-01-01 00:00:01 line" in content
+
+
+class TestJobsView(LoginRequiredTest):
+    """Test the process_manager.views.partials.jobs view function."""
+
+    endpoint = reverse("process_manager:jobs")
+
+    def test_get(self, auth_client):
+        """Tests the user's jobs are shown, and polling stops once all are finished."""
+        user = auth_client.session["_auth_user_id"]
+        job = Job.objects.create(
+            action="kill", user_id=user, total=2, results=dict(a="", b="failed")
+        )
+        Job.objects.create(action="kill", total=1)
+
+        response = auth_client.get(self.endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assert response.context["jobs"] == [job]
+        assertContains(response, "b: failed")
+
+        job.status = Job.Status.FAILED
+        job.save()
+        response = auth_client.get(self.endpoint)
+        assert response.status_code == 286
+
+    def test_get_stale(self, auth_client, settings):
+        """Tests jobs that have not finished in time are failed and polling stops."""
+        settings.PROCESS_JOB_TIMEOUT = 60
+        user = auth_client.session["_auth_user_id"]
+        job = Job.objects.create(action="kill", user_id=user, status="running")
+        Job.objects.filter(id=job.id).update(
+            created=timezone.now() - timedelta(minutes=2)
+        )
+
+        response = auth_client.get(self.endpoint)
+        assert response.status_code == 286
+        job.refresh_from_db()
+        assert job.status == Job.Status.FAILED
+        assert job.finished is not None
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+from uuid import uuid4
+
+import pytest
+from django.urls import reverse
+
+from process_manager.logs import line_id
+
+from ...utils import LoginRequiredTest, PermissionRequiredTest, make_messages
+
+
+@pytest.fixture(autouse=True)
+def short_streams(settings):
+    """Close streams after a single poll so that tests can read them in full."""
+    settings.SSE_MAX_DURATION = 0
+
+
+class TestMessageStreamView(LoginRequiredTest):
+    """Test the process_manager.views.streams.messages view function."""
+
+    endpoint = reverse("process_manager:message_stream")
+
+    def test_get(self, auth_client):
+        """Tests that new messages are streamed and the session cursor updated."""
+        session = auth_client.session
+        session["message_cursor"] = 0
+        session.save()
+        created = make_messages(["message 1", "message 2"])
+
+        response = auth_client.get(self.endpoint)
+        assert response.status_code == HTTPStatus.OK
+        assert response["Content-Type"] == "text/event-stream"
+        content = b"".join(response.streaming_content).decode()
+
+        assert "event: messages" in content
+        assert f"id: {created[-1].id}" in content
+        assert content.index("message 2") < content.index("message 1")
+        assert auth_client.session["message_cursor"] == created[-1].id
+
+    def test_get_last_event_id(self, auth_client):
+        """Tests that reconnecting clients resume from the last event they received."""
+        created = make_messages(["message 1", "message 2"])
+        response = auth_client.get(
+            self.endpoint, headers={"Last-Event-ID": str(created[0].id)}
+        )
+        content = b"".join(response.streaming_content).decode()
+        assert "message 1" not in content
+        assert "message 2" in content
+
+    def test_get_no_messages(self, auth_client, settings):
+        """Tests that a keep-alive is sent when there are no messages."""
+        settings.SSE_KEEPALIVE = 0
+        response = auth_client.get(self.endpoint)
+        content = b"".join(response.streaming_content).decode()
+        assert "event: messages" not in content
+        assert ": keep-alive" in content
+
+
+class TestLogStreamView(PermissionRequiredTest):
+    """Test the process_manager.views.streams.logs view function."""
+
+    uuid = uuid4()
+    endpoint = reverse("process_manager:log_stream", kwargs=dict(uuid=uuid))
+
+    @pytest.fixture
+    def logs_mock(self, mocker):
+        """Mock the process manager to return some log lines."""
+        return mocker.patch(
+            "process_manager.views.streams.iter_process_logs",
+            side_effect=lambda uuid, how_far: iter(["line 1", "line 2"]),
+        )
+
+    def test_get(self, auth_logs_client, logs_mock):
+        """Tests the last lines of the log are streamed."""
+        response = auth_logs_client.get(self.endpoint, dict(lines="2"))
+        assert response["Content-Type"] == "text/event-stream"
+        content = b"".join(response.streaming_content).decode()
+
+        logs_mock.assert_called_once_with(str(self.uuid), 2)
+        assert "event: lines" in content
+        assert f"id: {line_id('line 2')}" in content
+        assert content.index("line 1") < content.index("line 2")
+
+    def test_get_resume(self, auth_logs_client, logs_mock):
+        """Tests the stream resumes after the last line received."""
+        response = auth_logs_client.get(
+            self.endpoint, headers={"Last-Event-ID": line_id("line 1")}
+        )
+        content = b"".join(response.streaming_content).decode()
+        assert "line 1" not in content
+        assert "line 2" in content
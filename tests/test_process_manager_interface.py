@@ -1,4 +1,19 @@
-from process_manager.process_manager_interface import boot_process
+import asyncio
+import itertools
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import grpc
+import pytest
+
+from process_manager.process_manager_interface import (
+    DriverPool,
+    ProcessAction,
+    boot_process,
+    boot_processes,
+    gather_process_logs,
+    process_call,
+)
 
 
 def test_boot_process(mocker, dummy_session_data):
@@ -11,3 +26,229 @@ def test_boot_process(mocker, dummy_session_data):
     mock.return_value.dummy_boot.assert_called_once_with(
         user="root", **dummy_session_data
     )
+
+
+def test_boot_processes(mocker, settings):
+    """Test sessions are booted concurrently and failures reported per session."""
+    settings.PROCESS_BOOT_CONCURRENCY = 2
+    settings.PROCESS_BOOT_RATE = 0
+    active = 0
+    most_active = 0
+
+    async def dummy_boot(user, session_name, **kwargs):
+        nonlocal active, most_active
+        active += 1
+        most_active = max(most_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if session_name == "bad":
+            raise RuntimeError("boot failed")
+        yield
+
+    mock = mocker.patch(
+        "process_manager.process_manager_interface.get_process_manager_driver"
+    )
+    mock.return_value.dummy_boot = dummy_boot
+
+    sessions = [dict(session_name=name, n_processes=1) for name in ("a", "bad", "b")]
+    booted = []
+    result = boot_processes("root", sessions, lambda *args: booted.append(args))
+    assert result == dict(a="", bad="boot failed", b="")
+    assert sorted(booted) == [("a", ""), ("b", ""), ("bad", "boot failed")]
+    assert most_active == 2
+
+
+def test_boot_processes_timeout(mocker, settings):
+    """Test a boot that does not complete in time fails without holding up others."""
+    settings.PROCESS_MANAGER_TIMEOUT = 0.05
+    settings.PROCESS_BOOT_RATE = 0
+
+    async def dummy_boot(user, session_name, **kwargs):
+        if session_name == "slow":
+            await asyncio.sleep(1)
+        yield
+
+    mock = mocker.patch(
+        "process_manager.process_manager_interface.get_process_manager_driver"
+    )
+    mock.return_value.dummy_boot = dummy_boot
+
+    sessions = [dict(session_name=name, n_processes=1) for name in ("slow", "a")]
+    booted = []
+    result = boot_processes("root", sessions, lambda *args: booted.append(args))
+    assert result == dict(slow="TimeoutError", a="")
+    assert booted == [("a", ""), ("slow", "TimeoutError")]
+
+
+def test_boot_processes_rate(mocker, settings):
+    """Test boots admitted together as others finish are still spaced out."""
+    settings.PROCESS_BOOT_CONCURRENCY = 2
+    settings.PROCESS_BOOT_RATE = 20
+    durations = dict(a=0.2, b=0.15, c=0, d=0)
+    starts = []
+
+    async def dummy_boot(user, session_name, **kwargs):
+        starts.append(time.monotonic())
+        await asyncio.sleep(durations[session_name])
+        yield
+
+    mock = mocker.patch(
+        "process_manager.process_manager_interface.get_process_manager_driver"
+    )
+    mock.return_value.dummy_boot = dummy_boot
+
+    # a and b finish together, when c and d are admitted
+    sessions = [dict(session_name=name, n_processes=1) for name in durations]
+    boot_processes("root", sessions)
+    assert all(later - earlier >= 0.04 for earlier, later in itertools.pairwise(starts))
+
+
+def test_gather_process_logs(mocker, settings):
+    """Test logs are read concurrently, up to the concurrency limit."""
+    settings.PROCESS_LOG_CONCURRENCY = 2
+    active = []
+    most_active = 0
+
+    async def logs(request):
+        nonlocal most_active
+        active.append(request)
+        most_active = max(most_active, len(active))
+        await asyncio.sleep(0.01)
+        active.remove(request)
+        for i in range(request.how_far):
+            line = MagicMock()
+            line.data.line = f"{request.query.uuids[0].uuid} {i}"
+            yield line
+
+    mock = mocker.patch(
+        "process_manager.process_manager_interface.get_process_manager_driver"
+    )
+    mock.return_value.logs = logs
+
+    logs, errors = gather_process_logs(["a", "b", "c"], 2)
+    assert logs == dict(a=["a 0", "a 1"], b=["b 0", "b 1"], c=["c 0", "c 1"])
+    assert errors == {}
+    assert most_active == 2
+
+
+def test_gather_process_logs_failed(mocker):
+    """Test a log that cannot be read is reported without losing the others."""
+
+    async def logs(request):
+        uuid = request.query.uuids[0].uuid
+        if uuid == "b":
+            raise RuntimeError("not found")
+        line = MagicMock()
+        line.data.line = uuid
+        yield line
+
+    mock = mocker.patch(
+        "process_manager.process_manager_interface.get_process_manager_driver"
+    )
+    mock.return_value.logs = logs
+
+    assert gather_process_logs(["a", "b"], 1) == (dict(a=["a"]), dict(b="not found"))
+
+
+def test_process_call_restart(mocker, settings):
+    """Test restarts are made concurrently and failures reported per process."""
+    settings.PROCESS_RESTART_CONCURRENCY = 2
+    active = 0
+    most_active = 0
+
+    async def restart(query):
+        nonlocal active, most_active
+        active += 1
+        most_active = max(most_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if query.uuids[0].uuid == "bad":
+            raise RuntimeError("restart failed")
+
+    mock = mocker.patch(
+        "process_manager.process_manager_interface.get_process_manager_driver"
+    )
+    mock.return_value.restart = restart
+
+    result = process_call(["a", "bad", "b"], ProcessAction.RESTART)
+    assert result.succeeded == ["a", "b"]
+    assert result.failed == {"bad": "restart failed"}
+    assert most_active == 2
+
+
+def test_process_call_kill_failed(mocker):
+    """Test a failed batch action is reported as failing for every process."""
+    mock = mocker.patch(
+        "process_manager.process_manager_interface.get_process_manager_driver"
+    )
+    mock.return_value.kill.side_effect = RuntimeError("unavailable")
+
+    result = process_call(["a", "b"], ProcessAction.KILL)
+    assert result.succeeded == []
+    assert result.failed == {"a": "unavailable", "b": "unavailable"}
+
+
+class TestDriverPool:
+    """Tests for the DriverPool class."""
+
+    @pytest.fixture
+    def driver_mock(self, mocker):
+        """Mock the driver class so each instantiation returns a new healthy mock."""
+
+        def make_driver(*args, **kwargs):
+            driver = MagicMock()
+            driver.channel.get_state.return_value = grpc.ChannelConnectivity.READY
+            driver.channel.close = AsyncMock()
+            return driver
+
+        return mocker.patch(
+            "process_manager.process_manager_interface.ProcessManagerDriver",
+            side_effect=make_driver,
+        )
+
+    def test_invalid_size(self):
+        """Test that a pool must hold at least one driver."""
+        with pytest.raises(ValueError):
+            DriverPool("address", 0)
+
+    def test_reuse(self, driver_mock):
+        """Test drivers are created lazily, handed out round-robin and reused."""
+        pool = DriverPool("address", 2)
+        drivers = [pool.acquire() for _ in range(4)]
+        assert driver_mock.call_count == 2
+        assert drivers[0] is drivers[2]
+        assert drivers[1] is drivers[3]
+        assert drivers[0] is not drivers[1]
+
+    def test_unhealthy_replaced(self, driver_mock):
+        """Test that a driver with a failed channel is replaced."""
+        pool = DriverPool("address", 1)
+        driver = pool.acquire()
+        driver.channel.get_state.return_value = (
+            grpc.ChannelConnectivity.TRANSIENT_FAILURE
+        )
+        assert pool.acquire() is not driver
+        assert driver_mock.call_count == 2
+
+    def test_discard(self, driver_mock):
+        """Test that a discarded driver is recreated on next use."""
+        pool = DriverPool("address", 1)
+        driver = pool.acquire()
+        pool.discard(driver)
+        assert pool.acquire() is not driver
+
+    def test_channels_closed(self, driver_mock):
+        """Test the channels of replaced and discarded drivers are closed."""
+
+        async def replace_and_discard():
+            pool = DriverPool("address", 1)
+            unhealthy = pool.acquire()
+            unhealthy.channel.get_state.return_value = grpc.ChannelConnectivity.SHUTDOWN
+            discarded = pool.acquire()
+            pool.discard(discarded)
+            for _ in range(3):
+                await asyncio.sleep(0)
+            return unhealthy, discarded
+
+        for driver in asyncio.run(replace_and_discard()):
+            driver.channel.close.assert_awaited_once()
@@ -1,8 +1,11 @@
 from http import HTTPStatus
 
 from django.urls import reverse
+from django.utils import timezone
 from pytest_django.asserts import assertRedirects
 
+from main.models import KafkaMessage
+
 
 class LoginRequiredTest:
     """Tests for views that require authentication."""
@@ -24,3 +27,19 @@ class PermissionRequiredTest(LoginRequiredTest):
         """Test that authenticated users missing permissions are blocked."""
         response = auth_client.get(self.endpoint)
         assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def make_messages(bodies, topic="control.test.process_manager", **fields):
+    """Store Kafka messages with the given bodies and any other field values."""
+    start = KafkaMessage.objects.count()
+    return [
+        KafkaMessage.objects.create(
+            topic=topic,
+            partition=0,
+            offset=start + i,
+            timestamp=timezone.now(),
+            body=body,
+            **fields,
+        )
+        for i, body in enumerate(bodies)
+    ]